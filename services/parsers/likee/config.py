@@ -7,6 +7,11 @@ class Config(BaseSettings):
     CLICKHOUSE_URL: str
     LOGSTASH_HOST: str
     LOGSTASH_PORT: int
+    # REST API для аренды прокси/аккаунтов (задачи с resource_pool)
+    RESOURCE_API_URL: str | None = None
+    RESOURCE_LEASE_TTL_SECONDS: int = 900
+    # Пауза перед возвратом задачи в очередь, если ресурсы не выданы
+    RESOURCE_RETRY_DELAY_SECONDS: int = 30
 
     model_config = {
         "env_file": ".env"
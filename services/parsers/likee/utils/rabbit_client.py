@@ -1,11 +1,13 @@
 import asyncio
 import json
+import socket
 
 from aio_pika import connect_robust, IncomingMessage
+from config import config
 from core.parser import LikeeParser
+from utils.lease_client import ResourceLeaseClient, ResourcesUnavailable
 from utils.logger import TCPLogger
 
-
 class RabbitMQParserClient:
     def __init__(self, amqp_url: str, queue_name: str,
                  logger: TCPLogger, parser: LikeeParser):
@@ -17,6 +19,12 @@ class RabbitMQParserClient:
         self.connection = None
         self.channel = None
         self.queue = None
+        self.leases = ResourceLeaseClient(
+            config.RESOURCE_API_URL, logger,
+            holder=f"{queue_name}@{socket.gethostname()}",
+            ttl_seconds=config.RESOURCE_LEASE_TTL_SECONDS,
+            retry_delay_seconds=config.RESOURCE_RETRY_DELAY_SECONDS,
+        )
 
     async def connect(self):
         """Подключаемся к RabbitMQ."""
@@ -27,7 +35,7 @@ class RabbitMQParserClient:
 
     async def handle_message(self, message: IncomingMessage):
         """Обрабатываем сообщение из очереди."""
-        async with message.process():
+        async with message.process(ignore_processed=True):
             task_data_str = message.body.decode()
             print(task_data_str)
             task_data = json.loads(task_data_str)
@@ -35,21 +43,24 @@ class RabbitMQParserClient:
             task_type: str = task_data.get("type")
             user_id: int = task_data.get("user_id")
             channel_id: int = task_data.get("channel_id")
-            proxy_list: list = task_data.get("proxy_list")
             parse_started_at = task_data.get("parse_started_at")
 
-            self.logger.send("INFO", f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {url} и прокси: {proxy_list}")
+            self.logger.send("INFO", f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {url}")
             print(f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {url}")
             if task_type == "channel":
                 self.logger.send("INFO", f"Начал парсить канал {url}")
-                data = await self.parser.parse_channel(
-                    url,
-                    channel_id,
-                    user_id,
-                    proxy_list=proxy_list,
-                    max_retries=3,
-                    parse_started_at=parse_started_at,
-                )
+                try:
+                    async with self.leases.resources_for(task_data) as (_, proxy_list):
+                        data = await self.parser.parse_channel(
+                            url,
+                            channel_id,
+                            user_id,
+                            proxy_list=proxy_list,
+                            max_retries=3,
+                            parse_started_at=parse_started_at,
+                        )
+                except ResourcesUnavailable as e:
+                    await self.leases.retry_later(message, e)
 
             # if task_type == "video":
             #     self.logger.send("INFO", f"Начал парсить видео {url}")
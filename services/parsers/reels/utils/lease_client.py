@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from utils.logger import TCPLogger
+
+
+class ResourcesUnavailable(Exception):
+    """Ресурсы для задачи не выданы: задачу возвращаем в очередь, а не парсим без них."""
+
+
+@dataclass
+class Lease:
+    """Аренда ресурсов одного вида (proxies/accounts) у REST API."""
+    kind: str
+    lease_id: Optional[str]
+    values: list[str]
+
+
+class ResourceLeaseClient:
+    """
+    Аренда прокси и аккаунтов на время задачи: задача несёт только ссылку
+    на пул (resource_pool), ресурсы берутся через /proxies/lease и /accounts/lease,
+    продлеваются на половине срока и возвращаются после задачи.
+    """
+
+    def __init__(self, api_url: Optional[str], logger: TCPLogger, holder: str,
+                 ttl_seconds: int = 900, timeout: float = 15.0,
+                 retry_delay_seconds: float = 30.0):
+        """holder — кто держит аренду (видно в таблицах proxies/account)."""
+        self.api_url = api_url.rstrip("/") if api_url else None
+        self.logger = logger
+        self.holder = holder
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.retry_delay_seconds = retry_delay_seconds
+
+    async def _post(self, path: str, payload: Optional[dict] = None) -> dict:
+        """POST в REST API, ответ — JSON."""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            resp = await client.post(f"{self.api_url}{path}", json=payload or {})
+            resp.raise_for_status()
+            return resp.json()
+
+    async def acquire(self, kind: str, pool: str, count: int, min_count: int = 1) -> Lease:
+        """
+        Арендуем до count ресурсов пула. Если API недоступен или свободных
+        меньше min_count — ResourcesUnavailable.
+        """
+        try:
+            data = await self._post(f"/{kind}/lease", {
+                "pool": pool,
+                "count": count,
+                "ttl_seconds": self.ttl_seconds,
+                "holder": self.holder,
+            })
+        except Exception as e:
+            raise ResourcesUnavailable(f"Не удалось арендовать {kind} ({pool}): {e}") from e
+        lease = Lease(
+            kind=kind,
+            lease_id=data.get("lease_id"),
+            values=[item["value"] for item in data.get("items") or []],
+        )
+        if len(lease.values) < min(min_count, count):
+            await self.release(lease)
+            raise ResourcesUnavailable(f"Свободных {kind} ({pool}): {len(lease.values)} из {count}")
+        if len(lease.values) < count:
+            self.logger.send("WARNING", f"⚠️ Свободных {kind} ({pool}): {len(lease.values)} из {count}")
+        return lease
+
+    async def renew(self, lease: Lease) -> bool:
+        """Продлеваем аренду."""
+        if not lease.lease_id:
+            return False
+        try:
+            await self._post(f"/{lease.kind}/lease/{lease.lease_id}/renew",
+                             {"ttl_seconds": self.ttl_seconds})
+            return True
+        except Exception as e:
+            self.logger.send("WARNING", f"⚠️ Не удалось продлить аренду {lease.kind} {lease.lease_id}: {e}")
+            return False
+
+    async def release(self, lease: Lease):
+        """Возвращаем ресурсы; если не вышло — они освободятся по истечении срока."""
+        if not lease.lease_id:
+            return
+        try:
+            await self._post(f"/{lease.kind}/lease/{lease.lease_id}/release")
+        except Exception as e:
+            self.logger.send("WARNING", f"⚠️ Не удалось вернуть аренду {lease.kind} {lease.lease_id}: {e}")
+
+    async def _keep_alive(self, leases: list[Lease]):
+        """Продлеваем аренды на половине срока, пока идёт задача."""
+        while True:
+            await asyncio.sleep(max(self.ttl_seconds / 2, 1))
+            for lease in leases:
+                await self.renew(lease)
+
+    async def retry_later(self, message, error: ResourcesUnavailable):
+        """Возвращаем сообщение в очередь после паузы, чтобы не крутить его вхолостую."""
+        self.logger.send(
+            "WARNING",
+            f"⚠️ {error} — задача вернётся в очередь через {self.retry_delay_seconds:g} с",
+        )
+        await asyncio.sleep(self.retry_delay_seconds)
+        await message.nack(requeue=True)
+
+    @asynccontextmanager
+    async def resources_for(self, task_data: dict):
+        """
+        Отдаём (аккаунты, прокси) для задачи. Без resource_pool —
+        старые поля accounts/proxy_list из сообщения.
+        Если арендовать ресурсы не вышло — ResourcesUnavailable до начала задачи.
+        """
+        pool = task_data.get("resource_pool")
+        if not pool:
+            yield task_data.get("accounts") or [], task_data.get("proxy_list") or []
+            return
+        if not self.api_url:
+            raise ResourcesUnavailable("RESOURCE_API_URL не задан — ресурсы по resource_pool не арендовать")
+
+        leases = []
+        try:
+            leases.append(await self.acquire("proxies", pool["proxies"], pool.get("proxy_count") or 1))
+            if pool.get("accounts"):
+                leases.append(await self.acquire("accounts", pool["accounts"], pool.get("account_count") or 1))
+        except ResourcesUnavailable:
+            for lease in leases:
+                await self.release(lease)
+            raise
+        keep_alive = asyncio.create_task(self._keep_alive(leases))
+        try:
+            proxies = leases[0].values
+            accounts = leases[1].values if len(leases) > 1 else []
+            yield accounts, proxies
+        finally:
+            keep_alive.cancel()
+            for lease in leases:
+                await self.release(lease)
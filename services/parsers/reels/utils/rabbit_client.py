@@ -1,5 +1,6 @@
 import asyncio
 import json
+import socket
 from typing import Optional
 
 from aio_pika import connect_robust, IncomingMessage
@@ -8,6 +9,7 @@ from config import config
 from core.batch_runner import InstagramBatchRunner
 from core.parser import InstagramParser
 from utils.batch_state import BatchProgressStore
+from utils.lease_client import ResourceLeaseClient, ResourcesUnavailable
 from utils.logger import TCPLogger
 
 
@@ -30,6 +32,12 @@ class RabbitMQParserClient:
         self.progress_store = progress_store or BatchProgressStore(
             config.INSTAGRAM_BATCH_STATE_DIR
         )
+        self.leases = ResourceLeaseClient(
+            config.RESOURCE_API_URL, logger,
+            holder=f"{queue_name}@{socket.gethostname()}",
+            ttl_seconds=config.RESOURCE_LEASE_TTL_SECONDS,
+            retry_delay_seconds=config.RESOURCE_RETRY_DELAY_SECONDS,
+        )
 
     async def connect(self):
         self.connection = await connect_robust(self.amqp_url)
@@ -38,15 +46,13 @@ class RabbitMQParserClient:
             self.queue_name, durable=True)
 
     async def handle_message(self, message: IncomingMessage):
-        async with message.process():
+        async with message.process(ignore_processed=True):
             task_data_str = message.body.decode()
             task_data = json.loads(task_data_str)
             url: str = task_data.get("url")
             task_type: str = task_data.get("type")
             user_id: int = task_data.get("user_id")
             channel_id: int = task_data.get("channel_id")
-            accounts: list = task_data.get("accounts") or []
-            proxy_list: list = task_data.get("proxy_list") or []
             parse_started_at = task_data.get("parse_started_at")
             batch_raw_tasks = task_data.get("channels") or []
             batch_id = task_data.get("batch_id")
@@ -62,62 +68,66 @@ class RabbitMQParserClient:
             else:
                 target_display = url or channel_id or "unknown"
 
-            accounts_count = len(accounts)
-            proxies_count = len(proxy_list)
-            self.logger.send(
-                "INFO",
-                f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {target_display} "
-                f"(аккаунтов: {accounts_count}, прокси: {proxies_count})",
-            )
-            print(
-                f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {target_display} "
-                f"(аккаунтов: {accounts_count}, прокси: {proxies_count})"
-            )
-            if task_type == "channel":
-                self.logger.send("INFO", f"Начал парсить канал {url}")
-                data = await self.parser.parse_channel(
-                            url=url,
-                            channel_id=channel_id,
-                            user_id=user_id,
-                            max_retries=None,
-                            accounts=accounts,
-                            proxy_list=proxy_list,
-                            parse_started_at=parse_started_at,
+            try:
+                async with self.leases.resources_for(task_data) as (accounts, proxy_list):
+                    accounts_count = len(accounts)
+                    proxies_count = len(proxy_list)
+                    self.logger.send(
+                        "INFO",
+                        f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {target_display} "
+                        f"(аккаунтов: {accounts_count}, прокси: {proxies_count})",
+                    )
+                    print(
+                        f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {target_display} "
+                        f"(аккаунтов: {accounts_count}, прокси: {proxies_count})"
+                    )
+                    if task_type == "channel":
+                        self.logger.send("INFO", f"Начал парсить канал {url}")
+                        data = await self.parser.parse_channel(
+                                    url=url,
+                                    channel_id=channel_id,
+                                    user_id=user_id,
+                                    max_retries=None,
+                                    accounts=accounts,
+                                    proxy_list=proxy_list,
+                                    parse_started_at=parse_started_at,
+                                )
+                    elif task_type == "instagram_batch":
+                        runner = InstagramBatchRunner(
+                            parser=self.parser,
+                            logger=self.logger,
+                            retries_per_channel=task_data.get("retries_per_channel", 1),
+                            session_refresh_on_failure=task_data.get("session_refresh_on_failure", True),
+                            collect_attempts=task_data.get("collect_attempts", 3),
+                            channels_api_url=config.CHANNELS_API_URL,
+                            channels_api_token=config.CHANNELS_API_TOKEN,
+                            channels_per_wave=task_data.get("channels_per_wave", 4),
+                            pause_between_waves_seconds=task_data.get("pause_between_waves_seconds", 300),
+                            progress_store=self.progress_store,
                         )
-            elif task_type == "instagram_batch":
-                runner = InstagramBatchRunner(
-                    parser=self.parser,
-                    logger=self.logger,
-                    retries_per_channel=task_data.get("retries_per_channel", 1),
-                    session_refresh_on_failure=task_data.get("session_refresh_on_failure", True),
-                    collect_attempts=task_data.get("collect_attempts", 3),
-                    channels_api_url=config.CHANNELS_API_URL,
-                    channels_api_token=config.CHANNELS_API_TOKEN,
-                    channels_per_wave=task_data.get("channels_per_wave", 4),
-                    pause_between_waves_seconds=task_data.get("pause_between_waves_seconds", 300),
-                    progress_store=self.progress_store,
-                )
-                batch_tasks = batch_raw_tasks or []
-                if not batch_tasks:
-                    self.logger.send("INFO", "ℹ️ Batch-задача не содержит каналов — загружаем их из API.")
-                    batch_tasks = await runner.fetch_channels_from_api()
+                        batch_tasks = batch_raw_tasks or []
+                        if not batch_tasks:
+                            self.logger.send("INFO", "ℹ️ Batch-задача не содержит каналов — загружаем их из API.")
+                            batch_tasks = await runner.fetch_channels_from_api()
 
-                if not batch_tasks:
-                    self.logger.send("INFO", "⚠️ Нет каналов для batch-парсинга, задача пропущена.")
-                    return
+                        if not batch_tasks:
+                            self.logger.send("INFO", "⚠️ Нет каналов для batch-парсинга, задача пропущена.")
+                            return
 
-                self.logger.send("INFO", f"🚀 Batch Instagram: получено {len(batch_tasks)} каналов.")
-                try:
-                    await runner.run(
-                        channel_tasks=batch_tasks,
-                        accounts=accounts,
-                        proxy_list=proxy_list,
-                        max_retries=task_data.get("max_retries"),
-                        batch_id=batch_id,
-                    )
-                finally:
-                    if batch_id:
-                        await self._notify_batch_release(batch_id)
+                        self.logger.send("INFO", f"🚀 Batch Instagram: получено {len(batch_tasks)} каналов.")
+                        try:
+                            await runner.run(
+                                channel_tasks=batch_tasks,
+                                accounts=accounts,
+                                proxy_list=proxy_list,
+                                max_retries=task_data.get("max_retries"),
+                                batch_id=batch_id,
+                            )
+                        finally:
+                            if batch_id:
+                                await self._notify_batch_release(batch_id)
+            except ResourcesUnavailable as e:
+                await self.leases.retry_later(message, e)
 
             # if task_type == "video":
             #     self.logger.send("INFO", f"Начал парсить видео {url}")
@@ -1,8 +1,11 @@
 import asyncio
 import json
+import socket
 
 from aio_pika import connect_robust, IncomingMessage
+from config import config
 from core.parser import ShortsParser
+from utils.lease_client import ResourceLeaseClient, ResourcesUnavailable
 from utils.logger import TCPLogger
 
 
@@ -16,6 +19,12 @@ class RabbitMQParserClient:
         self.connection = None
         self.channel = None
         self.queue = None
+        self.leases = ResourceLeaseClient(
+            config.RESOURCE_API_URL, logger,
+            holder=f"{queue_name}@{socket.gethostname()}",
+            ttl_seconds=config.RESOURCE_LEASE_TTL_SECONDS,
+            retry_delay_seconds=config.RESOURCE_RETRY_DELAY_SECONDS,
+        )
 
     async def connect(self):
         self.connection = await connect_robust(self.amqp_url)
@@ -24,24 +33,27 @@ class RabbitMQParserClient:
             self.queue_name, durable=True)
 
     async def handle_message(self, message: IncomingMessage):
-        async with message.process():
+        async with message.process(ignore_processed=True):
             task_data_str = message.body.decode()
             task_data = json.loads(task_data_str)
             url: str = task_data.get("url")
             task_type: str = task_data.get("type")
             user_id: int = task_data.get("user_id")
             channel_id: int = task_data.get("channel_id")
-            proxy_list: list = task_data.get("proxy_list")
             parse_started_at = task_data.get("parse_started_at")
 
             self.logger.send("INFO", f"Получена задача на парсинг {task_type}, пользователь: {user_id}, id: {url}")
             try:
-                async with message.process():
+                async with message.process(ignore_processed=True):
                     if task_type == "channel":
                         self.logger.send("INFO", f"Начал парсить канал {url}")
-                        data = await self.parser.parse_channel(
-                            url, channel_id, user_id, 3, proxy_list, parse_started_at=parse_started_at
-                        )
+                        try:
+                            async with self.leases.resources_for(task_data) as (_, proxy_list):
+                                data = await self.parser.parse_channel(
+                                    url, channel_id, user_id, 3, proxy_list, parse_started_at=parse_started_at
+                                )
+                        except ResourcesUnavailable as e:
+                            await self.leases.retry_later(message, e)
 
                     # if task_type == "video":
                     #     self.logger.send("INFO", f"Начал парсить видео {url}")
@@ -0,0 +1,66 @@
+"""videos link normalized
+
+Revision ID: 3f9b2c71d4ae
+Revises: f82f74cd21d0
+Create Date: 2026-10-18 10:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.video_link import normalize_video_link
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9b2c71d4ae'
+down_revision: Union[str, Sequence[str], None] = 'f82f74cd21d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('videos', sa.Column('link_normalized', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, link FROM videos ORDER BY id")).all()
+
+    # Первое (самое старое) видео с данной ссылкой остаётся, история дублей
+    # переносится на него, сами дубли удаляются.
+    keep_by_link: dict[str, int] = {}
+    duplicates: list[tuple[int, int]] = []
+    normalized_rows = []
+    for video_id, link in rows:
+        normalized = normalize_video_link(link)
+        keep_id = keep_by_link.setdefault(normalized, video_id)
+        if keep_id != video_id:
+            duplicates.append((video_id, keep_id))
+        else:
+            normalized_rows.append({"id": video_id, "link_normalized": normalized})
+
+    for duplicate_id, keep_id in duplicates:
+        bind.execute(
+            sa.text("UPDATE video_history SET video_id = :keep_id WHERE video_id = :duplicate_id"),
+            {"keep_id": keep_id, "duplicate_id": duplicate_id},
+        )
+        bind.execute(
+            sa.text("DELETE FROM videos WHERE id = :duplicate_id"),
+            {"duplicate_id": duplicate_id},
+        )
+
+    if normalized_rows:
+        bind.execute(
+            sa.text("UPDATE videos SET link_normalized = :link_normalized WHERE id = :id"),
+            normalized_rows,
+        )
+
+    op.alter_column('videos', 'link_normalized', nullable=False)
+    op.create_index(op.f('ix_videos_link_normalized'), 'videos', ['link_normalized'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_videos_link_normalized'), table_name='videos')
+    op.drop_column('videos', 'link_normalized')
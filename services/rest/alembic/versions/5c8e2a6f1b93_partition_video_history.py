@@ -0,0 +1,171 @@
+"""partition video history by month
+
+Revision ID: 5c8e2a6f1b93
+Revises: b7d41e09c2a5
+Create Date: 2026-10-18 14:05:51.730416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2a6f1b93'
+down_revision: Union[str, Sequence[str], None] = 'b7d41e09c2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = (
+    "id, amount_views, amount_likes, amount_comments, video_id, "
+    "created_at, updated_at, date_published, last_confirmed_at"
+)
+
+# Месячная секция video_history_pYYYY_MM с границами по UTC.
+# Если строки этого месяца уже попали в секцию по умолчанию,
+# переносим их в новую секцию перед подключением.
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_video_history_partition(month_start date)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    lower_bound timestamptz := date_trunc('month', month_start)::timestamp AT TIME ZONE 'UTC';
+    upper_bound timestamptz := (date_trunc('month', month_start) + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+    partition_name text := format('video_history_p%s', to_char(month_start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM video_history_default
+        WHERE created_at >= lower_bound AND created_at < upper_bound
+    ) THEN
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE video_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+            partition_name
+        );
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM video_history_default '
+            'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            lower_bound, upper_bound, partition_name
+        );
+        EXECUTE format(
+            'ALTER TABLE video_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, lower_bound, upper_bound
+        );
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF video_history FOR VALUES FROM (%L) TO (%L)',
+            partition_name, lower_bound, upper_bound
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$;
+"""
+
+# Секции с текущего месяца на months_ahead месяцев вперёд
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_video_history_partitions(months_ahead integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    current_month date := date_trunc('month', now() AT TIME ZONE 'UTC')::date;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        PERFORM create_video_history_partition((current_month + make_interval(months => i))::date);
+    END LOOP;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE video_history RENAME TO video_history_old")
+    op.execute("ALTER TABLE video_history_old RENAME CONSTRAINT video_history_pkey TO video_history_old_pkey")
+    op.execute("ALTER INDEX ix_video_history_id RENAME TO ix_video_history_old_id")
+    op.execute("ALTER INDEX ix_video_history_video_id RENAME TO ix_video_history_old_video_id")
+    op.execute("ALTER INDEX ix_video_history_video_id_created_at RENAME TO ix_video_history_old_video_id_created_at")
+    # Последовательность id переживает старую таблицу
+    op.execute("ALTER SEQUENCE video_history_id_seq OWNED BY NONE")
+
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute("""
+        CREATE TABLE video_history (
+            id integer NOT NULL DEFAULT nextval('video_history_id_seq'),
+            amount_views integer NOT NULL,
+            amount_likes integer NOT NULL,
+            amount_comments integer NOT NULL,
+            video_id integer NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            date_published timestamp without time zone,
+            last_confirmed_at timestamptz,
+            CONSTRAINT video_history_video_id_fkey FOREIGN KEY (video_id) REFERENCES videos (id),
+            CONSTRAINT video_history_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE INDEX ix_video_history_id ON video_history (id)")
+    op.execute("CREATE INDEX ix_video_history_video_id ON video_history (video_id)")
+    op.execute("CREATE INDEX ix_video_history_video_id_created_at ON video_history (video_id, created_at)")
+    op.execute("CREATE TABLE video_history_default PARTITION OF video_history DEFAULT")
+    op.execute("ALTER SEQUENCE video_history_id_seq OWNED BY video_history.id")
+
+    op.execute(CREATE_PARTITION_FUNCTION)
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+
+    # Секции под все месяцы существующей истории и на два месяца вперёд
+    op.execute("""
+        SELECT create_video_history_partition(month::date)
+        FROM generate_series(
+            (SELECT date_trunc('month', min(created_at) AT TIME ZONE 'UTC') FROM video_history_old),
+            date_trunc('month', now() AT TIME ZONE 'UTC'),
+            interval '1 month'
+        ) AS month
+    """)
+    op.execute("SELECT ensure_video_history_partitions(2)")
+
+    op.execute(f"INSERT INTO video_history ({COLUMNS}) SELECT {COLUMNS} FROM video_history_old")
+    op.execute("DROP TABLE video_history_old")
+    op.execute("ANALYZE video_history")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE video_history RENAME TO video_history_partitioned")
+    op.execute("ALTER TABLE video_history_partitioned RENAME CONSTRAINT video_history_pkey TO video_history_partitioned_pkey")
+    op.execute("ALTER INDEX ix_video_history_id RENAME TO ix_video_history_partitioned_id")
+    op.execute("ALTER INDEX ix_video_history_video_id RENAME TO ix_video_history_partitioned_video_id")
+    op.execute("ALTER INDEX ix_video_history_video_id_created_at RENAME TO ix_video_history_partitioned_video_id_created_at")
+    op.execute("ALTER SEQUENCE video_history_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE video_history (
+            id integer NOT NULL DEFAULT nextval('video_history_id_seq'),
+            amount_views integer NOT NULL,
+            amount_likes integer NOT NULL,
+            amount_comments integer NOT NULL,
+            video_id integer NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            date_published timestamp without time zone,
+            last_confirmed_at timestamptz,
+            CONSTRAINT video_history_video_id_fkey FOREIGN KEY (video_id) REFERENCES videos (id),
+            CONSTRAINT video_history_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("CREATE INDEX ix_video_history_id ON video_history (id)")
+    op.execute("CREATE INDEX ix_video_history_video_id ON video_history (video_id)")
+    op.execute("CREATE INDEX ix_video_history_video_id_created_at ON video_history (video_id, created_at)")
+    op.execute("ALTER SEQUENCE video_history_id_seq OWNED BY video_history.id")
+
+    op.execute(f"INSERT INTO video_history ({COLUMNS}) SELECT {COLUMNS} FROM video_history_partitioned")
+    op.execute("DROP TABLE video_history_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS ensure_video_history_partitions(integer)")
+    op.execute("DROP FUNCTION IF EXISTS create_video_history_partition(date)")
@@ -0,0 +1,45 @@
+"""scheduler state
+
+Revision ID: 7d2f5b9e1c34
+Revises: e5b1d7a3c960
+Create Date: 2026-10-18 22:41:07.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f5b9e1c34'
+down_revision: Union[str, Sequence[str], None] = 'e5b1d7a3c960'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'scheduler_batch_locks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('batch_id', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_table(
+        'scheduler_pending_tasks',
+        sa.Column('channel_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_offset_minutes', sa.Integer(), nullable=True),
+        sa.Column('schedule_wave_anchor', sa.String(), nullable=True),
+        sa.Column('queued_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('channel_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheduler_pending_tasks')
+    op.drop_table('scheduler_batch_locks')
@@ -0,0 +1,47 @@
+"""video articles
+
+Revision ID: 8e6f03b5a7d2
+Revises: d2a9f4c87e16
+Create Date: 2026-10-18 17:20:36.981547
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e6f03b5a7d2'
+down_revision: Union[str, Sequence[str], None] = 'd2a9f4c87e16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'video_articles',
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('article', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('video_id', 'article'),
+    )
+    op.create_index(
+        'ix_video_articles_article', 'video_articles', ['article'],
+        unique=False, postgresql_ops={'article': 'text_pattern_ops'},
+    )
+
+    op.execute("""
+        INSERT INTO video_articles (video_id, article)
+        SELECT DISTINCT v.id, trim(a.article)
+        FROM videos v
+        CROSS JOIN LATERAL unnest(string_to_array(v.articles, ',')) AS a(article)
+        WHERE v.articles IS NOT NULL AND trim(a.article) <> ''
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_video_articles_article', table_name='video_articles')
+    op.drop_table('video_articles')
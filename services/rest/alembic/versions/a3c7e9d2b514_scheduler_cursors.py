@@ -0,0 +1,34 @@
+"""scheduler cursors
+
+Revision ID: a3c7e9d2b514
+Revises: f4a2d8b6c013
+Create Date: 2026-10-19 03:05:12.604918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c7e9d2b514'
+down_revision: Union[str, Sequence[str], None] = 'f4a2d8b6c013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'scheduler_cursors',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('position', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheduler_cursors')
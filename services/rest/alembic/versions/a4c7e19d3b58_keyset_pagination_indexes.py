@@ -0,0 +1,36 @@
+"""keyset pagination indexes
+
+Revision ID: a4c7e19d3b58
+Revises: 8e6f03b5a7d2
+Create Date: 2026-10-18 18:42:03.615278
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e19d3b58'
+down_revision: Union[str, Sequence[str], None] = '8e6f03b5a7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Курсорная пагинация идёт по (created_at DESC, id DESC)
+    op.create_index('ix_videos_created_at_id', 'videos', ['created_at', 'id'], unique=False)
+    op.create_index('ix_videos_channel_id_created_at_id', 'videos', ['channel_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_channels_created_at_id', 'channels', ['created_at', 'id'], unique=False)
+    op.create_index('ix_channels_user_id_created_at_id', 'channels', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_channels_user_id_created_at_id', table_name='channels')
+    op.drop_index('ix_channels_created_at_id', table_name='channels')
+    op.drop_index('ix_videos_channel_id_created_at_id', table_name='videos')
+    op.drop_index('ix_videos_created_at_id', table_name='videos')
@@ -0,0 +1,28 @@
+"""channel schedule offset
+
+Revision ID: a4c81e6f2b57
+Revises: 7d2f5b9e1c34
+Create Date: 2026-10-18 23:37:52.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c81e6f2b57'
+down_revision: Union[str, Sequence[str], None] = '7d2f5b9e1c34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channels', sa.Column('schedule_offset_minutes', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('channels', 'schedule_offset_minutes')
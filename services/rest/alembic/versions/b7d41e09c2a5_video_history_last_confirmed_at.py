@@ -0,0 +1,31 @@
+"""video history last confirmed at
+
+Revision ID: b7d41e09c2a5
+Revises: 3f9b2c71d4ae
+Create Date: 2026-10-18 12:31:07.524190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41e09c2a5'
+down_revision: Union[str, Sequence[str], None] = '3f9b2c71d4ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('video_history', sa.Column('last_confirmed_at', sa.DateTime(timezone=True), nullable=True))
+    # Поиск последнего снимка видео при записи только изменений
+    op.create_index('ix_video_history_video_id_created_at', 'video_history', ['video_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_video_history_video_id_created_at', table_name='video_history')
+    op.drop_column('video_history', 'last_confirmed_at')
@@ -0,0 +1,29 @@
+"""video history keyset index
+
+Revision ID: c3e85a1f7b42
+Revises: a4c7e19d3b58
+Create Date: 2026-10-18 19:27:46.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e85a1f7b42'
+down_revision: Union[str, Sequence[str], None] = 'a4c7e19d3b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Курсор и потоковая выгрузка истории идут по (created_at, id);
+    # индекс создаётся на каждой секции video_history
+    op.create_index('ix_video_history_created_at_id', 'video_history', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_video_history_created_at_id', table_name='video_history')
@@ -0,0 +1,27 @@
+"""channel schedule offset index
+
+Revision ID: c3e9a7d15f42
+Revises: a4c81e6f2b57
+Create Date: 2026-10-18 23:58:14.271530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7d15f42'
+down_revision: Union[str, Sequence[str], None] = 'a4c81e6f2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_channels_schedule_offset_id', 'channels', ['schedule_offset_minutes', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_channels_schedule_offset_id', table_name='channels')
@@ -0,0 +1,48 @@
+"""channel lane slots
+
+Revision ID: c8d4f1a6e273
+Revises: a3c7e9d2b514
+Create Date: 2026-10-19 14:21:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d4f1a6e273'
+down_revision: Union[str, Sequence[str], None] = 'a3c7e9d2b514'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'channel_lane_slots',
+        sa.Column(
+            'type',
+            postgresql.ENUM('TIKTOK', 'YOUTUBE', 'INSTAGRAM', 'LIKEE', name='channeltype', create_type=False),
+            nullable=False,
+        ),
+        sa.Column('schedule_offset_minutes', sa.Integer(), nullable=False),
+        sa.Column('channels', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('type', 'schedule_offset_minutes'),
+    )
+    op.execute(
+        """
+        INSERT INTO channel_lane_slots (type, schedule_offset_minutes, channels)
+        SELECT type, schedule_offset_minutes, count(*)
+        FROM channels
+        WHERE schedule_offset_minutes IS NOT NULL
+        GROUP BY type, schedule_offset_minutes
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('channel_lane_slots')
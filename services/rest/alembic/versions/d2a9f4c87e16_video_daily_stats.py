@@ -0,0 +1,60 @@
+"""video daily stats
+
+Revision ID: d2a9f4c87e16
+Revises: 5c8e2a6f1b93
+Create Date: 2026-10-18 15:47:12.204835
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a9f4c87e16'
+down_revision: Union[str, Sequence[str], None] = '5c8e2a6f1b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'video_daily_stats',
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.Column('likes', sa.Integer(), nullable=False),
+        sa.Column('comments', sa.Integer(), nullable=False),
+        sa.Column('date_published', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('video_id', 'day'),
+    )
+    op.create_index(op.f('ix_video_daily_stats_day'), 'video_daily_stats', ['day'], unique=False)
+
+    # Заполняем сводку из истории: снимок действует по день last_confirmed_at
+    op.execute("""
+        INSERT INTO video_daily_stats (video_id, day, views, likes, comments, date_published)
+        SELECT
+            h.video_id,
+            d.day::date,
+            max(h.amount_views),
+            max(h.amount_likes),
+            max(h.amount_comments),
+            max(h.date_published)
+        FROM video_history h
+        CROSS JOIN LATERAL generate_series(
+            (h.created_at AT TIME ZONE 'UTC')::date,
+            (coalesce(h.last_confirmed_at, h.created_at) AT TIME ZONE 'UTC')::date,
+            interval '1 day'
+        ) AS d(day)
+        GROUP BY h.video_id, d.day::date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_video_daily_stats_day'), table_name='video_daily_stats')
+    op.drop_table('video_daily_stats')
@@ -0,0 +1,39 @@
+"""velocity tiers
+
+Revision ID: e1f6b3c8a925
+Revises: c3e9a7d15f42
+Create Date: 2026-10-19 00:24:41.508316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f6b3c8a925'
+down_revision: Union[str, Sequence[str], None] = 'c3e9a7d15f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+velocity_tier = sa.Enum('HOT', 'WARM', 'COLD', name='velocitytier')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    velocity_tier.create(op.get_bind(), checkfirst=True)
+    op.add_column('videos', sa.Column('views_per_hour', sa.Float(), nullable=True))
+    op.add_column('videos', sa.Column('velocity_tier', velocity_tier, nullable=True))
+    op.create_index('ix_videos_velocity_tier_views_per_hour', 'videos', ['velocity_tier', 'views_per_hour'], unique=False)
+    op.add_column('channels', sa.Column('velocity_tier', velocity_tier, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('channels', 'velocity_tier')
+    op.drop_index('ix_videos_velocity_tier_views_per_hour', table_name='videos')
+    op.drop_column('videos', 'velocity_tier')
+    op.drop_column('videos', 'views_per_hour')
+    velocity_tier.drop(op.get_bind(), checkfirst=True)
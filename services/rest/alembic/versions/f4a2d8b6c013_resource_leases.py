@@ -0,0 +1,36 @@
+"""resource leases
+
+Revision ID: f4a2d8b6c013
+Revises: e1f6b3c8a925
+Create Date: 2026-10-19 01:12:36.840275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a2d8b6c013'
+down_revision: Union[str, Sequence[str], None] = 'e1f6b3c8a925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('account', 'proxies'):
+        op.add_column(table, sa.Column('lease_id', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('leased_by', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+        op.create_index(op.f(f'ix_{table}_lease_id'), table, ['lease_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('proxies', 'account'):
+        op.drop_index(op.f(f'ix_{table}_lease_id'), table_name=table)
+        op.drop_column(table, 'lease_expires_at')
+        op.drop_column(table, 'leased_by')
+        op.drop_column(table, 'lease_id')
@@ -1,16 +1,22 @@
-from typing import Callable
-from fastapi import Request, HTTPException, Depends, status
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, List, Optional
+from fastapi import Request, Response, HTTPException, Depends, status
 from fastapi.param_functions import Security
 from fastapi.security.http import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import get_db
-from app.utils.telegram_auth import check_telegram_auth
+from app.core.config import settings
+from app.utils.auth_cache import auth_cache
+from app.utils.telegram_auth import check_telegram_auth, parse_init_data
 from app.schemas.user import UserCreate
 from app.services.user import UserService
 from app.models.user import User, UserRole
+from app.utils.data_version import get_data_version
 
-import urllib.parse
 import json
+import time
 
 
 bearer_scheme = HTTPBearer(auto_error=True)
@@ -23,23 +29,29 @@ async def get_current_user(
     """Получаем текущего пользователя."""
     token = credentials.credentials
 
+    cached_user = auth_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        telegram_data = dict(pair.split("=") for pair in token.split("&"))
-    except Exception:
+        telegram_data = parse_init_data(token)
+    except ValueError:
         raise HTTPException(status_code=400, detail="Неверный формат токена телеграма")
 
-    # if not telegram_data or not check_telegram_auth(telegram_data):
-    #     raise HTTPException(status_code=401, detail="Invalid Telegram authorization")
-
     if not telegram_data:
         raise HTTPException(status_code=400, detail="Данные телеграма не найдены")
 
-    user_encoded = telegram_data.get("user")
-    if not user_encoded:
+    if settings.TELEGRAM_AUTH_VERIFY and not check_telegram_auth(telegram_data):
+        raise HTTPException(status_code=401, detail="Неверная подпись данных телеграма")
+
+    user_json_str = telegram_data.get("user")
+    if not user_json_str:
         raise HTTPException(status_code=400, detail="Данные пользователя не найдены")
 
-    user_json_str = urllib.parse.unquote(user_encoded)
-    user_data = json.loads(user_json_str)
+    try:
+        user_data = json.loads(user_json_str)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Неверный формат данных пользователя")
 
     telegram_id_str = user_data.get("id")
     if not telegram_id_str:
@@ -55,6 +67,16 @@ async def get_current_user(
 
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
+
+    # Токен не должен жить в кэше дольше, чем его auth_date остаётся валидным
+    expires_in = None
+    if settings.TELEGRAM_AUTH_VERIFY and settings.TELEGRAM_AUTH_MAX_AGE_SECONDS > 0:
+        expires_in = (
+            int(telegram_data.get("auth_date", 0))
+            + settings.TELEGRAM_AUTH_MAX_AGE_SECONDS
+            - time.time()
+        )
+    auth_cache.set(token, user, expires_in)
     return user
 
 
@@ -74,3 +96,73 @@ def require_role(*roles: UserRole):
             )
         return current_user
     return role_checker
+
+
+def _scope_user_ids(request: Request, user: Optional[User]) -> Optional[List[int]]:
+    """Пользователи, чьи данные попадут в ответ; None — все."""
+    if user is not None and user.role != UserRole.ADMIN:
+        return [user.id]
+    requested = request.query_params.getlist("user_ids") + request.query_params.getlist("user_id")
+    try:
+        scope = sorted({int(value) for value in requested if value})
+    except ValueError:
+        return None
+    return scope or None
+
+
+async def _check_not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    user: Optional[User],
+):
+    """ETag/Last-Modified по версии данных; при совпадении — 304 без запроса к данным."""
+    version, updated_at = await get_data_version(db, _scope_user_ids(request, user))
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    raw = f"{request.url.path}?{query}|{user.id if user else ''}|{version}|{updated_at}"
+    etag = f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(
+            updated_at.astimezone(timezone.utc), usegmt=True
+        )
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    elif if_modified_since is not None and updated_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and updated_at.replace(microsecond=0) <= since:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+
+def not_modified(*roles: UserRole):
+    """Условный GET: без ролей — для открытых эндпоинтов, с ролями — после проверки доступа."""
+    if roles:
+        async def checker(
+            request: Request,
+            response: Response,
+            db: AsyncSession = Depends(get_db),
+            current_user: User = Depends(require_role(*roles)),
+        ):
+            """Проверяем If-None-Match/If-Modified-Since пользователя."""
+            await _check_not_modified(request, response, db, current_user)
+        return checker
+
+    async def public_checker(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+    ):
+        """Проверяем If-None-Match/If-Modified-Since."""
+        await _check_not_modified(request, response, db, None)
+    return public_checker
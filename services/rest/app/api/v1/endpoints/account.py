@@ -7,6 +7,8 @@ from app.core.db import get_db
 
 from app.schemas.account import (AccountBulkCreateRequest, AccountCreate,
                                  AccountRead, AccountUpdate)
+from app.schemas.lease import (AccountLeaseRequest, LeaseRead, LeaseReleaseRead,
+                              LeaseRenewRead, LeaseRenewRequest)
 from app.services.account import AccountService
 
 router = APIRouter()
@@ -61,6 +63,34 @@ async def bulk_create_accounts(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/lease", response_model=LeaseRead)
+async def lease_accounts(
+    payload: AccountLeaseRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Арендуем свободные аккаунты на срок."""
+    service = AccountService(db)
+    return await service.lease(payload)
+
+
+@router.post("/lease/{lease_id}/renew", response_model=LeaseRenewRead)
+async def renew_lease(
+    lease_id: str,
+    payload: LeaseRenewRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Продлеваем аренду."""
+    service = AccountService(db)
+    return await service.renew_lease(lease_id, payload)
+
+
+@router.post("/lease/{lease_id}/release", response_model=LeaseReleaseRead)
+async def release_lease(lease_id: str, db: AsyncSession = Depends(get_db)):
+    """Возвращаем арендованные аккаунты."""
+    service = AccountService(db)
+    return await service.release_lease(lease_id)
+
+
 @router.patch("/{id}", response_model=AccountRead)
 async def update_account(
     id: int,
@@ -6,15 +6,16 @@ from sqlalchemy.ext.asyncio.session import AsyncSession
 from app.core.db import get_db
 from app.models.user import User, UserRole
 from app.models.channel import ChannelType
-from app.api.v1.dependencies import require_role
+from app.api.v1.dependencies import not_modified, require_role
 from app.schemas.channel import ChannelCreate, ChannelUpdate
 from app.services.channel import ChannelService
+from app.utils.pagination import PaginationCount
 
 
 router = APIRouter()
 
 
-@router.get("/all")
+@router.get("/all", dependencies=[Depends(not_modified(UserRole.ADMIN, UserRole.USER))])
 async def get_channels(
     user_id: Optional[int] = Query(None),
     id: Optional[int] = Query(None),
@@ -23,22 +24,29 @@ async def get_channels(
     name_channel: Optional[str] = Query(None),
     page: Optional[int] = Query(None, ge=1),
     size: Optional[int] = Query(None, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Курсор следующей страницы; пустое значение — первая страница в режиме курсора"),
+    count: PaginationCount = Query(PaginationCount.NONE, description="Подсчёт total в режиме курсора: none, exact, estimate"),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_role(UserRole.ADMIN, UserRole.USER))
 ):
     """Получаем все каналы."""
     service = ChannelService(db)
 
-    result = await service.get_all_filtered_paginated(
-        user=user,
-        user_id=user_id,
-        id=id,
-        type=type,
-        link=link,
-        name_channel=name_channel,
-        page=page,
-        size=size
-    )
+    try:
+        result = await service.get_all_filtered_paginated(
+            user=user,
+            user_id=user_id,
+            id=id,
+            type=type,
+            link=link,
+            name_channel=name_channel,
+            page=page,
+            size=size,
+            after=after,
+            count=count,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
 
 
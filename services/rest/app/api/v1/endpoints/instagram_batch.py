@@ -20,9 +20,9 @@ router = APIRouter(prefix="/instagram-batch", tags=["InstagramBatch"])
 @router.post("/release")
 async def release_batch(payload: BatchReleaseRequest):
     """Освобождаем Instagram batch."""
-    released = release_instagram_batch(payload.batch_id)
+    released = await release_instagram_batch(payload.batch_id)
     if not released:
-        active, current_id, _ = get_instagram_batch_state()
+        active, current_id, _ = await get_instagram_batch_state()
         detail = "Batch not active"
         if active and current_id:
             detail = f"Another batch ({current_id}) is active"
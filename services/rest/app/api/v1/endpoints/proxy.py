@@ -6,6 +6,8 @@ from app.core.db import get_db
 from app.schemas.proxy import (ProxyBulkCreateRequest,
                               ProxyBulkDeleteResponse,
                               ProxyCreate, ProxyRead, ProxyUpdate)
+from app.schemas.lease import (ProxyLeaseRequest, LeaseRead, LeaseReleaseRead,
+                              LeaseRenewRead, LeaseRenewRequest)
 from app.services.proxy import ProxyService
 
 router = APIRouter()
@@ -56,6 +58,34 @@ async def bulk_create_proxies(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/lease", response_model=LeaseRead)
+async def lease_proxies(
+    payload: ProxyLeaseRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Арендуем свободные прокси на срок."""
+    service = ProxyService(db)
+    return await service.lease(payload)
+
+
+@router.post("/lease/{lease_id}/renew", response_model=LeaseRenewRead)
+async def renew_lease(
+    lease_id: str,
+    payload: LeaseRenewRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Продлеваем аренду."""
+    service = ProxyService(db)
+    return await service.renew_lease(lease_id, payload)
+
+
+@router.post("/lease/{lease_id}/release", response_model=LeaseReleaseRead)
+async def release_lease(lease_id: str, db: AsyncSession = Depends(get_db)):
+    """Возвращаем арендованные прокси."""
+    service = ProxyService(db)
+    return await service.release_lease(lease_id)
+
+
 @router.patch("/{id}", response_model=ProxyRead)
 async def update_proxy(
     id: int,
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
@@ -5,6 +7,7 @@ from app.schemas.user import UserCreate, UserRead, UserRegister, UserUpdate, Pag
 from app.services.user import UserService
 from app.api.v1.dependencies import get_current_user, require_role
 from app.core.db import get_db
+from app.utils.pagination import PaginationCount
 
 
 router = APIRouter()
@@ -14,12 +17,14 @@ router = APIRouter()
 async def get_all(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Курсор следующей страницы; пустое значение — первая страница в режиме курсора"),
+    count: PaginationCount = Query(PaginationCount.NONE, description="Подсчёт total в режиме курсора: none, exact, estimate"),
     db: AsyncSession = Depends(get_db)
 ):
     """Получение всех пользователей с пагинацией"""
     service = UserService(db)
     try:
-        return await service.get_all_paginated(page, size)
+        return await service.get_all_paginated(page, size, after, count)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
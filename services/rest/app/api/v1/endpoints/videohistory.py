@@ -1,29 +1,33 @@
 # добавить возможность фильтрации по артиклям (несколько штук) DONE
 
 from datetime import date as dt_date
-from http.client import HTTPException
+from fastapi import HTTPException
 from fastapi import APIRouter, Depends, Query
 from typing import Optional, List
 from app.services.videohistory import VideoHistoryService
 from app.schemas.videohistory import HistoryParams
 from app.models.user import User, UserRole
-from app.api.v1.dependencies import require_role
+from app.api.v1.dependencies import not_modified, require_role
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from fastapi.responses import StreamingResponse
 from app.models.channel import ChannelType
-import io
-import csv
+from app.utils.pagination import PaginationCount
+from app.utils.streaming import EXPORT_MEDIA_TYPES, ExportFormat
 
 from app.core.db import get_db
 
 router = APIRouter()
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(not_modified(UserRole.ADMIN, UserRole.USER))])
 async def get_all_video_history(
     user: User = Depends(require_role(UserRole.ADMIN, UserRole.USER)),
     user_ids: Optional[List[int]] = Query(None, description="Можно передавать несколько ID: user_ids=1&user_ids=2"),
     params: HistoryParams = Depends(),
+    export_format: ExportFormat = Query(ExportFormat.JSON, alias="format", description="json, ndjson (поток) или csv (поток)"),
+    after: Optional[str] = Query(None, description="Курсор следующей страницы; пустое значение — первая страница в режиме курсора"),
+    size: Optional[int] = Query(None, ge=1, le=1000),
+    count: PaginationCount = Query(PaginationCount.NONE, description="Подсчёт total в режиме курсора: none, exact, estimate"),
     db: AsyncSession = Depends(get_db),
 ):
     """Получаем все историю видео."""
@@ -31,14 +35,33 @@ async def get_all_video_history(
     if user_ids:
         params.user_ids = user_ids
 
-    result = await service.get_all_filtered(
-        user=user,
-        **params.model_dump()
-    )
+    if export_format != ExportFormat.JSON:
+        chunks = service.export_filtered(
+            user=user,
+            export_format=export_format,
+            **params.model_dump()
+        )
+        filename = f"video_history_{dt_date.today().isoformat()}.{export_format.value}"
+        return StreamingResponse(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+
+    try:
+        result = await service.get_all_filtered(
+            user=user,
+            after=after,
+            size=size,
+            count=count,
+            **params.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
 
 
-@router.get("/filtered_stats_art")
+@router.get("/filtered_stats_art", dependencies=[Depends(not_modified(UserRole.ADMIN, UserRole.USER))])
 async def get_filtered_history_with_article(
     user: User = Depends(require_role(UserRole.ADMIN, UserRole.USER)),
     articles: Optional[str] = Query(None, description="Можно передавать через запятую: #sv,#jw"),
@@ -61,7 +84,7 @@ async def get_filtered_history_with_article(
     return result
 
 
-@router.get("/filtered_stats_all")
+@router.get("/filtered_stats_all", dependencies=[Depends(not_modified(UserRole.ADMIN, UserRole.USER))])
 async def get_filtered_history_all(
     user: User = Depends(require_role(UserRole.ADMIN, UserRole.USER)),
     user_ids: Optional[List[int]] = Query(None, description="Можно передавать несколько ID: user_ids=1&user_ids=2"),
@@ -80,7 +103,7 @@ async def get_filtered_history_all(
     return result
 
 
-@router.get("/daily_article_count")
+@router.get("/daily_article_count", dependencies=[Depends(not_modified())])
 async def daily_video_with_article_count(
     date_from: Optional[dt_date] = Query(None),
     date_to: Optional[dt_date] = Query(None),
@@ -119,7 +142,7 @@ async def daily_video_with_article_count(
     ]
 
 
-@router.get("/daily_count_all")
+@router.get("/daily_count_all", dependencies=[Depends(not_modified())])
 async def daily_video_count_all(
     date_from: Optional[dt_date] = Query(None),
     date_to: Optional[dt_date] = Query(None),
@@ -149,7 +172,7 @@ async def daily_video_count_all(
     ]
 
 
-@router.get("/download_stats_csv")
+@router.get("/download_stats_csv", dependencies=[Depends(not_modified(UserRole.ADMIN, UserRole.USER))])
 async def download_video_stats_csv(
     user: User = Depends(require_role(UserRole.ADMIN, UserRole.USER)),
     channel_type: Optional[str] = Query(None, description="youtube, tiktok, instagram, likee"),
@@ -187,7 +210,7 @@ async def download_video_stats_csv(
             ) from exc
 
     service = VideoHistoryService(db)
-    stats, sorted_dates = await service.get_video_stats_for_csv(
+    chunks = service.export_video_stats_csv(
         user=user,
         channel_type=actual_channel_type,
         target_user_id=None,
@@ -196,32 +219,15 @@ async def download_video_stats_csv(
         pub_date_to=date_to,
     )
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    header = ["Название видео", "Ссылка на ролик"] + [d.isoformat() for d in sorted_dates]
-    writer.writerow(header)
-
-    for item in stats:
-        row = [
-            item.get("video_name") or "",
-            item["link"],
-        ]
-        daily_views = item["daily_views"]
-        for d in sorted_dates:
-            row.append(daily_views.get(d, ""))
-        writer.writerow(row)
-
-    output.seek(0)
     filename = f"video_stats_{dt_date.today().isoformat()}.csv"
     return StreamingResponse(
-        iter([output.getvalue()]),
+        chunks,
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
-@router.get("/{id}")
+@router.get("/{id}", dependencies=[Depends(not_modified(UserRole.ADMIN, UserRole.USER))])
 async def get_video_history(
     id: int,
     db: AsyncSession = Depends(get_db),
@@ -1,6 +1,6 @@
 import os
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query, File, UploadFile
+from fastapi import APIRouter, Depends, Query, File, UploadFile, HTTPException
 from typing import Optional, List
 
 from sqlalchemy.ext.asyncio.session import AsyncSession
@@ -8,12 +8,13 @@ from sqlalchemy.ext.asyncio.session import AsyncSession
 from app.core.db import get_db
 from app.models.user import User, UserRole
 from app.models.videos import VideoType
-from app.api.v1.dependencies import require_role
+from app.api.v1.dependencies import not_modified, require_role
 from app.schemas.videos import (
-    VideosCreate, VideosUpdate
+    VideosCreate, VideosUpdate, VideosBulkCreate, VideosBulkResult
 )
 from app.services.videos import VideosService
 from app.services.videohistory import VideoHistoryService
+from app.utils.pagination import PaginationCount
 
 UPLOAD_DIR = "uploads/videos"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -21,7 +22,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 router = APIRouter()
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(not_modified())])
 async def get_videos(
     id: Optional[int] = Query(None),
     type: Optional[VideoType] = Query(None),
@@ -29,6 +30,8 @@ async def get_videos(
     name: Optional[str] = Query(None),
     page: Optional[int] = Query(None, ge=1),
     size: Optional[int] = Query(None, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Курсор следующей страницы; пустое значение — первая страница в режиме курсора"),
+    count: PaginationCount = Query(PaginationCount.NONE, description="Подсчёт total в режиме курсора: none, exact, estimate"),
     db: AsyncSession = Depends(get_db),
     user_id: Optional[int] = Query(None),
     user_ids: Optional[List[int]] = Query(
@@ -39,17 +42,43 @@ async def get_videos(
     """Получаем все видео."""
     history_service = VideoHistoryService(db)
     service = VideosService(db, history_service)
-    result = await service.get_all_filtered_paginated(
+    try:
+        result = await service.get_all_filtered_paginated(
+            user_id=user_id,
+            user_ids=user_ids,
+            id=id,
+            type=type,
+            link=link,
+            name=name,
+            page=page,
+            size=size,
+            after=after,
+            count=count,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return result
+
+
+@router.get("/articles", response_model=List[str])
+async def get_video_articles(
+    prefix: Optional[str] = Query(None, description="Начало артикля для автодополнения"),
+    limit: int = Query(50, ge=1, le=500),
+    user_id: Optional[int] = Query(None, description="Только для админа"),
+    user_ids: Optional[List[int]] = Query(None, description="Только для админа. Можно указать несколько user_id"),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_role(UserRole.ADMIN, UserRole.USER))
+):
+    """Получаем уникальные артикли видео."""
+    history_service = VideoHistoryService(db)
+    service = VideosService(db, history_service)
+    return await service.get_distinct_articles(
+        user=user,
+        prefix=prefix,
+        limit=limit,
         user_id=user_id,
         user_ids=user_ids,
-        id=id,
-        type=type,
-        link=link,
-        name=name,
-        page=page,
-        size=size
     )
-    return result
 
 
 @router.get("/{video_id}")
@@ -77,6 +106,20 @@ async def create_video(
     return video
 
 
+@router.post("/bulk", response_model=VideosBulkResult)
+async def bulk_create_videos(
+    payload: VideosBulkCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Пакетно создаем/обновляем видео канала вместе с историей."""
+    history_service = VideoHistoryService(db)
+    videos_service = VideosService(db, history_service=history_service)
+    try:
+        return await videos_service.bulk_create_or_update_and_create_history(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.patch("/{video_id}")
 async def update_video(
     video_id: int,
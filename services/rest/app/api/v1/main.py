@@ -8,8 +8,12 @@ from app.services.user import UserService
 from app.core.config import settings
 from app.utils.logger import TCPLogger
 from app.utils.rabbitmq_producer import rabbit_producer
+from app.utils.history_writer import history_writer
+from app.utils.metrics import install_scheduler_metrics
+from app.utils.stats_cache import stats_cache
 from app.utils import logger
-from app.utils.scheduler import restore_scheduled_tasks, scheduler
+from app.utils.scheduler import ensure_history_partitions, scheduler
+from app.utils.scheduler_leader import scheduler_leader
 from app.models.channel import ChannelType
 
 
@@ -39,22 +43,40 @@ async def lifespan(app: FastAPI):
             print(f"❌ Ошибка при инициализации БД: {e}")
             raise e
     try:
-        rabbit_producer.connect()
-        rabbit_producer.declare_queue("parsing", durable=True)
+        await rabbit_producer.connect()
+        await rabbit_producer.declare_queue("parsing", durable=True)
+        await rabbit_producer.declare_queue(settings.PARSING_RESULTS_QUEUE, durable=True)
         for channel_type in ChannelType:
             queue_name = f"parsing_{channel_type.value}"
-            rabbit_producer.declare_queue(queue_name, durable=True)
+            await rabbit_producer.declare_queue(queue_name, durable=True)
         print("✅ RabbitMQ: соединение установлено и очередь объявлена")
     except Exception as e:
         print(f"❌ Не удалось подключиться к RabbitMQ: {e}")
         raise
-    await restore_scheduled_tasks()
-    scheduler.start()
+    try:
+        await ensure_history_partitions()
+    except Exception as e:
+        # Без будущих секций снимки попадут в секцию по умолчанию
+        print(f"⚠️ Не удалось создать секции video_history: {e}")
+    install_scheduler_metrics(scheduler)
+    # Все реплики пишут задачи в общее хранилище, запускает их только ведущая
+    scheduler.start(paused=True)
+    await scheduler_leader.start()
+    history_writer.start()
+    try:
+        await stats_cache.start_listener()
+    except Exception as e:
+        # Без LISTEN кэш статистики живёт только до истечения TTL
+        print(f"⚠️ Кэш статистики: не удалось подписаться на инвалидацию: {e}")
 
     yield
 
     print("🛑 Приложение останавливается...")
+    await scheduler_leader.stop()
     scheduler.shutdown()
+    await history_writer.stop()
+    await stats_cache.stop_listener()
+    await rabbit_producer.close()
     # if hasattr(logger, "close") and logger is not None:
     #     logger.close()
 
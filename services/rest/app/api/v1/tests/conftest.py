@@ -1,9 +1,12 @@
+import unittest
+
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from contextlib import asynccontextmanager
 
 
+import app.models  # noqa: F401
 from app.api.v1.endpoints import user as user_router
 from app.api.v1.dependencies import get_db, get_current_user
 from app.core.db import Base
@@ -55,4 +58,25 @@ async def make_client(app: FastAPI):
     async with app.router.lifespan_context(app):
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as c:
-            yield c
\ No newline at end of file
+            yield c
+
+
+class DbSessionTest(unittest.IsolatedAsyncioTestCase):
+    """Базовый класс: своя in-memory SQLite с таблицами TABLES и сессия на тест."""
+
+    TABLES: tuple = ()
+
+    async def asyncSetUp(self):
+        """Создаём таблицы и открываем сессию."""
+        self.engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[model.__table__ for model in self.TABLES],
+            )
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)()
+
+    async def asyncTearDown(self):
+        """Закрываем сессию и движок."""
+        await self.session.close()
+        await self.engine.dispose()
\ No newline at end of file
@@ -0,0 +1,75 @@
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app.api.v1.dependencies import get_db, not_modified
+from app.models.user import User
+from app.models.userdataversion import UserDataVersion
+from app.utils.data_version import bump_data_versions
+
+from .conftest import DbSessionTest
+
+
+class NotModifiedTests(DbSessionTest):
+    """Тесты условного GET по версии данных пользователя."""
+
+    TABLES = (User, UserDataVersion)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.session.add_all([User(id=1, tg_id=1), User(id=2, tg_id=2)])
+        await self.session.commit()
+
+        async def override_db():
+            yield self.session
+
+        app = FastAPI()
+
+        @app.get("/items", dependencies=[Depends(not_modified())])
+        async def items():
+            return {"items": []}
+
+        app.dependency_overrides[get_db] = override_db
+        self.client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await super().asyncTearDown()
+
+    async def get(self, etag: str = None):
+        """Список данных пользователя 1, при etag — условный."""
+        headers = {"If-None-Match": etag} if etag else {}
+        return await self.client.get("/items", params={"user_ids": 1}, headers=headers)
+
+    async def test_not_modified_until_commit(self):
+        """Тот же ETag — 304; версия меняется только после коммита изменений."""
+        first = await self.get()
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+
+        cached = await self.get(etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+        await bump_data_versions(self.session, user_ids=[1])
+        await bump_data_versions(self.session, user_ids=[1, 2])
+        self.assertEqual((await self.get(etag)).status_code, 304)
+
+        await self.session.commit()
+        changed = await self.get(etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+        versions = await self.session.execute(
+            select(UserDataVersion.user_id, UserDataVersion.version).order_by(UserDataVersion.user_id)
+        )
+        self.assertEqual(versions.all(), [(1, 1), (2, 1)])
+
+    async def test_rollback_discards_bump(self):
+        """Откат транзакции не поднимает версию."""
+        await bump_data_versions(self.session, user_ids=[1])
+        await self.session.rollback()
+        await self.session.commit()
+
+        versions = await self.session.execute(select(UserDataVersion))
+        self.assertEqual(versions.all(), [])
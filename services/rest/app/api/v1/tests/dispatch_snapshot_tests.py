@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.channel import ChannelType
+from app.models.proxy import Proxy
+from app.utils.dispatch_snapshot import LEASED_SNAPSHOT, DispatchSnapshotCache, has_active_accounts
+
+from .conftest import DbSessionTest
+
+
+class DispatchSnapshotCacheTests(DbSessionTest):
+    """Тесты снимка аккаунтов и прокси для волны задач."""
+
+    TABLES = (Account, Proxy)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.session.add_all([
+            Account(account_str="active", is_active=True),
+            Account(account_str="disabled", is_active=False),
+            Proxy(proxy_str="generic", for_likee=False),
+            Proxy(proxy_str="likee", for_likee=True),
+        ])
+        await self.session.commit()
+        self.cache = DispatchSnapshotCache(ttl_seconds=60)
+
+    async def test_snapshot_contents(self):
+        """Только активные аккаунты; прокси Likee отдельно от общих."""
+        snapshot = await self.cache.get(self.session)
+        self.assertEqual(snapshot.accounts, ("active",))
+        self.assertEqual(snapshot.proxies_for(ChannelType.LIKEE), ["likee"])
+        self.assertEqual(snapshot.proxies_for(ChannelType.YOUTUBE), ["generic"])
+
+    async def test_cached_until_invalidated(self):
+        """Снимок переиспользуется, пока эндпоинты аккаунтов/прокси его не сбросят."""
+        first = await self.cache.get(self.session)
+        self.session.add(Account(account_str="new", is_active=True))
+        await self.session.commit()
+        self.assertIs(await self.cache.get(self.session), first)
+        self.cache.invalidate()
+        self.assertEqual((await self.cache.get(self.session)).accounts, ("active", "new"))
+
+    async def test_leases_skip_snapshot(self):
+        """При аренде задачи несут только ссылку на пулы — снимок не читается."""
+        with patch.object(settings, "RESOURCE_LEASES_ENABLED", True):
+            self.assertIs(await self.cache.for_tasks(self.session), LEASED_SNAPSHOT)
+        self.assertIsNone(self.cache._snapshot)
+        with patch.object(settings, "RESOURCE_LEASES_ENABLED", False):
+            self.assertEqual((await self.cache.for_tasks(self.session)).accounts, ("active",))
+        self.assertTrue(await has_active_accounts(self.session))
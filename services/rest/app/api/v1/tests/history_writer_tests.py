@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.utils.history_writer import VideoHistoryWriter
+
+
+class VideoHistoryWriterTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты write-behind буфера снимков video_history."""
+
+    BAD_VIDEO = 13
+
+    async def asyncSetUp(self):
+        self.writer = VideoHistoryWriter(
+            max_batch_size=4, flush_interval_ms=1000,
+            max_buffer_rows=6, retry_backoff_ms=60000, retry_backoff_max_ms=60000,
+        )
+        self.stored: list[int] = []
+        self.database_down = False
+
+        async def write(writer, rows):
+            if self.database_down:
+                raise OperationalError("COPY", {}, ConnectionRefusedError())
+            if any(row["video_id"] == self.BAD_VIDEO for row in rows):
+                raise IntegrityError("COPY", {}, Exception("video_history_video_id_fkey"))
+            self.stored.extend(row["video_id"] for row in rows)
+
+        patcher = patch.object(VideoHistoryWriter, "_write", write)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def add(self, *video_ids: int):
+        """Снимки для видео."""
+        for video_id in video_ids:
+            await self.writer.add({"video_id": video_id, "amount_views": 1})
+
+    async def test_bad_row_does_not_drop_batch(self):
+        """Ошибка данных отбрасывает только свою строку, остальная пачка пишется."""
+        await self.add(1, self.BAD_VIDEO, 2, 3)
+
+        self.assertEqual(sorted(self.stored), [1, 2, 3])
+        self.assertEqual(self.writer.dropped, 1)
+        self.assertEqual(self.writer._buffer, [])
+
+    async def test_outage_keeps_rows_and_backs_off(self):
+        """Без БД снимки остаются в буфере, а add не ждёт повторного сброса до паузы."""
+        self.database_down = True
+        await self.add(1, 2, 3, 4)
+        self.assertEqual(len(self.writer._buffer), 4)
+
+        with patch.object(VideoHistoryWriter, "flush", side_effect=AssertionError("flush during backoff")):
+            await self.add(5)
+        self.assertEqual(await self.writer.flush(), 0)
+
+        self.database_down = False
+        self.assertEqual(await self.writer.flush(force=True), 5)
+        self.assertEqual(self.stored, [1, 2, 3, 4, 5])
+
+    async def test_buffer_is_capped(self):
+        """Пока БД недоступна, буфер не растёт дальше предела — старые снимки отбрасываются."""
+        self.database_down = True
+        await self.add(*range(1, 10))
+
+        self.assertEqual([row["video_id"] for row in self.writer._buffer], [4, 5, 6, 7, 8, 9])
+        self.assertEqual(self.writer.dropped, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.exc import OperationalError
+
+from app.schemas.videos import VideosBulkResult
+from app.workers.ingest import ATTEMPTS_HEADER, IngestConsumer
+
+
+class FakeMessage:
+    """Сообщение RabbitMQ, которое запоминает, чем оно завершилось."""
+
+    def __init__(self, channel_id: int, headers: dict = None):
+        self.body = json.dumps({"channel_id": channel_id, "videos": []}).encode()
+        self.headers = headers or {}
+        self.content_type = "application/json"
+        self.outcome = None
+
+    async def ack(self):
+        self.outcome = "ack"
+
+    async def nack(self, requeue: bool = True):
+        self.outcome = "requeue" if requeue else "drop"
+
+    async def reject(self, requeue: bool = False):
+        self.outcome = "reject"
+
+
+class FakeExchange:
+    """Обменник по умолчанию: копит переотправленные сообщения."""
+
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, message, routing_key: str):
+        self.published.append((routing_key, message.headers))
+
+
+class FakeChannel:
+    """Канал RabbitMQ с одним обменником."""
+
+    def __init__(self):
+        self.default_exchange = FakeExchange()
+
+
+class IngestConsumerTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты разбора упавшего микропакета ingest-потребителя."""
+
+    POISON = 13
+
+    async def asyncSetUp(self):
+        self.consumer = IngestConsumer(
+            "amqp://test", "parsing_results", batch_size=10, batch_timeout_ms=10,
+            max_attempts=3, dead_letter_queue="parsing_results.dead", retry_backoff_seconds=0,
+        )
+        self.consumer.channel = FakeChannel()
+        self.writes = []
+
+        async def write(consumer, payloads):
+            self.writes.append([payload.channel_id for payload in payloads])
+            if any(payload.channel_id == self.POISON for payload in payloads):
+                raise TypeError("bad payload")
+            return [
+                VideosBulkResult(channel_id=payload.channel_id, created=0, updated=0, items=[])
+                for payload in payloads
+            ]
+
+        self.write = write
+        patcher = patch.object(IngestConsumer, "_write", lambda consumer, payloads: self.write(consumer, payloads))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_poison_message_does_not_block_batch(self):
+        """После падения пакета сообщения пишутся по одному, сломанное уходит на повтор."""
+        messages = [FakeMessage(1), FakeMessage(self.POISON), FakeMessage(2)]
+        await self.consumer.process_batch(messages)
+
+        self.assertEqual(self.writes, [[1, 13, 2], [1], [13], [2]])
+        self.assertEqual([message.outcome for message in messages], ["ack", "ack", "ack"])
+        self.assertEqual(
+            self.consumer.channel.default_exchange.published,
+            [("parsing_results", {ATTEMPTS_HEADER: 1})],
+        )
+
+    async def test_dead_letter_after_max_attempts(self):
+        """Исчерпавшее попытки сообщение уходит в очередь мёртвых писем."""
+        message = FakeMessage(self.POISON, headers={ATTEMPTS_HEADER: 2})
+        await self.consumer.process_batch([message])
+
+        routing_key, headers = self.consumer.channel.default_exchange.published[0]
+        self.assertEqual(routing_key, "parsing_results.dead")
+        self.assertEqual(headers[ATTEMPTS_HEADER], 3)
+        self.assertIn("TypeError", headers["x-ingest-error"])
+        self.assertEqual(message.outcome, "ack")
+        self.assertEqual(self.writes, [[13]])
+
+    async def test_database_outage_requeues_without_counting(self):
+        """Недоступная БД возвращает пакет в очередь целиком и не тратит попытки."""
+        async def outage(consumer, payloads):
+            raise OperationalError("SELECT 1", {}, ConnectionRefusedError())
+
+        self.write = outage
+        messages = [FakeMessage(1), FakeMessage(2)]
+        await self.consumer.process_batch(messages)
+
+        self.assertEqual([message.outcome for message in messages], ["requeue", "requeue"])
+        self.assertEqual(self.consumer.channel.default_exchange.published, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from app.utils.metrics import MetricsMiddleware, metrics_endpoint
+
+
+class MetricsMiddlewareTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты метрик HTTP-запросов."""
+
+    async def asyncSetUp(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+        app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+        @app.get("/metrics-test/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        self.client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    @staticmethod
+    def _count(route: str, status: str) -> float:
+        return REGISTRY.get_sample_value(
+            "http_request_duration_seconds_count",
+            {"method": "GET", "route": route, "status": status},
+        ) or 0.0
+
+    async def test_route_template_label(self):
+        """Латентность пишется по шаблону маршрута, а не по конкретному пути."""
+        before = self._count("/metrics-test/{item_id}", "200")
+        await self.client.get("/metrics-test/1")
+        await self.client.get("/metrics-test/2")
+        self.assertEqual(self._count("/metrics-test/{item_id}", "200") - before, 2)
+
+    async def test_unmatched_route(self):
+        """Несуществующие пути собираются в одну метку."""
+        before = self._count("unmatched", "404")
+        await self.client.get("/no-such-path/42")
+        self.assertEqual(self._count("unmatched", "404") - before, 1)
+
+    async def test_metrics_endpoint(self):
+        """Эндпоинт отдаёт метрики в текстовом формате Prometheus."""
+        resp = await self.client.get("/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("http_requests_in_progress", resp.text)
+        self.assertIn("instagram_batch_active", resp.text)
@@ -0,0 +1,82 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.models.user import User
+from app.utils.pagination import PaginationCount, count_rows, decode_cursor, encode_cursor
+
+from .user_tests import BaseApiTest
+
+
+class CursorCodec(unittest.TestCase):
+    """Тесты кодирования курсора пагинации."""
+
+    def test_roundtrip(self):
+        """Курсор декодируется в исходные (created_at, id)."""
+        created_at = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        cursor = encode_cursor(created_at, 42)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), (created_at, 42))
+
+    def test_invalid_cursor(self):
+        """Мусор вместо курсора — ValueError."""
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class EstimateCount(unittest.IsolatedAsyncioTestCase):
+    """Тесты оценки total планировщиком PostgreSQL."""
+
+    async def test_colon_in_filter_value(self):
+        """Двоеточие в значении фильтра уходит в EXPLAIN литералом, а не bind-параметром."""
+        statements = []
+
+        async def exec_driver_sql(statement):
+            statements.append(statement)
+            return SimpleNamespace(scalar=lambda: [{"Plan": {"Plan Rows": 3}}])
+
+        conn = SimpleNamespace(dialect=asyncpg.dialect(), exec_driver_sql=exec_driver_sql)
+
+        async def connection():
+            return conn
+
+        query = select(User).where(User.username == "team:lead")
+        total = await count_rows(SimpleNamespace(connection=connection), query, PaginationCount.ESTIMATE)
+
+        self.assertEqual(total, 3)
+        self.assertTrue(statements[0].startswith("EXPLAIN (FORMAT JSON) SELECT"))
+        self.assertIn("'team:lead'", statements[0])
+
+
+class UsersCursorPagination(BaseApiTest):
+    """Тесты курсорной пагинации списка пользователей."""
+
+    async def test_first_page(self):
+        """Первая страница в режиме курсора отдаёт курсор и total по запросу."""
+        resp = await self.client.get(
+            '/api/v1/users/', params={'after': '', 'size': 1, 'count': 'exact'}
+        )
+        self.assertEqual(resp.status_code, 200)
+        payload = resp.json()
+        self.assertEqual(len(payload['users']), 1)
+        self.assertEqual(payload['pagination']['total'], 2)
+        self.assertTrue(payload['pagination']['has_more'])
+        self.assertIsNotNone(payload['pagination']['next_cursor'])
+
+    async def test_last_page(self):
+        """На последней странице курсора нет, total не считается по умолчанию."""
+        resp = await self.client.get('/api/v1/users/', params={'after': '', 'size': 10})
+        self.assertEqual(resp.status_code, 200)
+        payload = resp.json()
+        self.assertEqual(len(payload['users']), 2)
+        self.assertFalse(payload['pagination']['has_more'])
+        self.assertIsNone(payload['pagination']['next_cursor'])
+        self.assertIsNone(payload['pagination']['total'])
+
+    async def test_invalid_cursor(self):
+        """Некорректный курсор — 400."""
+        resp = await self.client.get('/api/v1/users/', params={'after': 'garbage'})
+        self.assertEqual(resp.status_code, 400)
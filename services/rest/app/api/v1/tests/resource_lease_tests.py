@@ -0,0 +1,106 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.channel import ChannelType
+from app.models.proxy import Proxy
+from app.repositories.account import AccountRepository
+from app.repositories.proxy import ProxyRepository
+from app.schemas.lease import ProxyPool
+from app.utils.dispatch_snapshot import DispatchSnapshot
+
+from .conftest import DbSessionTest
+
+
+TTL = timedelta(minutes=15)
+
+
+class ResourceLeaseTests(DbSessionTest):
+    """Тесты аренды прокси и аккаунтов."""
+
+    TABLES = (Proxy, Account)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        for index in range(4):
+            self.session.add(Proxy(proxy_str=f"http://proxy{index}", for_likee=False))
+        self.session.add(Proxy(proxy_str="http://likee", for_likee=True))
+        self.session.add(Account(account_str="login:pass", is_active=True))
+        self.session.add(Account(account_str="banned:pass", is_active=False))
+        await self.session.commit()
+        self.proxies = ProxyRepository(self.session)
+
+    async def test_leases_do_not_overlap(self):
+        """Две аренды получают разные прокси своего пула, лишнего не выдаётся."""
+        first = await self.proxies.lease(ProxyPool.GENERIC, 3, TTL, "w1")
+        second = await self.proxies.lease(ProxyPool.GENERIC, 3, TTL, "w2")
+        await self.session.commit()
+
+        first_values = {value for _, value in first.items}
+        second_values = {value for _, value in second.items}
+        self.assertEqual(len(first_values), 3)
+        self.assertEqual(len(second_values), 1)
+        self.assertFalse(first_values & second_values)
+        self.assertNotIn("http://likee", first_values | second_values)
+
+        likee = await self.proxies.lease(ProxyPool.LIKEE, 3, TTL, "w3")
+        self.assertEqual([value for _, value in likee.items], ["http://likee"])
+
+    async def test_release_and_renew(self):
+        """Возвращённые ресурсы снова свободны; продление находит только живую аренду."""
+        accounts = AccountRepository(self.session)
+        lease = await accounts.lease(5, TTL, "w1")
+        self.assertEqual([value for _, value in lease.items], ["login:pass"])
+        self.assertIsNone((await accounts.lease(1, TTL, "w2")).lease_id)
+
+        renewed, expires_at = await accounts.renew_lease(lease.lease_id, TTL * 2)
+        self.assertEqual(renewed, 1)
+        self.assertGreater(expires_at, lease.expires_at)
+
+        self.assertEqual(await accounts.release_lease(lease.lease_id), 1)
+        self.assertEqual(await accounts.renew_lease(lease.lease_id, TTL), (0, None))
+        again = await accounts.lease(1, TTL, "w2")
+        self.assertEqual([value for _, value in again.items], ["login:pass"])
+
+    async def test_expired_lease_is_reissued(self):
+        """Просроченная аренда не мешает выдать ресурсы заново."""
+        stale = await self.proxies.lease(ProxyPool.LIKEE, 1, timedelta(seconds=-1), "w1")
+        fresh = await self.proxies.lease(ProxyPool.LIKEE, 1, TTL, "w2")
+        self.assertEqual(stale.items, fresh.items)
+
+
+class TaskResourcesTests(unittest.TestCase):
+    """Тесты ресурсов, которые уходят в задачи парсинга."""
+
+    def setUp(self):
+        self.snapshot = DispatchSnapshot(
+            accounts=("login:pass",),
+            likee_proxies=("http://likee",),
+            generic_proxies=("http://proxy0",),
+        )
+
+    def test_pool_reference(self):
+        """При аренде задача несёт только пулы; аккаунты — только у Instagram."""
+        youtube = self.snapshot.task_resources(ChannelType.YOUTUBE)
+        self.assertEqual(set(youtube), {"resource_pool"})
+        self.assertNotIn("accounts", youtube["resource_pool"])
+        self.assertEqual(self.snapshot.task_resources(ChannelType.LIKEE)["resource_pool"]["proxies"], "likee")
+        instagram = self.snapshot.task_resources(ChannelType.INSTAGRAM, 10)["resource_pool"]
+        self.assertEqual((instagram["accounts"], instagram["account_count"]), ("instagram", 10))
+
+    def test_legacy_lists_without_leases(self):
+        """Без аренды — списки, но аккаунты Instagram не уходят другим платформам."""
+        with patch.object(settings, "RESOURCE_LEASES_ENABLED", False):
+            self.assertEqual(
+                self.snapshot.task_resources(ChannelType.TIKTOK),
+                {"proxy_list": ["http://proxy0"]},
+            )
+            self.assertEqual(
+                self.snapshot.task_resources(ChannelType.INSTAGRAM)["accounts"], ["login:pass"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.schedulerstate import SchedulerBatchLock, SchedulerCursor, SchedulerPendingTask
+from app.utils import scheduler
+from app.utils.scheduler_state import (
+    acquire_batch_lock,
+    claim_pending_tasks,
+    defer_channel_tasks,
+    delete_pending_tasks,
+    get_batch_lock,
+    get_cursor,
+    release_batch_lock,
+    save_cursor,
+)
+
+from .conftest import DbSessionTest
+
+
+class SchedulerStateTests(DbSessionTest):
+    """Тесты состояния планировщика в БД."""
+
+    TABLES = (SchedulerBatchLock, SchedulerCursor, SchedulerPendingTask)
+
+    async def test_release_only_matching_batch(self):
+        """Чужой batch_id блокировку не снимает, свой — снимает."""
+        await acquire_batch_lock(self.session, "b1", timedelta(minutes=5))
+        self.assertTrue((await get_batch_lock(self.session)).active)
+        self.assertIsNone(await release_batch_lock(self.session, "b2"))
+        self.assertEqual(await release_batch_lock(self.session, "b1"), "b1")
+        self.assertFalse((await get_batch_lock(self.session)).active)
+
+    async def test_expired_lock(self):
+        """Просроченная блокировка неактивна и снимается только как просроченная."""
+        await acquire_batch_lock(self.session, "old", timedelta(seconds=-1))
+        self.assertFalse((await get_batch_lock(self.session)).active)
+        self.assertIsNone(await release_batch_lock(self.session))
+        self.assertEqual(await release_batch_lock(self.session, expired_only=True), "old")
+
+    async def test_deferred_tasks_deduplicated(self):
+        """Повторно отложенный канал обновляет запись, а не дублирует её."""
+        await defer_channel_tasks(self.session, [(1, 0, "daily"), (2, 5, "daily")])
+        await defer_channel_tasks(self.session, [(1, 10, "daily")])
+        await self.session.commit()
+        pending = {task.channel_id: task.schedule_offset_minutes
+                   for task in await claim_pending_tasks(self.session)}
+        self.assertEqual(pending, {1: 10, 2: 5})
+        await delete_pending_tasks(self.session, [1])
+        await self.session.commit()
+        self.assertEqual(
+            [task.channel_id for task in await claim_pending_tasks(self.session)], [2]
+        )
+
+
+class WaveDispatchCursorTests(DbSessionTest):
+    """Диспетчер волн продолжает с позиции в БД, а не с памяти процесса."""
+
+    TABLES = (SchedulerCursor,)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.now = datetime.now(scheduler.MOSCOW_TZ).replace(second=0, microsecond=0)
+        self.minutes: list[datetime] = []
+
+        def due_slots(minute):
+            self.minutes.append(minute)
+            return []
+
+        for patcher in (
+            patch.object(scheduler, "SessionLocal", async_sessionmaker(self.engine, expire_on_commit=False)),
+            patch.object(scheduler, "_due_slots", due_slots),
+            patch.object(settings, "WAVE_DISPATCH_CATCHUP_MINUTES", 5),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_first_run_takes_current_minute(self):
+        """Без сохранённой позиции разбирается только текущая минута."""
+        await scheduler.dispatch_due_channels()
+        self.assertEqual(self.minutes, [self.now])
+        self.assertEqual(await get_cursor(self.session), self.now)
+
+    async def test_new_leader_resumes_missed_minutes(self):
+        """Минуты, пропущенные при смене ведущего, разбираются, но не дальше окна догона."""
+        await save_cursor(self.session, self.now - timedelta(minutes=3))
+        await self.session.commit()
+        await scheduler.dispatch_due_channels()
+        self.assertEqual(self.minutes, [self.now - timedelta(minutes=n) for n in (2, 1, 0)])
+
+        self.minutes.clear()
+        await save_cursor(self.session, self.now - timedelta(hours=1))
+        await self.session.commit()
+        await scheduler.dispatch_due_channels()
+        self.assertEqual(self.minutes, [self.now - timedelta(minutes=n) for n in range(5, -1, -1)])
+
+
+    async def test_late_minute_keeps_slot_date(self):
+        """Догоняемая минута передаётся в волну, и дата слота за полночь не съезжает."""
+        offset = 12 * 60 + 30  # утренний слот 12:00 + 12:30 = 00:30 следующих суток
+        waves = []
+
+        async def due_chunks(_offset, _chunk_size, _include_cold):
+            yield [1]
+
+        async def dispatch_wave(channel_ids, **kwargs):
+            waves.append(kwargs["scheduled_at"])
+            return len(channel_ids)
+
+        await save_cursor(self.session, self.now - timedelta(minutes=2))
+        await self.session.commit()
+        with patch.object(scheduler, "_due_slots", lambda minute: [(offset, "daily", True)]), \
+                patch.object(scheduler, "_due_channel_chunks", due_chunks), \
+                patch.object(scheduler, "dispatch_wave", dispatch_wave):
+            await scheduler.dispatch_due_channels()
+        self.assertEqual(waves, [self.now - timedelta(minutes=1), self.now])
+
+        scheduled = datetime(2024, 5, 2, 0, 30, tzinfo=scheduler.MOSCOW_TZ)
+        late = scheduled + timedelta(minutes=1)
+        started_at = scheduler._normalize_parse_started_at(late, offset, "daily", scheduled)
+        self.assertEqual(started_at, late - timedelta(days=1))
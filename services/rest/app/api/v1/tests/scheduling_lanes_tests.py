@@ -0,0 +1,78 @@
+import unittest
+from types import SimpleNamespace
+
+from app.models.channel import ChannelType
+from app.utils.scheduling_lanes import (
+    LaneCapacity,
+    channel_offsets,
+    daily_due_offsets,
+    describe_lane_plan,
+    plan_lanes,
+    plan_rolling_lanes,
+    rolling_due_offset,
+    wave_window_minutes,
+)
+
+
+def make_channels(channel_type: ChannelType, count: int, start_id: int = 1):
+    return [
+        SimpleNamespace(id=start_id + index, type=channel_type, created_at=None)
+        for index in range(count)
+    ]
+
+
+class SchedulingLanesTests(unittest.TestCase):
+    """Тесты планировщика полос по платформам."""
+
+    def setUp(self):
+        self.capacities = {
+            ChannelType.YOUTUBE: LaneCapacity(consumers=1, parse_minutes=5),
+            ChannelType.TIKTOK: LaneCapacity(consumers=2, parse_minutes=3),
+        }
+
+    def test_window_between_slots(self):
+        """Окно — наименьший промежуток между слотами суток."""
+        self.assertEqual(wave_window_minutes((12 * 60, 21 * 60)), 540)
+        self.assertEqual(wave_window_minutes((12 * 60,)), 1440)
+
+    def test_lanes_are_independent(self):
+        """Каналы разных платформ не ждут друг друга, шаг — по пропускной способности полосы."""
+        channels = make_channels(ChannelType.TIKTOK, 3, 1) + make_channels(ChannelType.YOUTUBE, 3, 10)
+        offsets = channel_offsets(plan_lanes(channels, self.capacities, 540))
+        self.assertEqual([offsets[i] for i in (10, 11, 12)], [0, 5, 10])
+        self.assertEqual([offsets[i] for i in (1, 2, 3)], [0, 1, 3])
+
+    def test_overloaded_lane_is_compressed(self):
+        """300 каналов по 5 минут сжимаются в окно и не наезжают на следующий слот."""
+        channels = make_channels(ChannelType.YOUTUBE, 300)
+        plan = plan_lanes(channels, self.capacities, 540)[ChannelType.YOUTUBE]
+        self.assertTrue(plan.compressed)
+        self.assertLess(max(plan.offsets.values()), 540)
+        self.assertIn("нужно 3", describe_lane_plan(plan))
+
+    def test_overflow_warning_without_compression(self):
+        """Без сжатия перегруженная полоса сохраняет шаг и получает предупреждение."""
+        channels = make_channels(ChannelType.YOUTUBE, 300)
+        plan = plan_lanes(channels, self.capacities, 540, auto_compress=False)[ChannelType.YOUTUBE]
+        self.assertFalse(plan.compressed)
+        self.assertEqual(max(plan.offsets.values()), 299 * 5)
+        self.assertIn("наедет", describe_lane_plan(plan))
+        small = plan_lanes(make_channels(ChannelType.YOUTUBE, 10), self.capacities, 540)
+        self.assertIsNone(describe_lane_plan(small[ChannelType.YOUTUBE]))
+
+    def test_rolling_spreads_lane_over_period(self):
+        """В непрерывном режиме каналы полосы равномерно разнесены по периоду."""
+        channels = make_channels(ChannelType.YOUTUBE, 4) + make_channels(ChannelType.TIKTOK, 2, 10)
+        plans = plan_rolling_lanes(channels, self.capacities, 720)
+        self.assertEqual(sorted(plans[ChannelType.YOUTUBE].offsets.values()), [0, 180, 360, 540])
+        self.assertEqual(sorted(plans[ChannelType.TIKTOK].offsets.values()), [0, 360])
+        self.assertIsNone(describe_lane_plan(plans[ChannelType.YOUTUBE]))
+        overloaded = plan_rolling_lanes(make_channels(ChannelType.YOUTUBE, 200), self.capacities, 720)
+        self.assertTrue(overloaded[ChannelType.YOUTUBE].compressed)
+
+    def test_due_offsets(self):
+        """Диспетчер волн находит смещения, наступившие в данную минуту."""
+        self.assertEqual(daily_due_offsets(12 * 60 + 10, (720, 1260)), [(720, 10), (1260, 910)])
+        self.assertEqual(daily_due_offsets(21 * 60 + 10, (720, 1260)), [(720, 550), (1260, 10)])
+        self.assertEqual(rolling_due_offset(12 * 60 + 10, 720), 10)
+        self.assertEqual(rolling_due_offset(5, 720), 5)
@@ -0,0 +1,142 @@
+import unittest
+
+from sqlalchemy import select
+
+from app.models.channel import Channel, ChannelType
+from app.models.schedulerstate import ChannelLaneSlot
+from app.models.user import User
+from app.utils.slot_allocator import (
+    LaneSlots,
+    allocate_lane_slot,
+    daily_slot_grid,
+    rebuild_lane_slots,
+    release_channel_slots,
+    rolling_slot_grid,
+)
+
+from .conftest import DbSessionTest
+
+
+class SlotAllocatorTests(unittest.TestCase):
+    """Тесты выдачи слотов новым каналам."""
+
+    def test_daily_fills_free_slots_in_order(self):
+        """Свободные слоты выдаются по порядку, занятые при посеве пропускаются."""
+        lane = LaneSlots(daily_slot_grid(20, 5))
+        lane.occupy(0)
+        lane.occupy(6)  # старое смещение вне сетки попадает в слот 5
+        self.assertEqual([lane.allocate(), lane.allocate()], [10, 15])
+
+    def test_full_lane_gets_least_loaded_slot(self):
+        """Когда свободных слотов нет, канал идёт в наименее загруженный."""
+        lane = LaneSlots(daily_slot_grid(15, 5))
+        for _ in range(4):
+            lane.allocate()
+        self.assertEqual(lane.load(0), 2)
+        self.assertEqual(lane.allocate(), 5)
+        lane.release(10)
+        self.assertEqual(lane.allocate(), 10)
+        self.assertEqual(lane.channels, 5)
+
+    def test_extendable_lane_grows_past_window(self):
+        """Без сжатия полоса продолжает шаг за пределы окна."""
+        lane = LaneSlots(daily_slot_grid(10, 5, extendable=True))
+        self.assertEqual([lane.allocate() for _ in range(4)], [0, 5, 10, 15])
+
+    def test_extendable_lane_keeps_slots_past_window(self):
+        """Смещения за окном из БД — свои слоты, а не последний слот окна."""
+        lane = LaneSlots(daily_slot_grid(15, 5, extendable=True))
+        for offset in (0, 5, 10, 15, 25):
+            lane.occupy(offset)
+        self.assertEqual([lane.allocate(), lane.allocate()], [20, 30])
+
+    def test_rolling_spreads_over_period(self):
+        """Фазы непрерывного режима делят период пополам, затем на четверти."""
+        lane = LaneSlots(rolling_slot_grid(720, 5))
+        self.assertEqual([lane.allocate() for _ in range(4)], [0, 360, 180, 540])
+
+
+class AllocateLaneSlotTests(DbSessionTest):
+    """Тесты выдачи смещения по занятости полосы в БД."""
+
+    TABLES = (User, Channel, ChannelLaneSlot)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.session.add(User(id=1, tg_id=1))
+        for index, (channel_type, offset) in enumerate([
+            (ChannelType.YOUTUBE, 0),
+            (ChannelType.YOUTUBE, 0),
+            (ChannelType.YOUTUBE, 5),
+            (ChannelType.TIKTOK, 10),
+            (ChannelType.YOUTUBE, None),
+        ], start=1):
+            self.session.add(Channel(
+                id=index, type=channel_type, link=f"https://example.com/{index}",
+                user_id=1, schedule_offset_minutes=offset,
+            ))
+        await rebuild_lane_slots(self.session, lock_key=1)
+        await self.session.commit()
+
+    async def allocate(self, channel_id: int, extendable: bool = False) -> int:
+        """Смещение канала в полосе из трёх слотов по 5 минут; коммитим как сервис."""
+        channel = await self.session.get(Channel, channel_id)
+        if channel is None:
+            channel = Channel(
+                id=channel_id, type=ChannelType.YOUTUBE, link=f"https://example.com/{channel_id}", user_id=1,
+            )
+            self.session.add(channel)
+        channel.schedule_offset_minutes = await allocate_lane_slot(
+            self.session, channel, daily_slot_grid(15, 5, extendable=extendable), lock_key=1
+        )
+        await self.session.commit()
+        return channel.schedule_offset_minutes
+
+    async def lane(self, channel_type: ChannelType) -> dict[int, int]:
+        """Занятость слотов полосы из channel_lane_slots."""
+        rows = await self.session.execute(
+            select(ChannelLaneSlot.schedule_offset_minutes, ChannelLaneSlot.channels)
+            .where(ChannelLaneSlot.type == channel_type)
+        )
+        return dict(rows.all())
+
+    async def test_counts_only_own_lane(self):
+        """Занятость берётся из своей полосы, выданный слот сразу учитывается."""
+        self.assertEqual(await self.lane(ChannelType.YOUTUBE), {0: 2, 5: 1})
+        self.assertEqual(await self.allocate(5), 10)
+        self.assertEqual(await self.lane(ChannelType.YOUTUBE), {0: 2, 5: 1, 10: 1})
+        self.assertEqual(await self.lane(ChannelType.TIKTOK), {10: 1})
+
+    async def test_next_allocation_sees_previous(self):
+        """Следующая выдача видит слот, выданный предыдущей, и освобождённые слоты."""
+        self.assertEqual(await self.allocate(5), 10)
+        self.assertEqual(await self.allocate(6), 5)
+
+        await release_channel_slots(self.session, [(ChannelType.YOUTUBE, 5)] * 2, lock_key=1)
+        await self.session.commit()
+        self.assertEqual(await self.lane(ChannelType.YOUTUBE), {0: 2, 10: 1})
+        self.assertEqual(await self.allocate(7), 5)
+
+    async def test_repeated_extendable_allocations(self):
+        """Полоса без сжатия продолжает шаг за окном, а не выдаёт один слот за окном."""
+        self.assertEqual(await self.allocate(5, extendable=True), 10)
+        self.assertEqual(
+            [await self.allocate(channel_id, extendable=True) for channel_id in (6, 7, 8)],
+            [15, 20, 25],
+        )
+
+    async def test_type_change_moves_slot(self):
+        """Смена платформы освобождает слот старой полосы в той же транзакции."""
+        channel = await self.session.get(Channel, 3)
+        channel.type = ChannelType.TIKTOK
+        channel.schedule_offset_minutes = await allocate_lane_slot(
+            self.session, channel, daily_slot_grid(15, 5), lock_key=1,
+            released=[(ChannelType.YOUTUBE, 5)],
+        )
+        await self.session.commit()
+        self.assertEqual(await self.lane(ChannelType.YOUTUBE), {0: 2})
+        self.assertEqual(await self.lane(ChannelType.TIKTOK), {0: 1, 10: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
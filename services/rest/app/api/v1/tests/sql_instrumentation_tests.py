@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.utils.sql_instrumentation import (
+    RequestSqlStats,
+    SqlInstrumentationMiddleware,
+    instrument_engine,
+)
+
+from .conftest import DbSessionTest
+
+
+class RequestSqlStatsTests(unittest.TestCase):
+    """Тесты подсчёта SQL за запрос."""
+
+    def test_slowest_and_repeated(self):
+        """Храним N самых долгих, повторы одной формы считаем вместе."""
+        stats = RequestSqlStats(keep_slowest=2)
+        for duration in (0.001, 0.005, 0.002):
+            stats.record("SELECT *\n  FROM users WHERE id = ?", duration)
+        stats.record("SELECT 1", 0.010)
+        self.assertEqual(stats.count, 4)
+        self.assertEqual([duration for duration, _ in stats.slowest], [0.010, 0.005])
+        self.assertEqual(stats.repeated(2), [("SELECT * FROM users WHERE id = ?", 3)])
+
+
+class SqlInstrumentationMiddlewareTests(DbSessionTest):
+    """Тесты middleware SQL-инструментирования."""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        instrument_engine(self.engine)
+        app = FastAPI()
+        app.add_middleware(SqlInstrumentationMiddleware)
+
+        @app.get("/items")
+        async def items():
+            async with self.engine.connect() as conn:
+                for item_id in range(3):
+                    await conn.execute(text("SELECT :id"), {"id": item_id})
+            return []
+
+        self.client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await super().asyncTearDown()
+
+    async def test_debug_headers(self):
+        """В отладке ответ содержит число запросов и Server-Timing."""
+        with patch.object(settings, "SQL_DEBUG_HEADERS", True):
+            resp = await self.client.get("/items")
+        self.assertEqual(resp.headers["x-db-query-count"], "3")
+        self.assertTrue(resp.headers["server-timing"].startswith("db;dur="))
+
+    async def test_no_headers_by_default(self):
+        """Без отладки заголовков нет."""
+        with patch.object(settings, "SQL_DEBUG_HEADERS", False):
+            resp = await self.client.get("/items")
+        self.assertNotIn("x-db-query-count", resp.headers)
+
+    async def test_n_plus_one_warning(self):
+        """Повтор одной формы запроса сверх порога — предупреждение."""
+        with patch.object(settings, "SQL_N_PLUS_ONE_THRESHOLD", 2), \
+                patch("builtins.print") as printed:
+            await self.client.get("/items")
+        warnings = [call.args[0] for call in printed.call_args_list if "N+1" in call.args[0]]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("GET /items", warnings[0])
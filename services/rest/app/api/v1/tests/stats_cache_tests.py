@@ -0,0 +1,140 @@
+import asyncio
+import unittest
+
+from sqlalchemy import select
+
+from app.models.channel import Channel, ChannelType
+from app.models.task import Task
+from app.models.user import User
+from app.models.userdataversion import UserDataVersion
+from app.models.videoarticle import VideoArticle
+from app.models.videodailystats import VideoDailyStats
+from app.models.videohistory import VideoHistory
+from app.models.videos import Videos, VideoType
+from app.repositories.channel import ChannelRepository
+from app.repositories.videos import VideosRepository
+from app.schemas.videos import VideosUpdate
+from app.utils.stats_cache import StatsCache, cache_tags, publish_scope_changed, stats_cache
+
+from .conftest import DbSessionTest
+
+
+class StatsCacheTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты кэша агрегатов статистики."""
+
+    def setUp(self):
+        self.cache = StatsCache(max_entries=2, ttl_seconds=60)
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+        await asyncio.sleep(0)
+        return {"loads": self.loads}
+
+    async def get(self, user_ids=None, channel_id=None, **filters):
+        filters = dict(filters, user_ids=user_ids, channel_id=channel_id)
+        return await self.cache.get_or_load(
+            "stats", filters, cache_tags(user_ids, channel_id), self.load
+        )
+
+    async def test_key_ignores_filter_order(self):
+        """Одинаковые фильтры в разном порядке — одна запись."""
+        await self.get(user_ids=[2, 1])
+        await self.get(user_ids=[1, 2])
+        self.assertEqual(self.loads, 1)
+
+    async def test_concurrent_misses_share_load(self):
+        """Одновременные промахи ждут одну загрузку."""
+        results = await asyncio.gather(*[self.get(user_ids=[1]) for _ in range(5)])
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    async def test_lru_eviction(self):
+        """Сверх max_entries вытесняется самая давняя запись."""
+        await self.get(user_ids=[1])
+        await self.get(user_ids=[2])
+        await self.get(user_ids=[1])
+        await self.get(user_ids=[3])
+        await self.get(user_ids=[1])
+        self.assertEqual(self.loads, 3)
+        await self.get(user_ids=[2])
+        self.assertEqual(self.loads, 4)
+
+    async def test_invalidate_by_user_and_channel(self):
+        """Сбрасываются записи затронутых пользователя и канала, чужие остаются."""
+        self.cache.max_entries = 10
+        await self.get(user_ids=[1])
+        await self.get(user_ids=[2])
+        await self.get(channel_id=7)
+        await self.get()
+        self.assertEqual(self.cache.invalidate(user_ids=[1], channel_ids=[7]), 3)
+        loads = self.loads
+        await self.get(user_ids=[2])
+        self.assertEqual(self.loads, loads)
+        await self.get(user_ids=[1])
+        self.assertEqual(self.loads, loads + 1)
+
+    async def test_zero_ttl_disables_cache(self):
+        """TTL 0 — кэш выключен."""
+        self.cache.ttl = 0
+        await self.get(user_ids=[1])
+        await self.get(user_ids=[1])
+        self.assertEqual(self.loads, 2)
+
+
+class WritePathInvalidationTests(DbSessionTest):
+    """Записи помимо истории тоже сбрасывают кэш статистики и версию владельца."""
+
+    TABLES = (User, Channel, Task, Videos, VideoArticle, VideoHistory, VideoDailyStats, UserDataVersion)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.session.add_all([
+            User(id=1, tg_id=1),
+            User(id=2, tg_id=2),
+            Channel(id=5, type=ChannelType.YOUTUBE, link="https://youtube.com/@c5", user_id=1),
+            Videos(id=9, type=VideoType.YOUTUBE, link="https://youtube.com/shorts/v9", channel_id=5),
+        ])
+        await self.session.commit()
+
+        stats_cache.clear()
+        self.addCleanup(stats_cache.clear)
+        for tags in (cache_tags([1], None), cache_tags(None, 5), cache_tags([2], None)):
+            stats_cache.set(str(sorted(tags)), tags, "stale")
+
+    async def versions(self) -> dict:
+        """Версии данных по пользователям."""
+        result = await self.session.execute(select(UserDataVersion.user_id, UserDataVersion.version))
+        return dict(result.all())
+
+    def cached_keys(self) -> list:
+        """Какие записи кэша пережили запись."""
+        return list(stats_cache._entries)
+
+    async def test_article_change(self):
+        """Смена артиклей сбрасывает записи канала и владельца."""
+        await VideosRepository(self.session).update(9, VideosUpdate(articles=["a1"]))
+
+        self.assertEqual(self.cached_keys(), [str(sorted(cache_tags([2], None)))])
+        self.assertEqual(await self.versions(), {1: 1})
+
+    async def test_channel_delete(self):
+        """Удаление канала сбрасывает записи канала и владельца."""
+        self.assertTrue(await ChannelRepository(self.session).delete(5))
+
+        self.assertEqual(self.cached_keys(), [str(sorted(cache_tags([2], None)))])
+        self.assertEqual(await self.versions(), {1: 1})
+
+    async def test_invalidates_after_commit_only(self):
+        """Локальный кэш сбрасывается при коммите, а откат оставляет его как есть."""
+        await publish_scope_changed(self.session, user_ids=[1])
+        self.assertEqual(len(self.cached_keys()), 3)
+        await self.session.rollback()
+        self.assertEqual(len(self.cached_keys()), 3)
+
+        await publish_scope_changed(self.session, user_ids=[1])
+        await self.session.commit()
+        self.assertEqual(self.cached_keys(), [
+            str(sorted(cache_tags(None, 5))), str(sorted(cache_tags([2], None))),
+        ])
+
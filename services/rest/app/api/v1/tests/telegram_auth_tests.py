@@ -0,0 +1,89 @@
+import hashlib
+import hmac
+import json
+import time
+import unittest
+import urllib.parse
+
+from sqlalchemy import inspect
+
+from app.models.user import User, UserRole
+from app.utils.auth_cache import AuthCache
+from app.utils.telegram_auth import check_telegram_auth, parse_init_data
+
+
+BOT_TOKEN = "123456:TEST"
+
+
+def sign_init_data(fields: dict, bot_token: str = BOT_TOKEN) -> str:
+    """Собираем init-data с подписью, как это делает Telegram."""
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields = dict(fields, hash=hmac.new(
+        secret_key, data_check_string.encode(), hashlib.sha256
+    ).hexdigest())
+    return urllib.parse.urlencode(fields)
+
+
+class TelegramInitDataTests(unittest.TestCase):
+    """Тесты проверки подписи init-data."""
+
+    def setUp(self):
+        self.fields = {
+            "auth_date": str(int(time.time())),
+            "query_id": "AAH",
+            "user": json.dumps({"id": 1, "first_name": "Иван"}, ensure_ascii=False),
+        }
+
+    def test_valid_signature(self):
+        """Подписанные данные проходят проверку."""
+        data = parse_init_data(sign_init_data(self.fields))
+        self.assertEqual(json.loads(data["user"])["id"], 1)
+        self.assertTrue(check_telegram_auth(data, bot_token=BOT_TOKEN, max_age_seconds=60))
+
+    def test_tampered_data(self):
+        """Подмена пользователя ломает подпись."""
+        data = parse_init_data(sign_init_data(self.fields))
+        data["user"] = json.dumps({"id": 2})
+        self.assertFalse(check_telegram_auth(data, bot_token=BOT_TOKEN, max_age_seconds=60))
+
+    def test_other_bot_token(self):
+        """Подпись чужого бота не принимается."""
+        data = parse_init_data(sign_init_data(self.fields, bot_token="654321:OTHER"))
+        self.assertFalse(check_telegram_auth(data, bot_token=BOT_TOKEN, max_age_seconds=60))
+
+    def test_expired_auth_date(self):
+        """Устаревший auth_date отклоняется."""
+        self.fields["auth_date"] = str(int(time.time()) - 3600)
+        data = parse_init_data(sign_init_data(self.fields))
+        self.assertFalse(check_telegram_auth(data, bot_token=BOT_TOKEN, max_age_seconds=60))
+
+
+class AuthCacheTests(unittest.TestCase):
+    """Тесты кэша аутентификации."""
+
+    def setUp(self):
+        self.cache = AuthCache(max_entries=10, ttl_seconds=60)
+        self.user = User(id=5, tg_id=500, username="cached", role=UserRole.USER, is_blocked=False)
+
+    def test_returns_detached_copy(self):
+        """Из кэша приходит новый отсоединённый объект с теми же полями."""
+        self.cache.set("token", self.user)
+        first = self.cache.get("token")
+        second = self.cache.get("token")
+        self.assertIsNot(first, second)
+        self.assertTrue(inspect(first).detached)
+        self.assertEqual((first.id, first.tg_id, first.role), (5, 500, UserRole.USER))
+
+    def test_invalidate_user(self):
+        """Блокировка/изменение пользователя сбрасывает все его токены."""
+        self.cache.set("token-a", self.user)
+        self.cache.set("token-b", self.user)
+        self.cache.invalidate_user(5)
+        self.assertIsNone(self.cache.get("token-a"))
+        self.assertIsNone(self.cache.get("token-b"))
+
+    def test_expires_with_auth_date(self):
+        """Запись живёт не дольше, чем валиден auth_date."""
+        self.cache.set("token", self.user, expires_in=-1)
+        self.assertIsNone(self.cache.get("token"))
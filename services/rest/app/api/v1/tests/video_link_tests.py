@@ -0,0 +1,64 @@
+import unittest
+
+from app.utils.video_link import normalize_video_link
+
+
+class NormalizeVideoLinkTests(unittest.TestCase):
+    """Тесты нормализации ссылок — по ней upsert находит одно и то же видео."""
+
+    SAME_VIDEO = [
+        (
+            "youtube.com/shorts/abc",
+            [
+                "https://youtube.com/shorts/abc",
+                "http://youtube.com/shorts/abc",
+                "https://www.youtube.com/shorts/abc",
+                "https://m.youtube.com/shorts/abc",
+                "https://YouTube.com/shorts/abc/",
+                "https://youtube.com/shorts/abc?feature=share",
+                "https://youtube.com/shorts/abc#t=10",
+                "  www.youtube.com/shorts/abc  ",
+            ],
+        ),
+        (
+            "youtube.com/watch?v=abc",
+            [
+                "https://www.youtube.com/watch?v=abc",
+                "https://youtube.com/watch?v=abc&si=tracking",
+                "https://m.youtube.com/watch/?utm_source=x&v=abc",
+            ],
+        ),
+        (
+            "tiktok.com/@user/video/1",
+            [
+                "https://www.tiktok.com/@user/video/1?is_from_webapp=1&sender_device=pc",
+                "tiktok.com/@user/video/1/",
+            ],
+        ),
+    ]
+
+    def test_variants_fold_together(self):
+        """Схема, www./m., регистр хоста, трекинг, фрагмент и слэш не различают видео."""
+        for expected, links in self.SAME_VIDEO:
+            for link in links:
+                with self.subTest(link=link):
+                    self.assertEqual(normalize_video_link(link), expected)
+
+    def test_different_videos_stay_different(self):
+        """Путь и значимый параметр v остаются частью ключа."""
+        distinct = [
+            "https://youtube.com/shorts/abc",
+            "https://youtube.com/shorts/ABC",
+            "https://youtube.com/watch?v=abc",
+            "https://youtube.com/watch?v=abd",
+            "https://likee.video/@user/video/1",
+        ]
+        self.assertEqual(len({normalize_video_link(link) for link in distinct}), len(distinct))
+
+    def test_none(self):
+        """Отсутствующая ссылка не превращается в строку."""
+        self.assertIsNone(normalize_video_link(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy import select
+
+from app.models.channel import Channel, ChannelType
+from app.models.videohistory import VideoHistory
+from app.models.videos import VelocityTier, Videos, VideoType
+from app.utils import video_velocity
+from app.utils.video_velocity import (
+    VelocityThresholds,
+    classify_velocity,
+    load_hot_videos,
+    refresh_channel_tiers,
+    refresh_velocity_tiers,
+    views_per_hour,
+)
+
+from .conftest import DbSessionTest
+
+
+THRESHOLDS = VelocityThresholds(hot_views_per_hour=100, cold_views_per_hour=1, new_video_hours=48)
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class VideoVelocityTests(unittest.TestCase):
+    """Тесты классификации видео по скорости просмотров."""
+
+    def test_views_per_hour(self):
+        """Прирост делится на часы между снимками, но не меньше чем на час."""
+        self.assertEqual(views_per_hour(100, 1300, NOW - timedelta(hours=12), NOW), 100)
+        self.assertEqual(views_per_hour(100, 150, NOW, NOW), 50)
+        self.assertEqual(views_per_hour(None, None, None, None), 0)
+
+    def test_classify(self):
+        """Новое видео горячее независимо от скорости, старое — по порогам."""
+        self.assertEqual(classify_velocity(0, 5, THRESHOLDS), VelocityTier.HOT)
+        self.assertEqual(classify_velocity(150, 500, THRESHOLDS), VelocityTier.HOT)
+        self.assertEqual(classify_velocity(10, 500, THRESHOLDS), VelocityTier.WARM)
+        self.assertEqual(classify_velocity(0.5, None, THRESHOLDS), VelocityTier.COLD)
+
+
+class VideoVelocityRefreshTests(DbSessionTest):
+    """Тесты пересчёта уровней видео и каналов по video_history."""
+
+    TABLES = (Channel, Videos, VideoHistory)
+
+    def add_video(self, video_id: int, channel_id: int, snapshots: list[tuple[int, int]],
+                  video_type: VideoType = VideoType.YOUTUBE):
+        """Видео со снимками (часов назад, просмотров)."""
+        self.session.add(Videos(
+            id=video_id, link=f"https://example.com/v{video_id}",
+            type=video_type, channel_id=channel_id,
+        ))
+        for hours_ago, views in snapshots:
+            self.session.add(VideoHistory(
+                video_id=video_id, amount_views=views, amount_likes=0, amount_comments=0,
+                date_published=(NOW - timedelta(days=30)).replace(tzinfo=None),
+                created_at=NOW - timedelta(hours=hours_ago),
+            ))
+
+    async def test_refresh_tiers(self):
+        """Видео и каналы получают уровни; снимки вне окна не учитываются."""
+        for channel_id, channel_type in ((1, ChannelType.YOUTUBE), (2, ChannelType.YOUTUBE), (3, ChannelType.LIKEE)):
+            self.session.add(Channel(
+                id=channel_id, type=channel_type,
+                link=f"https://example.com/@c{channel_id}", user_id=1,
+            ))
+        self.add_video(1, 1, [(24, 1000), (0, 5800)])  # 200/ч
+        self.add_video(2, 1, [(24, 1000), (0, 1100)])  # ~4/ч
+        self.add_video(3, 2, [(100, 0), (72, 50000)])  # только вне окна
+        self.add_video(4, 3, [(24, 0), (0, 9600)], VideoType.LIKEE)  # 400/ч
+        await self.session.commit()
+
+        counts = await refresh_velocity_tiers(
+            self.session, now=NOW, window_hours=48, thresholds=THRESHOLDS
+        )
+        await self.session.commit()
+
+        self.assertEqual(counts, {VelocityTier.HOT: 2, VelocityTier.WARM: 1, VelocityTier.COLD: 1})
+        tiers = dict((await self.session.execute(select(Channel.id, Channel.velocity_tier))).all())
+        self.assertEqual(tiers, {1: VelocityTier.HOT, 2: VelocityTier.COLD, 3: VelocityTier.HOT})
+        # Пока ни один парсер не принимает задачи на одно видео
+        self.assertEqual(await load_hot_videos(self.session, limit=10), [])
+        hot_types = (ChannelType.YOUTUBE, ChannelType.TIKTOK)
+        with patch.object(video_velocity, "HOT_VIDEO_CHANNEL_TYPES", hot_types):
+            hot = await load_hot_videos(self.session, limit=10)
+        self.assertEqual([video.id for video in hot], [1])
+        # Повторный пересчёт без изменений не переписывает каналы
+        self.assertEqual(await refresh_channel_tiers(self.session), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
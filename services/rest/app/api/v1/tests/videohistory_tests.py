@@ -0,0 +1,90 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.repositories.videohistory import VideoHistoryRepository
+
+
+class FakeSession:
+    """Сессия, которая отдаёт последние снимки и запоминает подтверждения."""
+
+    def __init__(self, latest: list[dict]):
+        self.latest = latest
+        self.confirmed: list[dict] = []
+
+    async def execute(self, stmt):
+        return [SimpleNamespace(video_id=row["video_id"], _mapping=row) for row in self.latest]
+
+    async def connection(self):
+        return SimpleNamespace(execute=self.confirm)
+
+    async def confirm(self, stmt, params):
+        self.confirmed.extend(params)
+
+
+class StoreSnapshotsTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Тесты записи только изменившихся снимков. DISTINCT ON и greatest() есть
+    только в PostgreSQL, поэтому последние снимки отдаёт подменённая сессия.
+    """
+
+    def setUp(self):
+        self.previous = {
+            "id": 7, "video_id": 1,
+            "amount_views": 10, "amount_likes": 1, "amount_comments": 0,
+            # aware-время, как его возвращает asyncpg для timestamptz
+            "created_at": datetime(2026, 5, 3, 9, tzinfo=timezone.utc),
+            "last_confirmed_at": None,
+        }
+        self.session = FakeSession([self.previous])
+        self.inserted: list[dict] = []
+
+        async def bulk_create(repo, rows):
+            self.inserted.extend(rows)
+
+        async def upsert_daily_stats(repo, rows):
+            return None
+
+        for patcher in (
+            patch.object(VideoHistoryRepository, "bulk_create", bulk_create),
+            patch.object(VideoHistoryRepository, "upsert_daily_stats", upsert_daily_stats),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.repo = VideoHistoryRepository(self.session)
+
+    def snapshot(self, hour: int, views: int, video_id: int = 1) -> dict:
+        """Снимок парсера: время без часового пояса, как history_created_at."""
+        return {
+            "video_id": video_id, "amount_views": views, "amount_likes": 1, "amount_comments": 0,
+            "created_at": datetime(2026, 5, 3, hour),
+        }
+
+    async def test_unchanged_snapshot_confirms_previous(self):
+        """Совпавший снимок не пишется, а продлевает last_confirmed_at последнего."""
+        stored = await self.repo.store_snapshots([self.snapshot(12, 10)])
+
+        self.assertEqual(stored, 0)
+        self.assertEqual(self.inserted, [])
+        self.assertEqual(self.session.confirmed, [
+            {"b_id": 7, "b_confirmed_at": datetime(2026, 5, 3, 12, tzinfo=timezone.utc)},
+        ])
+
+    async def test_changed_snapshots_are_stored(self):
+        """Изменившиеся метрики и новое видео пишутся; повтор в пачке только подтверждает."""
+        rows = [self.snapshot(14, 11), self.snapshot(12, 11), self.snapshot(13, 5, video_id=2)]
+        stored = await self.repo.store_snapshots(rows)
+
+        self.assertEqual(stored, 2)
+        self.assertEqual(
+            [(row["video_id"], row["created_at"].hour) for row in self.inserted], [(1, 12), (2, 13)]
+        )
+        self.assertEqual(
+            self.inserted[0]["last_confirmed_at"], datetime(2026, 5, 3, 14, tzinfo=timezone.utc)
+        )
+        self.assertEqual(self.session.confirmed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
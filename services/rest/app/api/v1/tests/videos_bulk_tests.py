@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.v1.endpoints import videos as videos_router
+from app.core.db import get_db
+from app.models.channel import Channel, ChannelType
+from app.repositories.videohistory import VideoHistoryRepository
+from app.repositories.videos import VideosRepository
+
+from .conftest import DbSessionTest
+
+
+class VideosBulkEndpointTests(DbSessionTest):
+    """
+    Тесты POST /videos/bulk. INSERT ... ON CONFLICT и запись истории
+    завязаны на PostgreSQL, поэтому здесь подменены и только запоминают строки.
+    """
+
+    TABLES = (Channel,)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.session.add(Channel(
+            id=1, type=ChannelType.YOUTUBE, link="https://www.youtube.com/@c1", user_id=1,
+        ))
+        await self.session.commit()
+
+        self.existing = {"youtube.com/shorts/old"}
+        self.upserted: list[dict] = []
+        self.snapshots: list[dict] = []
+
+        async def upsert_many(repo, rows):
+            self.upserted.extend(rows)
+            return {
+                row["link_normalized"]: (index + 1, row["link_normalized"] not in self.existing)
+                for index, row in enumerate(rows)
+            }
+
+        async def store_snapshots(repo, rows, change_only=True):
+            self.snapshots.extend(rows)
+            return len(rows)
+
+        self.patches = [
+            patch.object(VideosRepository, "upsert_many", upsert_many),
+            patch.object(VideoHistoryRepository, "store_snapshots", store_snapshots),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+        async def override_db():
+            yield self.session
+
+        app = FastAPI()
+        app.include_router(videos_router.router, prefix="/api/v1/videos")
+        app.dependency_overrides[get_db] = override_db
+        self.client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        for patcher in self.patches:
+            patcher.stop()
+        await super().asyncTearDown()
+
+    def item(self, link: str, views: int = 0) -> dict:
+        """Видео пакета."""
+        return {"type": "youtube", "link": link, "amount_views": views, "articles": ["b", "a", "b"]}
+
+    async def test_created_updated_and_duplicate(self):
+        """Повтор ссылки в пакете — duplicate; видео и снимок пишутся один раз."""
+        resp = await self.client.post("/api/v1/videos/bulk", json={
+            "channel_id": 1,
+            "videos": [
+                self.item("https://youtube.com/shorts/new", 10),
+                self.item("https://www.youtube.com/shorts/new/?feature=share", 11),
+                self.item("https://youtube.com/shorts/old", 5),
+            ],
+        })
+        self.assertEqual(resp.status_code, 200)
+        payload = resp.json()
+        self.assertEqual((payload["created"], payload["updated"]), (1, 1))
+        self.assertEqual(
+            [item["status"] for item in payload["items"]], ["created", "duplicate", "updated"]
+        )
+        self.assertEqual(payload["items"][0]["id"], payload["items"][1]["id"])
+
+        self.assertEqual([row["link_normalized"] for row in self.upserted],
+                         ["youtube.com/shorts/new", "youtube.com/shorts/old"])
+        self.assertEqual(self.upserted[0]["articles"], "a,b")
+        self.assertEqual([row["amount_views"] for row in self.snapshots], [10, 5])
+
+    async def test_unknown_channel(self):
+        """Пакет несуществующего канала отклоняется с 400 и ничего не пишет."""
+        resp = await self.client.post("/api/v1/videos/bulk", json={
+            "channel_id": 404, "videos": [self.item("https://youtube.com/shorts/x")],
+        })
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.upserted, [])
+
+    async def test_invalid_payload(self):
+        """Неизвестный тип видео — ошибка валидации."""
+        resp = await self.client.post("/api/v1/videos/bulk", json={
+            "channel_id": 1, "videos": [{"type": "vimeo", "link": "https://vimeo.com/1"}],
+        })
+        self.assertEqual(resp.status_code, 422)
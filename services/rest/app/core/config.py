@@ -1,3 +1,5 @@
+from urllib.parse import quote
+
 from pydantic_settings import BaseSettings
 
 from dotenv import load_dotenv
@@ -11,6 +13,20 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_ADMIN_ID: int
+    # Проверка подписи init-data WebApp и максимальный возраст auth_date (0 — без ограничения)
+    TELEGRAM_AUTH_VERIFY: bool = True
+    TELEGRAM_AUTH_MAX_AGE_SECONDS: int = 86400
+    # Кэш аутентификации по хэшу токена; 0 секунд — кэш выключен
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Печать всех SQL-запросов движком (echo)
+    SQL_ECHO: bool = False
+    # Отладка: Server-Timing/X-DB-* в ответах и сводка SQL по каждому запросу
+    SQL_DEBUG_HEADERS: bool = False
+    SQL_SLOWEST_STATEMENTS: int = 3
+    # Предупреждать, если запрос API выполнил одну форму SQL больше N раз
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
 
     COS_LOGSTASH_PORT: int | str
     COS_LOGSTASH_HOST: str
@@ -18,7 +34,95 @@ class Settings(BaseSettings):
     COS_RABBITMQ_USER: str
     COS_RABBITMQ_PASSWORD: str
     COS_RABBITMQ_HOST: str
+    # Продюсер: размер пула каналов и ожидание подтверждения публикации брокером
+    RABBITMQ_CHANNEL_POOL_SIZE: int = 4
+    RABBITMQ_PUBLISH_TIMEOUT_SECONDS: float = 10
     INSTAGRAM_BATCH_CONTROL_TOKEN: str | None = None
+    # Задачи APScheduler в PostgreSQL; запускает их одна реплика — владелец advisory lock
+    SCHEDULER_PERSISTENT_JOBS: bool = True
+    SCHEDULER_LEADER_LOCK_KEY: int = 720130501
+    SCHEDULER_LEADER_RETRY_SECONDS: int = 15
+    # Advisory-блокировка полосы на время выдачи смещения новому каналу
+    SCHEDULER_SLOT_LOCK_KEY: int = 720130502
+    # Стратегия расписания: daily (12:00/21:00), rolling (равномерно по суткам), cicd
+    SCHEDULE_STRATEGY: str = "daily"
+    # rolling: каждый канал обновляется раз в N минут (N должно делить сутки)
+    SCHEDULE_ROLLING_PERIOD_MINUTES: int = 720
+    # Полосы расписания по платформам: параллельные парсеры × среднее время парсинга канала (мин);
+    # полоса, не успевающая до следующего слота, сжимается (иначе только предупреждение)
+    SCHEDULE_LANE_YOUTUBE_CONSUMERS: int = 1
+    SCHEDULE_LANE_YOUTUBE_PARSE_MINUTES: float = 5
+    SCHEDULE_LANE_TIKTOK_CONSUMERS: int = 1
+    SCHEDULE_LANE_TIKTOK_PARSE_MINUTES: float = 5
+    SCHEDULE_LANE_LIKEE_CONSUMERS: int = 1
+    SCHEDULE_LANE_LIKEE_PARSE_MINUTES: float = 5
+    SCHEDULE_LANE_AUTO_COMPRESS: bool = True
+    # Снимок аккаунтов/прокси на волну задач; 0 секунд — читать каждый раз
+    DISPATCH_SNAPSHOT_TTL_SECONDS: int = 30
+    # Сколько ждать задачи того же слота, чтобы отправить их одной волной
+    WAVE_COALESCE_MS: int = 200
+    # Диспетчер волн: порция каналов из БД, пауза между порциями и сколько пропущенных минут догонять
+    WAVE_DISPATCH_CHUNK_SIZE: int = 200
+    WAVE_DISPATCH_PACE_MS: int = 100
+    WAVE_DISPATCH_CATCHUP_MINUTES: int = 10
+    # Частота обновления по скорости просмотров (video_history за окно):
+    # hot — отдельные задачи "video" каждые VIDEO_HOT_REFRESH_MINUTES (не больше VIDEO_HOT_MAX_TASKS;
+    # выключено, пока парсеры не принимают задачи "video", см. HOT_VIDEO_CHANNEL_TYPES),
+    # cold — канал без тёплых/горячих видео парсится только первой волной суток
+    VIDEO_VELOCITY_WINDOW_HOURS: int = 48
+    VIDEO_TIER_HOT_VIEWS_PER_HOUR: float = 100
+    VIDEO_TIER_COLD_VIEWS_PER_HOUR: float = 1
+    VIDEO_TIER_NEW_VIDEO_HOURS: int = 48
+    VIDEO_TIER_REFRESH_MINUTES: int = 60
+    VIDEO_HOT_REFRESH_MINUTES: int = 180
+    VIDEO_HOT_MAX_TASKS: int = 2000
+    # Аренда аккаунтов/прокси парсерами: задача несёт только ссылку на пул,
+    # воркер арендует N ресурсов на срок (продлевает на половине) и возвращает их
+    RESOURCE_LEASES_ENABLED: bool = True
+    LEASE_TTL_SECONDS: int = 900
+    LEASE_MAX_TTL_SECONDS: int = 6 * 3600
+    LEASE_PROXIES_PER_TASK: int = 3
+    LEASE_ACCOUNTS_PER_TASK: int = 1
+    LEASE_ACCOUNTS_PER_BATCH: int = 10
+
+    # Очередь результатов парсинга и пакетный ingest-потребитель
+    PARSING_RESULTS_QUEUE: str = "parsing_results"
+    INGEST_BATCH_SIZE: int = 50
+    INGEST_BATCH_TIMEOUT_MS: int = 500
+    # Сообщение, которое не записывается и по одному, переотправляется с счётчиком попыток
+    # и после INGEST_MAX_ATTEMPTS уходит в очередь мёртвых писем; при недоступной БД — пауза
+    INGEST_MAX_ATTEMPTS: int = 3
+    INGEST_DEAD_LETTER_QUEUE: str = "parsing_results.dead"
+    INGEST_RETRY_BACKOFF_SECONDS: float = 5
+
+    # Write-behind запись снимков video_history (COPY по размеру/таймеру)
+    HISTORY_FLUSH_BATCH_SIZE: int = 1000
+    HISTORY_FLUSH_INTERVAL_MS: int = 1000
+    # Пока БД недоступна: не больше HISTORY_BUFFER_MAX_ROWS снимков в памяти (старые отбрасываются),
+    # повторный сброс с экспоненциальной паузой от HISTORY_RETRY_BACKOFF_MS до HISTORY_RETRY_BACKOFF_MAX_MS
+    HISTORY_BUFFER_MAX_ROWS: int = 50000
+    HISTORY_RETRY_BACKOFF_MS: int = 1000
+    HISTORY_RETRY_BACKOFF_MAX_MS: int = 60000
+    # Неизменившиеся снимки продлевают last_confirmed_at последнего вместо новой строки
+    HISTORY_CHANGE_ONLY: bool = True
+    # Сколько месячных секций video_history держать созданными наперёд
+    HISTORY_PARTITIONS_AHEAD: int = 2
+    # Сколько строк серверный курсор отдаёт за раз при потоковой выгрузке истории
+    HISTORY_EXPORT_FETCH_SIZE: int = 1000
+
+    # Кэш агрегатов статистики; 0 секунд — кэш выключен
+    STATS_CACHE_TTL_SECONDS: int = 600
+    STATS_CACHE_MAX_ENTRIES: int = 1024
+    # Рассылать/слушать инвалидацию между процессами через LISTEN/NOTIFY
+    STATS_CACHE_NOTIFY: bool = True
+
+    @property
+    def RABBITMQ_URL(self) -> str:
+        """AMQP URL для aio-pika; логин и пароль экранируются (в них бывают @, :, /)."""
+        return (
+            f"amqp://{quote(self.COS_RABBITMQ_USER, safe='')}:{quote(self.COS_RABBITMQ_PASSWORD, safe='')}"
+            f"@{self.COS_RABBITMQ_HOST}/"
+        )
 
     model_config = {
         "env_file": ".env"
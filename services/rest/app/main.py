@@ -2,6 +2,8 @@ from fastapi import FastAPI
 from app.api.v1.main import api_router
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from app.utils.metrics import MetricsMiddleware, metrics_endpoint
+from app.utils.sql_instrumentation import SqlInstrumentationMiddleware
 import os
 
 app = FastAPI()
@@ -12,7 +14,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Query-Count", "X-DB-Time-Ms"],
 )
+app.add_middleware(SqlInstrumentationMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -5,6 +5,15 @@ from .proxy import Proxy
 from .task import Task
 from .account import Account
 from .videohistory import VideoHistory
+from .videodailystats import VideoDailyStats
+from .videoarticle import VideoArticle
+from .userdataversion import UserDataVersion
+from .schedulerstate import (
+    ChannelLaneSlot,
+    SchedulerBatchLock,
+    SchedulerCursor,
+    SchedulerPendingTask,
+)
 
 __all__ = [
     "Videos",
@@ -14,4 +23,11 @@ __all__ = [
     "Task",
     "Account",
     "VideoHistory",
+    "VideoDailyStats",
+    "VideoArticle",
+    "UserDataVersion",
+    "SchedulerBatchLock",
+    "SchedulerCursor",
+    "SchedulerPendingTask",
+    "ChannelLaneSlot",
 ]
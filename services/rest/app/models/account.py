@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import ENUM as PgEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import Boolean
@@ -14,6 +14,10 @@ class Account(Base, TimestampMixin):
     id = Column(Integer, primary_key=True)
     account_str = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Аренда парсером: ресурс свободен, если срок истёк или аренды не было
+    lease_id = Column(String, nullable=True, index=True)
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
 
     def toggle_active(self):
         """Переключаем активность аккаунта."""
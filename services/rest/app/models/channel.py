@@ -1,9 +1,10 @@
 import enum
 import re
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 from .timestamp import TimestampMixin
+from .videos import VelocityTier
 
 
 class ChannelType(enum.Enum):
@@ -17,6 +18,11 @@ class ChannelType(enum.Enum):
 class Channel(Base, TimestampMixin):
     """Канал."""
     __tablename__ = "channels"
+    __table_args__ = (
+        Index("ix_channels_created_at_id", "created_at", "id"),
+        Index("ix_channels_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_channels_schedule_offset_id", "schedule_offset_minutes", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(Enum(ChannelType), nullable=False)
@@ -34,6 +40,11 @@ class Channel(Base, TimestampMixin):
     tasks = relationship("Task", back_populates="channel",
                          cascade="all, delete-orphan")
 
+    # Смещение (daily) или фаза (rolling) в полосе платформы, выданное при создании
+    schedule_offset_minutes = Column(Integer, nullable=True)
+    # Самый быстрый уровень среди видео канала; холодные каналы парсятся раз в сутки
+    velocity_tier = Column(Enum(VelocityTier), nullable=True)
+
     start_views = Column(Integer, default=0)
     start_likes = Column(Integer, default=0)
     start_comments = Column(Integer, default=0)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, func
+from app.core.db import Base
+from .channel import ChannelType
+
+
+class SchedulerBatchLock(Base):
+    """Блокировка пакетного парсинга (Instagram batch): переживает рестарт и общая для реплик."""
+    __tablename__ = "scheduler_batch_locks"
+
+    name = Column(String, primary_key=True)
+    batch_id = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SchedulerCursor(Base):
+    """Позиция периодической задачи планировщика (последняя разобранная минута): общая для реплик."""
+    __tablename__ = "scheduler_cursors"
+
+    name = Column(String, primary_key=True)
+    position = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+
+class SchedulerPendingTask(Base):
+    """Задача канала, отложенная до окончания Instagram batch."""
+    __tablename__ = "scheduler_pending_tasks"
+
+    channel_id = Column(
+        ForeignKey("channels.id", ondelete="CASCADE"), primary_key=True
+    )
+    schedule_offset_minutes = Column(Integer, nullable=True)
+    schedule_wave_anchor = Column(String, nullable=True)
+    queued_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ChannelLaneSlot(Base):
+    """Занятость слота полосы: сколько каналов платформы запускаются с этим смещением."""
+    __tablename__ = "channel_lane_slots"
+
+    type = Column(Enum(ChannelType), primary_key=True)
+    schedule_offset_minutes = Column(Integer, primary_key=True)
+    channels = Column(Integer, nullable=False, default=0)
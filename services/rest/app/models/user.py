@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy import BigInteger, Column, Index, Integer, String
 from sqlalchemy.dialects.postgresql import ENUM as PgEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import Boolean
@@ -17,6 +17,9 @@ class UserRole(enum.Enum):
 class User(Base, TimestampMixin):
     """Пользователь."""
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tg_id = Column(BigInteger, nullable=False, index=True)
@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, func
+from app.core.db import Base
+
+
+class UserDataVersion(Base):
+    """Версия данных пользователя: растёт при каждом изменении его каналов, видео и истории."""
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, ForeignKey, Index, String
+from sqlalchemy.orm import relationship
+from app.core.db import Base
+
+
+class VideoArticle(Base):
+    """Артикль видео (нормализованный Videos.articles)."""
+    __tablename__ = "video_articles"
+    __table_args__ = (
+        # text_pattern_ops обслуживает и точное совпадение, и поиск по префиксу
+        Index(
+            "ix_video_articles_article",
+            "article",
+            postgresql_ops={"article": "text_pattern_ops"},
+        ),
+    )
+
+    video_id = Column(
+        ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    article = Column(String, primary_key=True)
+
+    video = relationship(
+        "Videos",
+        back_populates="article_tags"
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import relationship
+from app.core.db import Base
+
+
+class VideoDailyStats(Base):
+    """Дневной максимум метрик видео (сводка по video_history)."""
+    __tablename__ = "video_daily_stats"
+
+    video_id = Column(
+        ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    # День снимка по UTC
+    day = Column(Date, primary_key=True, index=True)
+    views = Column(Integer, nullable=False, default=0)
+    likes = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    date_published = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+
+    video = relationship(
+        "Videos",
+        back_populates="daily_stats"
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 from .timestamp import TimestampMixin
@@ -6,13 +6,22 @@ from .timestamp import TimestampMixin
 
 class VideoHistory(Base, TimestampMixin):
     """История видео."""
+    # В PostgreSQL таблица секционирована по месяцам created_at
+    # (миграция 5c8e2a6f1b93, первичный ключ (id, created_at))
     __tablename__ = "video_history"
+    __table_args__ = (
+        Index("ix_video_history_video_id_created_at", "video_id", "created_at"),
+        Index("ix_video_history_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     amount_views = Column(Integer, nullable=False)
     amount_likes = Column(Integer, nullable=False)
     amount_comments = Column(Integer, nullable=False)
     date_published = Column(DateTime, nullable=True)
+    # Последний парсинг, подтвердивший те же значения метрик
+    # (при HISTORY_CHANGE_ONLY неизменившиеся снимки не пишутся отдельно)
+    last_confirmed_at = Column(DateTime(timezone=True), nullable=True)
 
     video_id = Column(ForeignKey("videos.id"), nullable=False, index=True)
 
@@ -1,8 +1,9 @@
 import enum
 from app.core.db import Base
 from .timestamp import TimestampMixin
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from app.utils.video_link import normalize_video_link
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql.sqltypes import Enum
 
 
@@ -14,16 +15,32 @@ class VideoType(enum.Enum):
     LIKEE = "likee" # Лайк
 
 
+class VelocityTier(enum.Enum):
+    """Скорость набора просмотров — определяет частоту обновления."""
+    HOT = "hot" # Растёт быстро — обновляем чаще волн
+    WARM = "warm" # Обычное расписание
+    COLD = "cold" # Почти не меняется — раз в сутки
+
+
 class Videos(Base, TimestampMixin):
     """Видео."""
     __tablename__ = "videos"
+    __table_args__ = (
+        Index("ix_videos_created_at_id", "created_at", "id"),
+        Index("ix_videos_channel_id_created_at_id", "channel_id", "created_at", "id"),
+        Index("ix_videos_velocity_tier_views_per_hour", "velocity_tier", "views_per_hour"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     link = Column(String, nullable=False)
+    link_normalized = Column(String, nullable=False, unique=True, index=True)
     type = Column(Enum(VideoType), nullable=False)
     name = Column(String, nullable=True)
     image = Column(String, nullable=True)
     articles = Column(String, nullable=True, index=True)
+    # Просмотров в час за окно VIDEO_VELOCITY_WINDOW_HOURS и уровень частоты обновления
+    views_per_hour = Column(Float, nullable=True)
+    velocity_tier = Column(Enum(VelocityTier), nullable=True)
 
     channel_id = Column(ForeignKey("channels.id"), nullable=False, index=True)
     channel = relationship(
@@ -36,3 +53,23 @@ class Videos(Base, TimestampMixin):
         back_populates="video",
         cascade="all, delete-orphan"
     )
+
+    daily_stats = relationship(
+        "VideoDailyStats",
+        back_populates="video",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    article_tags = relationship(
+        "VideoArticle",
+        back_populates="video",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    @validates("link")
+    def _sync_link_normalized(self, key, value):
+        """Поддерживаем нормализованную ссылку в актуальном состоянии."""
+        self.link_normalized = normalize_video_link(value)
+        return value
@@ -1,8 +1,12 @@
+from datetime import timedelta
+from typing import Optional
+
 from fastapi.exceptions import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import select
 from app.models.account import Account
 from app.schemas.account import AccountCreate, AccountUpdate
+from app.utils.resource_lease import LeaseGrant, acquire_lease, release_lease, renew_lease
 
 
 class AccountRepository:
@@ -21,6 +25,23 @@ class AccountRepository:
         result = await self.db.execute(select(Account).filter_by(id=id))
         return result.scalar_one_or_none()
 
+    async def lease(self, count: int, ttl: timedelta,
+                    holder: Optional[str] = None) -> LeaseGrant:
+        """Арендуем свободные активные аккаунты."""
+        return await acquire_lease(
+            self.db, Account, Account.account_str,
+            [Account.is_active.is_(True)],
+            count, ttl, holder,
+        )
+
+    async def renew_lease(self, lease_id: str, ttl: timedelta):
+        """Продлеваем аренду аккаунтов."""
+        return await renew_lease(self.db, Account, lease_id, ttl)
+
+    async def release_lease(self, lease_id: str) -> int:
+        """Возвращаем арендованные аккаунты."""
+        return await release_lease(self.db, Account, lease_id)
+
     async def update_account(self, account_id: int,
                              account_update: AccountUpdate) -> Account:
         """Обновляем аккаунт."""
@@ -7,6 +7,11 @@ from app.models.channel import Channel, ChannelType
 from app.models.videos import Videos
 from app.schemas.channel import ChannelCreate, ChannelUpdate
 from app.models.user import User, UserRole
+from app.core.config import settings
+from app.utils.data_version import bump_data_versions
+from app.utils.stats_cache import publish_scope_changed
+from app.utils.pagination import PaginationCount, paginate_by_cursor
+from app.utils.slot_allocator import release_channel_slots
 
 
 class ChannelRepository:
@@ -24,7 +29,9 @@ class ChannelRepository:
         link: Optional[str] = None,
         name_channel: Optional[str] = None,
         page: Optional[int] = None,
-        size: Optional[int] = None
+        size: Optional[int] = None,
+        after: Optional[str] = None,
+        count: PaginationCount = PaginationCount.NONE,
     ) -> dict:
         """Получаем все каналы с фильтрацией и пагинацией."""
         query = select(Channel)
@@ -48,6 +55,12 @@ class ChannelRepository:
                 ).contains(func.lower(name_channel))
             )
 
+        if after is not None:
+            channels, pagination = await paginate_by_cursor(
+                self.db, query, Channel, after, size, count
+            )
+            return {"channels": channels, "pagination": pagination}
+
         if page is not None and size is not None:
             offset = (page - 1) * size
             query = query.offset(offset).limit(size)
@@ -116,6 +129,7 @@ class ChannelRepository:
         )
 
         self.db.add(channel)
+        await bump_data_versions(self.db, user_ids=[user_id])
         await self.db.commit()
         await self.db.refresh(channel)
         return channel
@@ -128,6 +142,7 @@ class ChannelRepository:
         if not channel:
             return None
 
+        previous_user_id = channel.user_id
         update_data = dto.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(channel, field, value)
@@ -146,6 +161,13 @@ class ChannelRepository:
             temp_channel = Channel(link=channel.link)
             channel.name_channel = temp_channel.grap_name_channel()
 
+        if channel.user_id != previous_user_id:
+            # Статистика канала переехала к другому владельцу
+            await publish_scope_changed(
+                self.db, user_ids=[previous_user_id, channel.user_id], channel_ids=[channel.id]
+            )
+        else:
+            await bump_data_versions(self.db, user_ids=[channel.user_id])
         await self.db.commit()
         await self.db.refresh(channel)
         return channel
@@ -158,6 +180,10 @@ class ChannelRepository:
         if not channel:
             return False
 
+        await publish_scope_changed(self.db, user_ids=[channel.user_id], channel_ids=[channel.id])
+        await release_channel_slots(
+            self.db, [(channel.type, channel.schedule_offset_minutes)], settings.SCHEDULER_SLOT_LOCK_KEY
+        )
         await self.db.delete(channel)
         await self.db.commit()
         return True
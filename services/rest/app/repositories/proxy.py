@@ -1,9 +1,14 @@
+from datetime import timedelta
+from typing import Optional
+
 from fastapi.exceptions import HTTPException
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import select
 from app.models.proxy import Proxy
+from app.schemas.lease import ProxyPool
 from app.schemas.proxy import ProxyCreate, ProxyUpdate
+from app.utils.resource_lease import LeaseGrant, acquire_lease, release_lease, renew_lease
 
 
 class ProxyRepository:
@@ -22,6 +27,27 @@ class ProxyRepository:
         result = await self.db.execute(select(Proxy).filter_by(id=id))
         return result.scalar_one_or_none()
 
+    async def lease(self, pool: ProxyPool, count: int, ttl: timedelta,
+                    holder: Optional[str] = None) -> LeaseGrant:
+        """Арендуем свободные активные прокси пула."""
+        for_likee = Proxy.for_likee.is_(True)
+        return await acquire_lease(
+            self.db, Proxy, Proxy.proxy_str,
+            [
+                Proxy.is_active.isnot(False),
+                for_likee if pool == ProxyPool.LIKEE else ~for_likee,
+            ],
+            count, ttl, holder,
+        )
+
+    async def renew_lease(self, lease_id: str, ttl: timedelta):
+        """Продлеваем аренду прокси."""
+        return await renew_lease(self.db, Proxy, lease_id, ttl)
+
+    async def release_lease(self, lease_id: str) -> int:
+        """Возвращаем арендованные прокси."""
+        return await release_lease(self.db, Proxy, lease_id)
+
     async def update_proxy(self, proxy_id: int,
                            proxy_update: ProxyUpdate) -> Proxy:
         """Обновляем прокси."""
@@ -1,10 +1,16 @@
+from typing import Optional
+
 from fastapi.exceptions import HTTPException
 from sqlalchemy import or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import select
 
+from app.core.config import settings
+from app.models.channel import Channel
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRegister, UserUpdate
+from app.utils.pagination import PaginationCount, paginate_by_cursor
+from app.utils.slot_allocator import release_channel_slots
 
 
 class UserRepository:
@@ -13,8 +19,20 @@ class UserRepository:
         """Инициализируем репозиторий."""
         self.db = db
 
-    async def get_all_paginated(self, page: int, size: int):
+    async def get_all_paginated(
+        self,
+        page: int,
+        size: int,
+        after: Optional[str] = None,
+        count: PaginationCount = PaginationCount.NONE,
+    ):
         """Получение всех пользователей с пагинацией"""
+        if after is not None:
+            users, pagination = await paginate_by_cursor(
+                self.db, select(User), User, after, size, count
+            )
+            return {"users": users, "pagination": pagination}
+
         offset = (page - 1) * size
         query = select(User).offset(offset).limit(size)
         result = await self.db.execute(query)
@@ -162,6 +180,11 @@ class UserRepository:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
+        # Каналы удаляются каскадом — освобождаем их слоты в полосах
+        slots = (await self.db.execute(
+            select(Channel.type, Channel.schedule_offset_minutes).where(Channel.user_id == user_id)
+        )).all()
+        await release_channel_slots(self.db, slots, settings.SCHEDULER_SLOT_LOCK_KEY)
         await self.db.delete(user)
         await self.db.commit()
         return user
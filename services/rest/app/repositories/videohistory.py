@@ -1,79 +1,242 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from fastapi.exceptions import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import select
-from sqlalchemy import func, or_
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from sqlalchemy.sql import select, insert, update, bindparam
+from sqlalchemy import Date, cast, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import AsyncIterator, Optional, List
 from app.models.videohistory import VideoHistory
+from app.models.videodailystats import VideoDailyStats
 from app.schemas.videohistory import VideoHistoryCreate, VideoAmountViews
 from app.models.videos import Videos
 from app.models.channel import Channel
+from app.repositories.videos import articles_filter
+from app.utils.pagination import PaginationCount, paginate_by_cursor
+from app.utils.stats_cache import publish_stats_changed
+
+
+# Колонки снимка, передаваемые в COPY; id и updated_at заполняет БД
+SNAPSHOT_COPY_COLUMNS = (
+    "video_id",
+    "amount_views",
+    "amount_likes",
+    "amount_comments",
+    "date_published",
+    "created_at",
+    "last_confirmed_at",
+)
+SNAPSHOT_METRICS = ("amount_views", "amount_likes", "amount_comments")
+
+
+def _as_date(value):
+    """Приводим границу периода к дате."""
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _month_start(value) -> datetime:
+    """Начало месяца (UTC) — граница секции video_history."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Наивное время снимка считаем UTC, как и asyncpg для timestamptz."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _plan_snapshots(rows: List[dict], latest: dict) -> tuple[List[dict], dict]:
+    """
+    Делим пачку снимков на новые строки и подтверждения последних снимков.
+    latest — последний снимок каждого видео в БД; возвращаем строки для вставки
+    и {id снимка: новое last_confirmed_at}.
+    """
+    for previous in latest.values():
+        previous["created_at"] = _as_utc(previous["created_at"])
+
+    to_insert: List[dict] = []
+    confirmed: dict[int, datetime] = {}
+    for row in sorted(rows, key=lambda item: item["created_at"]):
+        previous = latest.get(row["video_id"])
+        unchanged = (
+            previous is not None
+            and row["created_at"] >= previous["created_at"]
+            and _month_start(row["created_at"]) == _month_start(previous["created_at"])
+            and all(row.get(key) == previous[key] for key in SNAPSHOT_METRICS)
+        )
+        if not unchanged:
+            row["last_confirmed_at"] = None
+            to_insert.append(row)
+            latest[row["video_id"]] = row
+            continue
+        if previous.get("id") is None:
+            # Последний снимок — ещё не записанная строка этой же пачки
+            previous["last_confirmed_at"] = row["created_at"]
+        else:
+            confirmed[previous["id"]] = row["created_at"]
+    return to_insert, confirmed
+
+
+def filter_daily_stats(
+    query,
+    id: Optional[int] = None,
+    date_to=None,
+    date_from=None,
+    video_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    channel_type: Optional[str] = None,
+    date_published_to: Optional[datetime] = None,
+    date_published_from: Optional[datetime] = None,
+    user_ids: Optional[List[int]] = None,
+    articles: Optional[List[str]] = None,
+):
+    """
+    Фильтры статистики по сводке video_daily_stats.
+    Запрос должен уже содержать join на Videos и Channel.
+    """
+    if id is not None:
+        # Как и до сводки: только день (UTC) этого снимка, а не все дни его видео
+        query = query.where(tuple_(VideoDailyStats.video_id, VideoDailyStats.day).in_(
+            select(
+                VideoHistory.video_id,
+                cast(func.timezone("UTC", VideoHistory.created_at), Date),
+            ).where(VideoHistory.id == id)
+        ))
+
+    if video_id is not None:
+        query = query.where(VideoDailyStats.video_id == video_id)
+
+    if date_from is not None:
+        query = query.where(VideoDailyStats.day >= _as_date(date_from))
+
+    if date_to is not None:
+        query = query.where(VideoDailyStats.day <= _as_date(date_to))
+
+    if date_published_to is not None:
+        query = query.where(VideoDailyStats.date_published <= date_published_to)
+
+    if date_published_from is not None:
+        query = query.where(VideoDailyStats.date_published >= date_published_from)
+
+    if user_ids:
+        query = query.where(Channel.user_id.in_(user_ids))
+
+    if channel_id is not None:
+        query = query.where(Videos.channel_id == channel_id)
+
+    if channel_type is not None:
+        query = query.where(Channel.type == channel_type)
+
+    if articles:
+        query = query.where(articles_filter(articles))
+
+    return query
+
+
+def history_rows_query(
+    id: Optional[int] = None,
+    date_to: Optional[datetime] = None,
+    date_from: Optional[datetime] = None,
+    video_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    channel_type: Optional[str] = None,
+    user_id: Optional[int] = None,
+    user_ids: Optional[List[int]] = None,
+    articles: Optional[List[str]] = None,
+    date_published_to: Optional[datetime] = None,
+    date_published_from: Optional[datetime] = None,
+):
+    """Плоский запрос снимков истории с полями видео — без загрузки ORM-объектов."""
+    query = (
+        select(
+            VideoHistory.id,
+            VideoHistory.video_id,
+            VideoHistory.amount_views,
+            VideoHistory.amount_likes,
+            VideoHistory.amount_comments,
+            VideoHistory.date_published,
+            VideoHistory.created_at,
+            VideoHistory.updated_at,
+            Videos.name.label("video_name"),
+            Videos.link.label("video_link"),
+            Videos.articles.label("video_articles"),
+        )
+        .join(VideoHistory.video)
+        .join(Videos.channel)
+    )
 
+    if id is not None:
+        query = query.where(VideoHistory.id == id)
 
-class VideoHistoryRepository:
-    """Репозиторий для работы с историей видео."""
-    def __init__(self, db: AsyncSession):
-        """Инициализируем репозиторий."""
-        self.db = db
+    if video_id is not None:
+        query = query.where(VideoHistory.video_id == video_id)
 
-    async def get_filtered(
-        self,
-        id: Optional[int] = None,
-        date_to: Optional[datetime] = None,
-        date_from: Optional[datetime] = None,
-        video_id: Optional[int] = None,
-        channel_id: Optional[int] = None,
-        channel_type: Optional[str] = None,
-        user_id: Optional[int] = None,
-        user_ids: Optional[List[int]] = None,
-        articles: Optional[List[str]] = None,
-        date_published_to: Optional[datetime] = None,
-        date_published_from: Optional[datetime] = None,
-    ):
-        """Получаем историю видео с фильтрацией."""
-        query = (
-            select(VideoHistory)
-            .options(selectinload(VideoHistory.video))
-            .join(VideoHistory.video)
-            .join(Videos.channel)
-        )
+    if date_to is not None:
+        query = query.where(VideoHistory.created_at <= date_to)
+
+    if date_from is not None:
+        query = query.where(VideoHistory.created_at >= date_from)
 
-        if id is not None:
-            query = query.where(VideoHistory.id == id)
+    if articles is not None and len(articles) > 0:
+        query = query.where(articles_filter(articles))
 
-        if video_id is not None:
-            query = query.where(VideoHistory.video_id == video_id)
+    effective_user_ids = user_ids or ([user_id] if user_id is not None else None)
+    if effective_user_ids:
+        query = query.where(Channel.user_id.in_(effective_user_ids))
 
-        if date_to is not None:
-            query = query.where(VideoHistory.created_at <= date_to)
+    if channel_id is not None:
+        query = query.where(Videos.channel_id == channel_id)
 
-        if date_from is not None:
-            query = query.where(VideoHistory.created_at >= date_from)
+    if channel_type is not None:
+        query = query.where(Channel.type == channel_type)
 
-        if articles is not None and len(articles) > 0:
-            query = query.where(or_(*[Videos.articles.contains(tag) for tag in articles]))
+    if date_published_to is not None:
+        query = query.where(
+            VideoHistory.date_published <= date_published_to)
 
-        effective_user_ids = user_ids or ([user_id] if user_id is not None else None)
-        if effective_user_ids:
-            query = query.where(Channel.user_id.in_(effective_user_ids))
+    if date_published_from is not None:
+        query = query.where(
+            VideoHistory.date_published >= date_published_from)
 
-        if channel_id is not None:
-            query = query.where(Videos.channel_id == channel_id)
+    return query
 
-        if channel_type is not None:
-            query = query.where(Channel.type == channel_type)
 
-        if date_published_to is not None:
-            query = query.where(
-                VideoHistory.date_published <= date_published_to)
+class VideoHistoryRepository:
+    """Репозиторий для работы с историей видео."""
+    def __init__(self, db: AsyncSession):
+        """Инициализируем репозиторий."""
+        self.db = db
 
-        if date_published_from is not None:
-            query = query.where(
-                VideoHistory.date_published >= date_published_from)
+    async def get_filtered(self, **filters) -> list[dict]:
+        """Получаем историю видео с фильтрацией."""
+        result = await self.db.execute(history_rows_query(**filters))
+        return [dict(row) for row in result.mappings().all()]
 
-        result = await self.db.scalars(query)
-        return result.all()
+    async def get_filtered_page(
+        self,
+        after: Optional[str] = None,
+        size: Optional[int] = None,
+        count: PaginationCount = PaginationCount.NONE,
+        **filters,
+    ) -> dict:
+        """Получаем страницу истории видео по курсору (created_at, id)."""
+        items, pagination = await paginate_by_cursor(
+            self.db, history_rows_query(**filters), VideoHistory, after, size, count
+        )
+        return {"items": items, "pagination": pagination}
+
+    async def stream_filtered(
+        self, fetch_size: int = 1000, **filters
+    ) -> AsyncIterator[dict]:
+        """Отдаём историю видео построчно через серверный курсор."""
+        query = history_rows_query(**filters).order_by(
+            VideoHistory.created_at, VideoHistory.id
+        ).execution_options(yield_per=fetch_size)
+        result = await self.db.stream(query)
+        async for row in result.mappings():
+            yield dict(row)
 
     async def get_by_date_to(self, date_to: datetime) -> list[VideoHistory]:
         """Получаем историю видео по дате до."""
@@ -159,10 +322,152 @@ class VideoHistoryRepository:
 
         history = VideoHistory(**dto.model_dump(exclude_none=True))
         self.db.add(history)
+        await self.upsert_daily_stats([dto.model_dump()])
         await self.db.commit()
         await self.db.refresh(history)
         return history
 
+    async def bulk_create(self, rows: List[dict]) -> None:
+        """
+        Вставляем пачку снимков метрик без коммита.
+        На asyncpg — через COPY в текущей транзакции сессии,
+        на остальных драйверах — одним executemany INSERT.
+        """
+        if not rows:
+            return
+
+        conn = await self.db.connection()
+        if conn.dialect.driver != "asyncpg":
+            await self.db.execute(insert(VideoHistory), rows)
+            return
+
+        # Гарантируем, что транзакция сессии открыта до COPY
+        # (иначе asyncpg выполнит его в автокоммите)
+        await conn.exec_driver_sql("SELECT 1")
+        # COPY не подставляет server_default для переданных колонок
+        now = datetime.now(timezone.utc)
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            VideoHistory.__tablename__,
+            records=[
+                tuple(
+                    row.get(column) if column != "created_at"
+                    else row.get(column) or now
+                    for column in SNAPSHOT_COPY_COLUMNS
+                )
+                for row in rows
+            ],
+            columns=SNAPSHOT_COPY_COLUMNS,
+        )
+
+    async def store_snapshots(self, rows: List[dict], change_only: bool = True) -> int:
+        """
+        Записываем снимки метрик без коммита.
+        При change_only снимок, совпадающий с последним снимком видео, только
+        продлевает его last_confirmed_at. Возвращаем число вставленных строк.
+        """
+        if not rows:
+            return 0
+
+        # Парсеры присылают наивное время снимка, а из БД приходит aware:
+        # без приведения к UTC сортировка и сравнение падают с TypeError
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row["created_at"] = _as_utc(row.get("created_at") or now)
+
+        # Сводка обновляется каждым снимком, в том числе неизменившимся
+        await self.upsert_daily_stats(rows)
+        if not change_only:
+            await self.bulk_create(rows)
+            return len(rows)
+
+        video_ids = {row["video_id"] for row in rows}
+        earliest = min(row["created_at"] for row in rows)
+        result = await self.db.execute(
+            select(
+                VideoHistory.id,
+                VideoHistory.video_id,
+                VideoHistory.amount_views,
+                VideoHistory.amount_likes,
+                VideoHistory.amount_comments,
+                VideoHistory.created_at,
+                VideoHistory.last_confirmed_at,
+            )
+            .where(
+                VideoHistory.video_id.in_(video_ids),
+                VideoHistory.created_at >= _month_start(earliest),
+            )
+            .distinct(VideoHistory.video_id)
+            .order_by(
+                VideoHistory.video_id,
+                VideoHistory.created_at.desc(),
+                VideoHistory.id.desc(),
+            )
+        )
+        latest = {item.video_id: dict(item._mapping) for item in result}
+        to_insert, confirmed = _plan_snapshots(rows, latest)
+
+        if confirmed:
+            conn = await self.db.connection()
+            await conn.execute(
+                update(VideoHistory.__table__)
+                .where(VideoHistory.__table__.c.id == bindparam("b_id"))
+                .values(
+                    last_confirmed_at=func.greatest(
+                        func.coalesce(
+                            VideoHistory.__table__.c.last_confirmed_at,
+                            VideoHistory.__table__.c.created_at,
+                        ),
+                        bindparam("b_confirmed_at"),
+                    )
+                ),
+                [
+                    {"b_id": history_id, "b_confirmed_at": confirmed_at}
+                    for history_id, confirmed_at in confirmed.items()
+                ],
+            )
+
+        await self.bulk_create(to_insert)
+        return len(to_insert)
+
+    async def upsert_daily_stats(self, rows: List[dict]) -> None:
+        """Обновляем дневной максимум метрик видео по пачке снимков без коммита."""
+        daily: dict[tuple, dict] = {}
+        for row in rows:
+            created_at = row.get("created_at") or datetime.now(timezone.utc)
+            key = (row["video_id"], _as_utc(created_at).date())
+            current = daily.setdefault(key, {
+                "video_id": key[0],
+                "day": key[1],
+                "views": 0,
+                "likes": 0,
+                "comments": 0,
+                "date_published": None,
+            })
+            current["views"] = max(current["views"], row.get("amount_views") or 0)
+            current["likes"] = max(current["likes"], row.get("amount_likes") or 0)
+            current["comments"] = max(current["comments"], row.get("amount_comments") or 0)
+            current["date_published"] = row.get("date_published") or current["date_published"]
+
+        if not daily:
+            return
+
+        stmt = pg_insert(VideoDailyStats).values(list(daily.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VideoDailyStats.video_id, VideoDailyStats.day],
+            set_={
+                "views": func.greatest(VideoDailyStats.views, stmt.excluded.views),
+                "likes": func.greatest(VideoDailyStats.likes, stmt.excluded.likes),
+                "comments": func.greatest(VideoDailyStats.comments, stmt.excluded.comments),
+                "date_published": func.coalesce(
+                    stmt.excluded.date_published, VideoDailyStats.date_published
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+        await publish_stats_changed(self.db, {key[0] for key in daily})
+
     async def delete(self, video_history_id: int):
         """Удаляем историю видео."""
         video_history = await self.get_by_id(video_history_id)
@@ -192,55 +497,39 @@ class VideoHistoryRepository:
         """Получаем агрегированную статистику просмотров по дате и артиклю."""
         query = (
             select(
-                func.date(VideoHistory.created_at).label("view_date"),
+                VideoDailyStats.day.label("view_date"),
                 Videos.articles.label("articles"),
                 Videos.name.label("video_name"),
-                func.max(VideoHistory.amount_views).label("max_views"),
-                func.max(VideoHistory.amount_likes).label("max_likes"),
-                func.max(VideoHistory.amount_comments).label("max_comments"),
+                func.max(VideoDailyStats.views).label("max_views"),
+                func.max(VideoDailyStats.likes).label("max_likes"),
+                func.max(VideoDailyStats.comments).label("max_comments"),
             )
-            .join(VideoHistory.video)
+            .select_from(VideoDailyStats)
+            .join(Videos, VideoDailyStats.video_id == Videos.id)
             .join(Videos.channel)
             .where(Videos.articles.is_not(None))
         )
-
-        if id is not None:
-            query = query.where(VideoHistory.id == id)
-
-        if video_id is not None:
-            query = query.where(VideoHistory.video_id == video_id)
-
-        if date_to is not None:
-            query = query.where(VideoHistory.created_at <= date_to + timedelta(days=1))
-
-        if date_from is not None:
-            query = query.where(VideoHistory.created_at >= date_from)
-
-        if date_published_to is not None:
-            query = query.where(VideoHistory.date_published <= date_published_to)
-
-        if date_published_from is not None:
-            query = query.where(VideoHistory.date_published >= date_published_from)
-
-        effective_user_ids = user_ids or ([user_id] if user_id is not None else None)
-        if effective_user_ids:
-            query = query.where(Channel.user_id.in_(effective_user_ids))
-
-        if channel_id is not None:
-            query = query.where(Videos.channel_id == channel_id)
-
-        if channel_type is not None:
-            query = query.where(Channel.type == channel_type)
+        query = filter_daily_stats(
+            query,
+            id=id,
+            date_to=date_to,
+            date_from=date_from,
+            video_id=video_id,
+            channel_id=channel_id,
+            channel_type=channel_type,
+            date_published_to=date_published_to,
+            date_published_from=date_published_from,
+            user_ids=user_ids or ([user_id] if user_id is not None else None),
+        )
 
         if articles:
-            query = query.where(or_(*[Videos.articles.like(f"%{a}%") for a in articles]))
+            query = query.where(articles_filter(articles))
 
-        query = query.group_by(func.date(VideoHistory.created_at), Videos.articles, Videos.name)
-        query = query.order_by(func.date(VideoHistory.created_at))
+        query = query.group_by(VideoDailyStats.day, Videos.articles, Videos.name)
+        query = query.order_by(VideoDailyStats.day)
 
         result = await self.db.execute(query)
         rows = result.all()
-        print(f"Это ровсы: {rows}")
 
         return [
             {
@@ -269,79 +558,33 @@ class VideoHistoryRepository:
         articles: Optional[List[str]] = None,
     ):
         """Получаем агрегированную статистику просмотров по всем пользователям."""
-        view_date_expr = func.date(VideoHistory.created_at)
-        daily_max_query = (
+        query = (
             select(
-                VideoHistory.video_id.label("video_id"),
-                view_date_expr.label("view_date"),
-                func.max(VideoHistory.amount_views).label("max_views"),
-                func.max(VideoHistory.amount_likes).label("max_likes"),
-                func.max(VideoHistory.amount_comments).label("max_comments"),
+                VideoDailyStats.day.label("view_date"),
+                func.sum(VideoDailyStats.views).label("total_views"),
+                func.sum(VideoDailyStats.likes).label("total_likes"),
+                func.sum(VideoDailyStats.comments).label("total_comments"),
             )
-            .select_from(VideoHistory)
-            .join(VideoHistory.video)
+            .select_from(VideoDailyStats)
+            .join(Videos, VideoDailyStats.video_id == Videos.id)
             .join(Videos.channel)
         )
-
-        if id is not None:
-            daily_max_query = daily_max_query.where(VideoHistory.id == id)
-
-        if video_id is not None:
-            daily_max_query = daily_max_query.where(VideoHistory.video_id == video_id)
-
-        if date_to is not None:
-            daily_max_query = daily_max_query.where(
-                VideoHistory.created_at < date_to + timedelta(days=1)
-            )
-
-        if date_from is not None:
-            daily_max_query = daily_max_query.where(VideoHistory.created_at >= date_from)
-
-        if date_published_to is not None:
-            daily_max_query = daily_max_query.where(
-                VideoHistory.date_published <= date_published_to
-            )
-
-        if date_published_from is not None:
-            daily_max_query = daily_max_query.where(
-                VideoHistory.date_published >= date_published_from
-            )
-
-        effective_user_ids = user_ids or ([user_id] if user_id is not None else None)
-        if effective_user_ids:
-            daily_max_query = daily_max_query.where(Channel.user_id.in_(effective_user_ids))
-
-        if channel_id is not None:
-            daily_max_query = daily_max_query.where(Videos.channel_id == channel_id)
-
-        if channel_type is not None:
-            daily_max_query = daily_max_query.where(Channel.type == channel_type)
-
-        if articles is not None and len(articles) > 0:
-            daily_max_query = daily_max_query.where(
-                or_(*[Videos.articles.contains(tag) for tag in articles])
-            )
-
-        daily_max_query = daily_max_query.group_by(
-            VideoHistory.video_id,
-            view_date_expr,
-        )
-
-        daily_max_subquery = daily_max_query.subquery()
-
-        aggregated_query = (
-            select(
-                daily_max_subquery.c.view_date,
-                func.sum(daily_max_subquery.c.max_views).label("total_views"),
-                func.sum(daily_max_subquery.c.max_likes).label("total_likes"),
-                func.sum(daily_max_subquery.c.max_comments).label("total_comments"),
-            )
-            .select_from(daily_max_subquery)
-            .group_by(daily_max_subquery.c.view_date)
-            .order_by(daily_max_subquery.c.view_date)
+        query = filter_daily_stats(
+            query,
+            id=id,
+            date_to=date_to,
+            date_from=date_from,
+            video_id=video_id,
+            channel_id=channel_id,
+            channel_type=channel_type,
+            date_published_to=date_published_to,
+            date_published_from=date_published_from,
+            user_ids=user_ids or ([user_id] if user_id is not None else None),
+            articles=articles,
         )
+        query = query.group_by(VideoDailyStats.day).order_by(VideoDailyStats.day)
 
-        result = await self.db.execute(aggregated_query)
+        result = await self.db.execute(query)
         rows = result.all()
 
         return [
@@ -2,13 +2,36 @@ from datetime import datetime
 from typing import Optional, List
 from app.schemas.videos import VideosCreate, VideosUpdate
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal_column, delete, exists, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import NoResultFound
 
 from app.models.channel import Channel
 from app.models.user import User, UserRole
 from app.models.videos import Videos, VideoType
+from app.models.videoarticle import VideoArticle
+from app.utils.data_version import bump_data_versions
+from app.utils.stats_cache import publish_scope_changed
+from app.utils.pagination import PaginationCount, paginate_by_cursor
+from app.utils.video_link import normalize_video_link
+
+
+def split_articles(articles) -> List[str]:
+    """Список артиклей из строки через запятую или списка."""
+    if not articles:
+        return []
+    if isinstance(articles, str):
+        articles = articles.split(",")
+    return sorted({article.strip() for article in articles if article and article.strip()})
+
+
+def articles_filter(articles):
+    """Условие «у видео есть хотя бы один из артиклей» по индексу video_articles."""
+    return exists().where(
+        VideoArticle.video_id == Videos.id,
+        VideoArticle.article.in_(split_articles(articles)),
+    )
 
 
 class VideosRepository:
@@ -27,7 +50,9 @@ class VideosRepository:
         link: Optional[str] = None,
         name: Optional[str] = None,
         page: Optional[int] = None,
-        size: Optional[int] = None
+        size: Optional[int] = None,
+        after: Optional[str] = None,
+        count: PaginationCount = PaginationCount.NONE,
     ) -> dict:
         """Получаем все видео с фильтрацией и пагинацией."""
         query = select(Videos).order_by(Videos.created_at.desc())
@@ -40,7 +65,7 @@ class VideosRepository:
         if type is not None:
             query = query.filter(Videos.type == type)
         if articles is not None:
-            query = query.filter(Videos.articles.contains(articles))
+            query = query.filter(articles_filter(articles))
         if link is not None:
             query = query.filter(Videos.link.ilike(f"%{link}%"))
         if name is not None:
@@ -50,6 +75,12 @@ class VideosRepository:
 
         query = query.order_by(Videos.created_at.desc())
 
+        if after is not None:
+            videos, pagination = await paginate_by_cursor(
+                self.db, query, Videos, after, size, count
+            )
+            return {"videos": videos, "pagination": pagination}
+
         if page is not None and size is not None:
             offset = (page - 1) * size
             count_query = select(func.count()).select_from(query.subquery())
@@ -112,13 +143,118 @@ class VideosRepository:
         """
         Проверить существование видео по ссылке.
         """
-        query = select(Videos).where(Videos.link == link)
+        query = select(Videos).where(
+            Videos.link_normalized == normalize_video_link(link)
+        )
         result = await self.db.execute(query)
         try:
             return result.scalar_one_or_none()
         except NoResultFound:
             return None
 
+    @staticmethod
+    def _upsert_statement(rows: List[dict]):
+        """
+        INSERT ... ON CONFLICT (link_normalized) DO UPDATE.
+        Пустые name/image/articles не затирают уже сохранённые значения.
+        """
+        stmt = pg_insert(Videos).values(rows)
+        excluded = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[Videos.link_normalized],
+            set_={
+                "type": excluded.type,
+                "name": func.coalesce(excluded.name, Videos.name),
+                "image": func.coalesce(excluded.image, Videos.image),
+                "articles": func.coalesce(excluded.articles, Videos.articles),
+                "updated_at": func.now(),
+            },
+        )
+
+    async def upsert(self, row: dict) -> Videos:
+        """Создаем или обновляем видео по нормализованной ссылке без коммита."""
+        stmt = (
+            self._upsert_statement([row])
+            .returning(Videos)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(stmt)
+        video = result.scalar_one()
+        if row.get("articles") is not None:
+            await self.sync_articles({video.id: row["articles"]})
+            await publish_scope_changed(self.db, channel_ids=[row["channel_id"]])
+        else:
+            await bump_data_versions(self.db, channel_ids=[row["channel_id"]])
+        return video
+
+    async def upsert_many(self, rows: List[dict]) -> dict[str, tuple[int, bool]]:
+        """
+        Пакетно создаем/обновляем видео одним запросом без коммита.
+        Возвращает соответствие нормализованная ссылка -> (ID, создано ли видео).
+        """
+        if not rows:
+            return {}
+        stmt = self._upsert_statement(rows).returning(
+            Videos.id,
+            Videos.link_normalized,
+            # xmax = 0 только у строк, вставленных этим запросом
+            (literal_column("xmax") == 0).label("inserted"),
+        )
+        result = await self.db.execute(stmt)
+        upserted = {
+            row.link_normalized: (row.id, bool(row.inserted))
+            for row in result.all()
+        }
+        await self.sync_articles({
+            upserted[row["link_normalized"]][0]: row["articles"]
+            for row in rows
+            if row.get("articles") is not None
+        })
+        # Артикли могли смениться — агрегаты по артиклям этих каналов устарели
+        with_articles = {row["channel_id"] for row in rows if row.get("articles") is not None}
+        await publish_scope_changed(self.db, channel_ids=with_articles)
+        await bump_data_versions(
+            self.db, channel_ids={row["channel_id"] for row in rows} - with_articles
+        )
+        return upserted
+
+    async def sync_articles(self, articles_by_video: dict) -> None:
+        """Синхронизируем video_articles с артиклями видео без коммита."""
+        if not articles_by_video:
+            return
+        await self.db.execute(
+            delete(VideoArticle).where(
+                VideoArticle.video_id.in_(list(articles_by_video))
+            )
+        )
+        links = [
+            {"video_id": video_id, "article": article}
+            for video_id, articles in articles_by_video.items()
+            for article in split_articles(articles)
+        ]
+        if links:
+            await self.db.execute(insert(VideoArticle), links)
+
+    async def get_distinct_articles(
+        self,
+        user_ids: Optional[List[int]] = None,
+        prefix: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[str]:
+        """Получаем уникальные артикли для автодополнения."""
+        query = select(VideoArticle.article).distinct()
+        if user_ids:
+            query = (
+                query.join(Videos, VideoArticle.video_id == Videos.id)
+                .join(Channel, Videos.channel_id == Channel.id)
+                .where(Channel.user_id.in_(user_ids))
+            )
+        if prefix:
+            query = query.where(VideoArticle.article.startswith(prefix, autoescape=True))
+        query = query.order_by(VideoArticle.article).limit(limit)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
     async def create(self, dto: VideosCreate) -> Videos:
         """Создаем видео."""
         channel = await self.db.get(Channel, dto.channel_id)
@@ -138,6 +274,9 @@ class VideosRepository:
         else:
             video.articles = None
         self.db.add(video)
+        await self.db.flush()
+        await self.sync_articles({video.id: dto.articles or []})
+        await bump_data_versions(self.db, channel_ids=[video.channel_id])
         await self.db.commit()
         await self.db.refresh(video)
         return video
@@ -162,9 +301,14 @@ class VideosRepository:
             video.image = dto.image
         if dto.articles is not None:
             video.articles = ",".join(sorted(set(dto.articles))) if dto.articles else None
+            await self.sync_articles({video.id: dto.articles})
 
         video.updated_at = func.now()
 
+        if dto.articles is not None:
+            await publish_scope_changed(self.db, channel_ids=[video.channel_id])
+        else:
+            await bump_data_versions(self.db, channel_ids=[video.channel_id])
         await self.db.commit()
         await self.db.refresh(video)
         return video
@@ -178,6 +322,7 @@ class VideosRepository:
         if not video:
             return False
 
+        await publish_scope_changed(self.db, channel_ids=[video.channel_id])
         await self.db.delete(video)
         await self.db.commit()
         return True
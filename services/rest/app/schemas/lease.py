@@ -0,0 +1,63 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProxyPool(str, Enum):
+    """Пул прокси."""
+    GENERIC = "generic" # Общие прокси (YouTube, TikTok, Instagram)
+    LIKEE = "likee" # Прокси для Likee
+
+
+class AccountPool(str, Enum):
+    """Пул аккаунтов."""
+    INSTAGRAM = "instagram" # Аккаунты Инстаграма
+
+
+class LeaseRequest(BaseModel):
+    """Запрос аренды ресурсов."""
+    count: int = Field(1, ge=1, le=100)
+    ttl_seconds: Optional[int] = Field(None, ge=1)
+    holder: Optional[str] = None
+
+
+class ProxyLeaseRequest(LeaseRequest):
+    """Запрос аренды прокси."""
+    pool: ProxyPool = ProxyPool.GENERIC
+
+
+class AccountLeaseRequest(LeaseRequest):
+    """Запрос аренды аккаунтов."""
+    pool: AccountPool = AccountPool.INSTAGRAM
+
+
+class LeaseRenewRequest(BaseModel):
+    """Продление аренды."""
+    ttl_seconds: Optional[int] = Field(None, ge=1)
+
+
+class LeasedResource(BaseModel):
+    """Арендованный ресурс."""
+    id: int
+    value: str
+
+
+class LeaseRead(BaseModel):
+    """Выданная аренда; свободных ресурсов может оказаться меньше запрошенного."""
+    lease_id: Optional[str]
+    expires_at: Optional[datetime]
+    items: list[LeasedResource]
+
+
+class LeaseRenewRead(BaseModel):
+    """Продлённая аренда."""
+    lease_id: str
+    expires_at: datetime
+    renewed: int
+
+
+class LeaseReleaseRead(BaseModel):
+    """Освобождённая аренда."""
+    released: int
@@ -42,3 +42,38 @@ class VideoFilter(BaseModel):
     link: Optional[str] = None
     name: Optional[str] = None
     articles: Optional[List[str]] = None
+
+
+class VideosBulkItem(BaseModel):
+    """Видео в пакетной загрузке результатов парсинга."""
+    type: VideoType
+    link: str
+    name: Optional[str] = None
+    image: Optional[str] = None
+    articles: Optional[List[str]] = None
+    amount_views: int = 0
+    amount_likes: int = 0
+    amount_comments: int = 0
+    date_published: Optional[datetime] = None
+    history_created_at: Optional[datetime] = None
+
+
+class VideosBulkCreate(BaseModel):
+    """Пакетная загрузка видео канала вместе со снимками метрик."""
+    channel_id: int
+    videos: List[VideosBulkItem]
+
+
+class VideosBulkItemResult(BaseModel):
+    """Результат обработки одного видео из пакета."""
+    link: str
+    id: Optional[int] = None
+    status: str  # created / updated / duplicate
+
+
+class VideosBulkResult(BaseModel):
+    """Результат пакетной загрузки."""
+    channel_id: int
+    created: int
+    updated: int
+    items: List[VideosBulkItemResult]
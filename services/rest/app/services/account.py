@@ -1,9 +1,14 @@
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.account import AccountRepository
 from app.schemas.account import (AccountBulkCreateRequest, AccountCreate,
                                  AccountUpdate)
+from app.schemas.lease import (AccountLeaseRequest, LeasedResource, LeaseRead,
+                              LeaseReleaseRead, LeaseRenewRead, LeaseRenewRequest)
 from app.utils.account import parse_account_lines
+from app.utils.dispatch_snapshot import dispatch_snapshot_cache
+from app.utils.resource_lease import lease_ttl
 
 
 class AccountService:
@@ -26,7 +31,9 @@ class AccountService:
 
     async def create_account(self, account_create: AccountCreate):
         """Создаем аккаунт."""
-        return await self.repo.create(account_create)
+        result = await self.repo.create(account_create)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def bulk_create_accounts(self, payload: AccountBulkCreateRequest):
         """Создаем множество аккаунтов и списка разделенных по .""" # Разделитель \n
@@ -34,12 +41,42 @@ class AccountService:
         account_models = [AccountCreate(account_str=account) for account in accounts]
         if not account_models:
             return []
-        return await self.repo.create_many(account_models)
+        result = await self.repo.create_many(account_models)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def update_account(self, id: int, account_update: AccountUpdate):
         """Обновляем аккаунт."""
-        return await self.repo.update_account(id, account_update)
+        result = await self.repo.update_account(id, account_update)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def delete_account(self, account_id: int):
         """Удаляем аккаунт."""
-        return await self.repo.delete(account_id)
+        result = await self.repo.delete(account_id)
+        dispatch_snapshot_cache.invalidate()
+        return result
+
+    async def lease(self, dto: AccountLeaseRequest) -> LeaseRead:
+        """Арендуем свободные аккаунты на срок dto.ttl_seconds."""
+        grant = await self.repo.lease(dto.count, lease_ttl(dto.ttl_seconds), dto.holder)
+        await self.repo.db.commit()
+        return LeaseRead(
+            lease_id=grant.lease_id,
+            expires_at=grant.expires_at,
+            items=[LeasedResource(id=item_id, value=value) for item_id, value in grant.items],
+        )
+
+    async def renew_lease(self, lease_id: str, dto: LeaseRenewRequest) -> LeaseRenewRead:
+        """Продлеваем аренду аккаунтов."""
+        renewed, expires_at = await self.repo.renew_lease(lease_id, lease_ttl(dto.ttl_seconds))
+        if not renewed:
+            raise HTTPException(status_code=404, detail="Аренда не найдена")
+        await self.repo.db.commit()
+        return LeaseRenewRead(lease_id=lease_id, expires_at=expires_at, renewed=renewed)
+
+    async def release_lease(self, lease_id: str) -> LeaseReleaseRead:
+        """Возвращаем арендованные аккаунты."""
+        released = await self.repo.release_lease(lease_id)
+        await self.repo.db.commit()
+        return LeaseReleaseRead(released=released)
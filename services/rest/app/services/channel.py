@@ -1,6 +1,3 @@
-from datetime import datetime, timezone
-
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
@@ -8,10 +5,13 @@ from app.repositories.channel import ChannelRepository
 from app.schemas.channel import ChannelCreate, ChannelUpdate
 from app.models.user import User, UserRole
 from app.models.channel import ChannelType, Channel
-from app.models.account import Account
-from app.models.proxy import Proxy
+from app.utils.dispatch_snapshot import dispatch_snapshot_cache
 from app.utils.rabbitmq_producer import rabbit_producer
-from app.utils.scheduler import schedule_channel_task
+from app.utils.scheduler import (
+    allocate_channel_offset,
+    dispatch_channel_now,
+)
+from app.utils.pagination import PaginationCount
 from fastapi import HTTPException
 
 
@@ -30,11 +30,14 @@ class ChannelService:
         link: Optional[str] = None,
         name_channel: Optional[str] = None,
         page: Optional[int] = None,
-        size: Optional[int] = None
+        size: Optional[int] = None,
+        after: Optional[str] = None,
+        count: PaginationCount = PaginationCount.NONE,
     ):
         """Получаем все каналы с фильтрацией и пагинацией."""
         return await self.repo.get_all_filtered_paginated(
-            user, user_id, id, type, link, name_channel, page, size
+            user, user_id, id, type, link, name_channel, page, size,
+            after=after, count=count
         )
 
     async def get_by_id(self, channel_id: int, user: User):
@@ -60,24 +63,6 @@ class ChannelService:
         """Получаем канал по ссылке."""
         return await self.repo.get_by_link(link)
 
-    async def _calculate_offset_for_channel(self, channel_id: int) -> int:
-        """Рассчитываем смещение для канала."""
-        result = await self.repo.db.execute(select(Channel))
-        channels = result.scalars().all()
-        channels = sorted(
-            channels,
-            key=lambda ch: (
-                ch.created_at or datetime.min.replace(tzinfo=timezone.utc),
-                ch.id,
-            ),
-        )
-        channel_ids = [ch.id for ch in channels]
-        try:
-            position = channel_ids.index(channel_id)
-        except ValueError:
-            position = len(channel_ids) - 1
-        return position * 5
-
     async def create(self, dto: ChannelCreate, user: User):
         """Создаем канал."""
         existing_channel = await self.repo.get_by_link(str(dto.link))
@@ -88,35 +73,21 @@ class ChannelService:
             raise ValueError("Ошибка при создании канала")
 
         type_channel = dto.type
-        offset = await self._calculate_offset_for_channel(new_channel.id)
-        immediate_dispatched = schedule_channel_task(
-            new_channel.id,
-            run_immediately=True,
-            offset_minutes=offset,
-        )
+        offset = await allocate_channel_offset(self.repo.db, new_channel)
+        immediate_dispatched = dispatch_channel_now(new_channel.id, offset)
         if immediate_dispatched:
             return new_channel
 
-        proxies_from_db = await self.repo.db.execute(select(Proxy))
-        proxies = proxies_from_db.scalars().all()
-        likee_proxies = [p.proxy_str for p in proxies if p.for_likee is True]
-        proxies_for_send = [p.proxy_str for p in proxies if p.for_likee is not True]
-
-        accounts_from_db = await self.repo.db.execute(select(Account))
-        accounts = accounts_from_db.scalars().all()
-        accounts_for_send = [account.account_str for account in accounts]
+        snapshot = await dispatch_snapshot_cache.for_tasks(self.repo.db)
 
-        proxy_payload = likee_proxies if type_channel == ChannelType.LIKEE else proxies_for_send
-
-        rabbit_producer.send_task(
+        await rabbit_producer.send_task(
             f"parsing_{dto.type.value}",
             {
                 "type": "channel",
                 "user_id": user.id,
                 "url": new_channel.link,
                 "channel_id": new_channel.id,
-                "accounts": accounts_for_send,
-                "proxy_list": proxy_payload
+                **snapshot.task_resources(type_channel),
             }
         )
 
@@ -137,35 +108,21 @@ class ChannelService:
             raise ValueError("Ошибка при создании канала")
 
         type_channel = dto.type
-        offset = await self._calculate_offset_for_channel(new_channel.id)
-        immediate_dispatched = schedule_channel_task(
-            new_channel.id,
-            run_immediately=True,
-            offset_minutes=offset,
-        )
+        offset = await allocate_channel_offset(self.repo.db, new_channel)
+        immediate_dispatched = dispatch_channel_now(new_channel.id, offset)
         if immediate_dispatched:
             return new_channel
 
-        proxies_from_db = await self.repo.db.execute(select(Proxy))
-        proxies = proxies_from_db.scalars().all()
-        likee_proxies = [p.proxy_str for p in proxies if p.for_likee is True]
-        proxies_for_send = [p.proxy_str for p in proxies if p.for_likee is not True]
-
-        accounts_from_db = await self.repo.db.execute(select(Account))
-        accounts = accounts_from_db.scalars().all()
-        accounts_for_send = [account.account_str for account in accounts]
-
-        proxy_payload = likee_proxies if type_channel == ChannelType.LIKEE else proxies_for_send
+        snapshot = await dispatch_snapshot_cache.for_tasks(self.repo.db)
 
-        rabbit_producer.send_task(
+        await rabbit_producer.send_task(
             f"parsing_{dto.type.value}",
             {
                 "type": "channel",
                 "user_id": target_user_id,
                 "url": new_channel.link,
                 "channel_id": new_channel.id,
-                "accounts": accounts_for_send,
-                "proxy_list": proxy_payload
+                **snapshot.task_resources(type_channel),
             }
         )
 
@@ -183,7 +140,11 @@ class ChannelService:
                 detail="Недостаточно прав для изменения этого канала"
             )
 
-        return await self.repo.update(channel_id, dto)
+        previous = (channel.type, channel.schedule_offset_minutes)
+        updated = await self.repo.update(channel_id, dto)
+        if updated and updated.type != previous[0]:
+            await allocate_channel_offset(self.repo.db, updated, previous)
+        return updated
 
     async def delete(self, channel_id: int, user: User):
         """Удаляем канал."""
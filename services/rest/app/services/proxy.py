@@ -1,8 +1,13 @@
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.proxy import ProxyRepository
+from app.schemas.lease import (ProxyLeaseRequest, LeasedResource, LeaseRead,
+                              LeaseReleaseRead, LeaseRenewRead, LeaseRenewRequest)
 from app.schemas.proxy import ProxyBulkCreateRequest, ProxyCreate, ProxyUpdate
+from app.utils.dispatch_snapshot import dispatch_snapshot_cache
 from app.utils.proxy import parse_proxy_lines
+from app.utils.resource_lease import lease_ttl
 
 
 class ProxyService:
@@ -21,15 +26,21 @@ class ProxyService:
 
     async def create_proxy(self, proxy_create: ProxyCreate):
         """Создаем прокси."""
-        return await self.repo.create(proxy_create)
+        result = await self.repo.create(proxy_create)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def update_proxy(self, id: int, proxy_update: ProxyUpdate):
         """Обновляем прокси."""
-        return await self.repo.update_proxy(id, proxy_update)
+        result = await self.repo.update_proxy(id, proxy_update)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def delete_proxy(self, proxy_id: int):
         """Удаляем прокси."""
-        return await self.repo.delete(proxy_id)
+        result = await self.repo.delete(proxy_id)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def bulk_create_proxies(self, payload: ProxyBulkCreateRequest):
         """Создаем множество прокси и списка разделенных по .""" # Разделитель \n
@@ -38,8 +49,36 @@ class ProxyService:
                         for proxy in proxies]
         if not proxy_models:
             return []
-        return await self.repo.create_many(proxy_models)
+        result = await self.repo.create_many(proxy_models)
+        dispatch_snapshot_cache.invalidate()
+        return result
 
     async def delete_all_proxies(self):
         """Удаляем все прокси."""
-        return await self.repo.delete_all()
+        result = await self.repo.delete_all()
+        dispatch_snapshot_cache.invalidate()
+        return result
+
+    async def lease(self, dto: ProxyLeaseRequest) -> LeaseRead:
+        """Арендуем свободные прокси пула на срок dto.ttl_seconds."""
+        grant = await self.repo.lease(dto.pool, dto.count, lease_ttl(dto.ttl_seconds), dto.holder)
+        await self.repo.db.commit()
+        return LeaseRead(
+            lease_id=grant.lease_id,
+            expires_at=grant.expires_at,
+            items=[LeasedResource(id=item_id, value=value) for item_id, value in grant.items],
+        )
+
+    async def renew_lease(self, lease_id: str, dto: LeaseRenewRequest) -> LeaseRenewRead:
+        """Продлеваем аренду прокси."""
+        renewed, expires_at = await self.repo.renew_lease(lease_id, lease_ttl(dto.ttl_seconds))
+        if not renewed:
+            raise HTTPException(status_code=404, detail="Аренда не найдена")
+        await self.repo.db.commit()
+        return LeaseRenewRead(lease_id=lease_id, expires_at=expires_at, renewed=renewed)
+
+    async def release_lease(self, lease_id: str) -> LeaseReleaseRead:
+        """Возвращаем арендованные прокси."""
+        released = await self.repo.release_lease(lease_id)
+        await self.repo.db.commit()
+        return LeaseReleaseRead(released=released)
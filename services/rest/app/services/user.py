@@ -1,9 +1,12 @@
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from app.models.user import User, UserRole
 from app.schemas.user import UserUpdate
 from app.repositories.user import UserRepository
 from app.schemas.user import UserCreate, UserRead, UserRegister
+from app.utils.auth_cache import auth_cache
+from app.utils.pagination import PaginationCount
 
 
 class UserService:
@@ -12,9 +15,15 @@ class UserService:
         """Инициализируем сервис."""
         self.repo = UserRepository(db)
 
-    async def get_all_paginated(self, page: int = 1, size: int = 10):
+    async def get_all_paginated(
+        self,
+        page: int = 1,
+        size: int = 10,
+        after: Optional[str] = None,
+        count: PaginationCount = PaginationCount.NONE,
+    ):
         """Получаем всех пользователей с пагинацией."""
-        return await self.repo.get_all_paginated(page, size)
+        return await self.repo.get_all_paginated(page, size, after, count)
 
     async def search_users_by_name(self, name: str):
         """Поиск пользователей по имени"""
@@ -35,13 +44,17 @@ class UserService:
 
     async def delete_user(self, user_id: int):
         """Удаляем пользователя."""
-        return await self.repo.delete(user_id)
+        result = await self.repo.delete(user_id)
+        auth_cache.invalidate_user(user_id)
+        return result
 
     async def register_user(
         self, current_user: UserRead, user_register: UserRegister
     ):
         """Регистрация пользователя."""
-        return await self.repo.update_user(current_user.tg_id, user_register)
+        result = await self.repo.update_user(current_user.tg_id, user_register)
+        auth_cache.invalidate_user(current_user.id)
+        return result
 
     async def get_by_telegram_id(self, tg_id: int):
         """Получаем пользователя по telegram_id."""
@@ -63,7 +76,9 @@ class UserService:
                 detail="Недостаточно прав для изменения чужого профиля"
             )
 
-        return await self.repo.update_user_by_id(target_user_id, user_update)
+        result = await self.repo.update_user_by_id(target_user_id, user_update)
+        auth_cache.invalidate_user(target_user_id)
+        return result
 
     async def block_user(self, user_id: int) -> User:
         """Блокировка пользователя"""
@@ -73,6 +88,7 @@ class UserService:
 
         user.is_blocked = True
         await self.repo.db.commit()
+        auth_cache.invalidate_user(user_id)
         await self.repo.db.refresh(user)
         return user
 
@@ -84,6 +100,7 @@ class UserService:
 
         user.is_blocked = False
         await self.repo.db.commit()
+        auth_cache.invalidate_user(user_id)
         await self.repo.db.refresh(user)
         return user
 
@@ -92,7 +109,9 @@ class UserService:
         user_update: UserUpdate
     ):
         """Обновление своего собственного профиля"""
-        return await self.repo.update_user_by_id(current_user.id, user_update)
+        result = await self.repo.update_user_by_id(current_user.id, user_update)
+        auth_cache.invalidate_user(current_user.id)
+        return result
 
     async def get_by_id(self, user_id: int):
         """Получаем пользователя по id."""
@@ -103,4 +122,6 @@ class UserService:
 
     async def update_user_by_id(self, user_id: int, user_update: UserUpdate):
         """Обновление профиля пользователя по id"""
-        return await self.repo.update_user_by_id(user_id, user_update)
+        result = await self.repo.update_user_by_id(user_id, user_update)
+        auth_cache.invalidate_user(user_id)
+        return result
@@ -1,15 +1,37 @@
 from datetime import date as dt_date
-from datetime import timedelta, datetime
+from datetime import timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
-from app.repositories.videohistory import VideoHistoryRepository
+from typing import AsyncIterator, Optional, List
+from app.repositories.videohistory import VideoHistoryRepository, filter_daily_stats
+from app.repositories.videos import articles_filter
+from app.utils.history_writer import history_writer
+from app.utils.pagination import PaginationCount
+from app.utils.stats_cache import cache_tags, stats_cache
+from app.utils.streaming import ExportFormat, csv_chunks, ndjson_chunks
+from app.core.config import settings
+from app.core.db import SessionLocal
 from app.schemas.videohistory import VideoHistoryCreate, DailyVideoCount
 from app.models.videos import Videos
 from app.models.user import User, UserRole
 from app.models.channel import Channel, ChannelType
-from app.models.videohistory import VideoHistory
-from sqlalchemy import select, func, or_
-from sqlalchemy.orm import selectinload
+from app.models.videodailystats import VideoDailyStats
+from sqlalchemy import and_, select, func
+
+
+# Колонки потоковой выгрузки истории в CSV
+HISTORY_EXPORT_COLUMNS = (
+    "id",
+    "video_id",
+    "amount_views",
+    "amount_likes",
+    "amount_comments",
+    "date_published",
+    "created_at",
+    "updated_at",
+    "video_name",
+    "video_link",
+    "video_articles",
+)
 
 
 class VideoHistoryService:
@@ -47,6 +69,23 @@ class VideoHistoryService:
             return [user_id]
         return None
 
+    @staticmethod
+    def _format_history_row(item: dict) -> dict:
+        """Приводим строку истории к формату ответа."""
+        return {
+            "id": item["id"],
+            "video_id": item["video_id"],
+            "amount_views": item["amount_views"],
+            "amount_likes": item["amount_likes"],
+            "amount_comments": item["amount_comments"],
+            "date_published": item["date_published"].isoformat() if item["date_published"] else None,
+            "created_at": item["created_at"].isoformat() if item["created_at"] else None,
+            "updated_at": item["updated_at"].isoformat() if item["updated_at"] else None,
+            "video_name": item["video_name"],
+            "video_link": item["video_link"],
+            "video_articles": item["video_articles"],
+        }
+
     async def get_all_filtered(
         self,
         user: User,
@@ -61,14 +100,59 @@ class VideoHistoryService:
         date_published_to: Optional[dt_date] = None,
         date_published_from: Optional[dt_date] = None,
         video_id: Optional[int] = None,
+        after: Optional[str] = None,
+        size: Optional[int] = None,
+        count: PaginationCount = PaginationCount.NONE,
     ):
-        """Получаем все истории видео с фильтрацией."""
-        effective_user_ids = self._resolve_user_ids(user, user_id, user_ids)
-        records = await self.repo.get_filtered(
+        """Получаем все истории видео с фильтрацией; с after — страница по курсору."""
+        filters = dict(
             id=id,
             date_to=date_to,
             date_from=date_from,
-            user_ids=effective_user_ids,
+            user_ids=self._resolve_user_ids(user, user_id, user_ids),
+            channel_id=channel_id,
+            articles=articles,
+            channel_type=channel_type,
+            date_published_to=date_published_to,
+            date_published_from=date_published_from,
+            video_id=video_id,
+        )
+        if after is not None:
+            page = await self.repo.get_filtered_page(
+                after=after, size=size, count=count, **filters
+            )
+            page["items"] = [self._format_history_row(item) for item in page["items"]]
+            return page
+
+        records = await self.repo.get_filtered(**filters)
+        return [self._format_history_row(item) for item in records]
+
+    def export_filtered(
+        self,
+        user: User,
+        export_format: ExportFormat,
+        id: Optional[int] = None,
+        date_to: Optional[dt_date] = None,
+        date_from: Optional[dt_date] = None,
+        user_id: Optional[int] = None,
+        user_ids: Optional[List[int]] = None,
+        channel_id: Optional[int] = None,
+        articles: Optional[List[str]] = None,
+        channel_type: Optional[ChannelType] = None,
+        date_published_to: Optional[dt_date] = None,
+        date_published_from: Optional[dt_date] = None,
+        video_id: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Потоковая выгрузка истории видео в NDJSON/CSV.
+        Права проверяем сразу, а строки читаем уже во время отдачи ответа
+        в собственной сессии: сессия запроса к этому моменту закрыта.
+        """
+        filters = dict(
+            id=id,
+            date_to=date_to,
+            date_from=date_from,
+            user_ids=self._resolve_user_ids(user, user_id, user_ids),
             channel_id=channel_id,
             articles=articles,
             channel_type=channel_type,
@@ -76,24 +160,21 @@ class VideoHistoryService:
             date_published_from=date_published_from,
             video_id=video_id,
         )
-        formatted = []
-        for item in records:
-            video = getattr(item, "video", None)
-            payload = {
-                "id": item.id,
-                "video_id": item.video_id,
-                "amount_views": item.amount_views,
-                "amount_likes": item.amount_likes,
-                "amount_comments": item.amount_comments,
-                "date_published": item.date_published.isoformat() if item.date_published else None,
-                "created_at": item.created_at.isoformat() if getattr(item, "created_at", None) else None,
-                "updated_at": item.updated_at.isoformat() if getattr(item, "updated_at", None) else None,
-                "video_name": getattr(video, "name", None),
-                "video_link": getattr(video, "link", None) if video else None,
-                "video_articles": getattr(video, "articles", None) if video else None,
-            }
-            formatted.append(payload)
-        return formatted
+
+        async def rows():
+            async with SessionLocal() as db:
+                stream = VideoHistoryRepository(db).stream_filtered(
+                    fetch_size=settings.HISTORY_EXPORT_FETCH_SIZE, **filters
+                )
+                async for item in stream:
+                    yield self._format_history_row(item)
+
+        if export_format == ExportFormat.CSV:
+            async def csv_rows():
+                async for row in rows():
+                    yield [row[column] for column in HISTORY_EXPORT_COLUMNS]
+            return csv_chunks(HISTORY_EXPORT_COLUMNS, csv_rows())
+        return ndjson_chunks(rows())
 
     async def get_by_id(self, video_history_id: int, user: User):
         """Получаем историю видео по ID."""
@@ -111,6 +192,10 @@ class VideoHistoryService:
             raise ValueError("Ошибка при создании истории")
         return video_history
 
+    async def enqueue(self, dto: VideoHistoryCreate):
+        """Ставим снимок в write-behind буфер, запись — пачкой через COPY."""
+        await history_writer.add(dto.model_dump())
+
     async def get_aggregated_views_by_date_art(
         self,
         user: User,
@@ -124,7 +209,12 @@ class VideoHistoryService:
             filters.get("user_ids"),
         )
         filters.pop("user_id", None)
-        return await self.repo.get_aggregated_by_date_art(**filters)
+        return await stats_cache.get_or_load(
+            "by_date_art",
+            filters,
+            cache_tags(filters["user_ids"], filters.get("channel_id")),
+            lambda: self.repo.get_aggregated_by_date_art(**filters),
+        )
 
     async def get_aggregated_views_by_date_all(
         self,
@@ -139,9 +229,14 @@ class VideoHistoryService:
             filters.get("user_ids"),
         )
         filters.pop("user_id", None)
-        return await self.repo.get_aggregated_by_date_all(**filters)
+        return await stats_cache.get_or_load(
+            "by_date_all",
+            filters,
+            cache_tags(filters["user_ids"], filters.get("channel_id")),
+            lambda: self.repo.get_aggregated_by_date_all(**filters),
+        )
 
-    async def get_video_stats_for_csv(
+    def export_video_stats_csv(
         self,
         user: User,
         channel_type: Optional[ChannelType] = None,
@@ -149,68 +244,82 @@ class VideoHistoryService:
         target_user_ids: Optional[List[int]] = None,
         pub_date_from: Optional[dt_date] = None,
         pub_date_to: Optional[dt_date] = None,
-    ):
-        """Получаем статистику для CSV."""
-        query = (
-            select(Videos)
-            .join(Videos.channel)
-            .join(Channel.user)
-            .options(
-                selectinload(Videos.history)
-            )
-            .where(Videos.articles.isnot(None))
-        )
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый CSV «видео × день» из дневного ролапа.
+        Сначала читаем список дней для заголовка, затем идём серверным
+        курсором по строкам (видео, день) и выдаём CSV-строку на каждое видео.
+        """
         effective_user_ids = self._resolve_user_ids(
             user,
             target_user_id,
             target_user_ids,
         )
-        if effective_user_ids:
-            query = query.where(Channel.user_id.in_(effective_user_ids))
-        if channel_type is not None:
-            query = query.where(Channel.type == channel_type)
-        result = await self.repo.db.execute(query)
-        videos = result.scalars().all()
-        filtered_videos = [v for v in videos if v.articles]
-        stats = []
-        all_dates = set()
-        for video in filtered_videos:
-            daily_views = {}
-            daily_likes = {}
-            daily_comments = {}
-            for record in video.history:
-                record_date = record.created_at.date()
-                daily_views[record_date] = max(
-                    daily_views.get(record_date, 0),
-                    record.amount_views
-                )
-                daily_likes[record_date] = max(
-                    daily_likes.get(record_date, 0),
-                    record.amount_likes
-                )
-                daily_comments[record_date] = max(
-                    daily_comments.get(record_date, 0),
-                    record.amount_comments
-                )
-                all_dates.add(record_date)
-            stats.append({
-                "video_name": video.name,
-                "link": video.link,
-                "daily_views": daily_views,
-                "daily_likes": daily_likes,
-                "daily_comments": daily_comments
-            })
-        if pub_date_from or pub_date_to:
-            filtered_all_dates = set()
-            for d in all_dates:
-                if pub_date_from and d < pub_date_from:
-                    continue
-                if pub_date_to and d > pub_date_to:
-                    continue
-                filtered_all_dates.add(d)
-            all_dates = filtered_all_dates
-        sorted_dates = sorted(all_dates)
-        return stats, sorted_dates
+
+        def scoped(query):
+            query = (
+                query.join(Videos.channel)
+                .where(Videos.articles.isnot(None), Videos.articles != "")
+            )
+            if effective_user_ids:
+                query = query.where(Channel.user_id.in_(effective_user_ids))
+            if channel_type is not None:
+                query = query.where(Channel.type == channel_type)
+            return query
+
+        day_filters = []
+        if pub_date_from:
+            day_filters.append(VideoDailyStats.day >= pub_date_from)
+        if pub_date_to:
+            day_filters.append(VideoDailyStats.day <= pub_date_to)
+
+        days_query = scoped(
+            select(VideoDailyStats.day)
+            .distinct()
+            .select_from(VideoDailyStats)
+            .join(Videos, Videos.id == VideoDailyStats.video_id)
+        ).where(*day_filters).order_by(VideoDailyStats.day)
+
+        rows_query = scoped(
+            select(
+                Videos.id,
+                Videos.name,
+                Videos.link,
+                VideoDailyStats.day,
+                VideoDailyStats.views,
+            )
+            .select_from(Videos)
+            .outerjoin(
+                VideoDailyStats,
+                and_(VideoDailyStats.video_id == Videos.id, *day_filters),
+            )
+        ).order_by(Videos.id, VideoDailyStats.day).execution_options(
+            yield_per=settings.HISTORY_EXPORT_FETCH_SIZE
+        )
+
+        async def chunks():
+            async with SessionLocal() as db:
+                days = (await db.scalars(days_query)).all()
+                header = ["Название видео", "Ссылка на ролик"] + [d.isoformat() for d in days]
+
+                async def pivot_rows():
+                    # Строки отсортированы по видео — держим в памяти только текущее
+                    current_id, current, daily_views = None, None, {}
+                    result = await db.stream(rows_query)
+                    async for row in result:
+                        if row.id != current_id:
+                            if current is not None:
+                                yield current + [daily_views.get(d, "") for d in days]
+                            current_id, current, daily_views = row.id, [row.name or "", row.link], {}
+                        if row.day is not None:
+                            daily_views[row.day] = row.views
+                    if current is not None:
+                        yield current + [daily_views.get(d, "") for d in days]
+
+                async for chunk in csv_chunks(header, pivot_rows()):
+                    yield chunk
+
+        return chunks()
 
     async def get_daily_video_with_article_count(
         self,
@@ -223,68 +332,62 @@ class VideoHistoryService:
         articles: Optional[List[str]] = None,
     ) -> List[DailyVideoCount]:
         """Получаем ежедневную статистику видео с артиклем по всем пользователям."""
-        base_view_date = func.date(VideoHistory.created_at)
-        ranked_entries = (
-            select(
-                base_view_date.label("view_date"),
-                VideoHistory.video_id.label("video_id"),
-                VideoHistory.amount_views.label("views"),
-                VideoHistory.amount_likes.label("likes"),
-                VideoHistory.amount_comments.label("comments"),
-                func.row_number()
-                .over(
-                    partition_by=(base_view_date, VideoHistory.video_id),
-                    order_by=(
-                        VideoHistory.amount_views.desc(),
-                        VideoHistory.created_at.desc(),
-                        VideoHistory.id.desc(),
-                    ),
-                )
-                .label("rn"),
-            )
-            .join(Videos, VideoHistory.video_id == Videos.id)
-            .join(Channel, Videos.channel_id == Channel.id)
-            .where(Videos.articles.isnot(None))
+        filters = dict(
+            date_from=date_from,
+            date_to=date_to,
+            channel_id=channel_id,
+            channel_type=channel_type,
+            user_ids=self._normalize_user_ids(user_ids) or ([user_id] if user_id is not None else None),
+            articles=articles,
+        )
+        return await stats_cache.get_or_load(
+            "daily_article_count",
+            filters,
+            cache_tags(filters["user_ids"], channel_id),
+            lambda: self._load_daily_video_with_article_count(**filters),
         )
 
-        if date_from is not None:
-            start_dt = datetime.combine(date_from, datetime.min.time())
-            ranked_entries = ranked_entries.where(VideoHistory.created_at >= start_dt)
-
-        if date_to is not None:
-            end_dt = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
-            ranked_entries = ranked_entries.where(VideoHistory.created_at < end_dt)
-
-        if channel_id is not None:
-            ranked_entries = ranked_entries.where(Videos.channel_id == channel_id)
-
-        if articles:
-            ranked_entries = ranked_entries.where(
-                or_(*[Videos.articles.contains(tag) for tag in articles])
-            )
-
+    async def _load_daily_video_with_article_count(
+        self,
+        date_from: Optional[dt_date] = None,
+        date_to: Optional[dt_date] = None,
+        channel_id: Optional[int] = None,
+        channel_type: Optional[str] = None,
+        user_id: Optional[int] = None,
+        user_ids: Optional[List[int]] = None,
+        articles: Optional[List[str]] = None,
+    ) -> List[DailyVideoCount]:
+        """Считаем ежедневную статистику видео с артиклем в обход кэша."""
         effective_user_ids = self._normalize_user_ids(user_ids)
         if effective_user_ids is None and user_id is not None:
             effective_user_ids = [user_id]
-        if effective_user_ids:
-            ranked_entries = ranked_entries.where(Channel.user_id.in_(effective_user_ids))
-
-        if channel_type is not None:
-            ranked_entries = ranked_entries.where(Channel.type == channel_type)
-
-        ranked_subquery = ranked_entries.subquery()
 
         aggregated_query = (
             select(
-                ranked_subquery.c.view_date,
-                func.sum(ranked_subquery.c.views).label("total_views"),
-                func.sum(ranked_subquery.c.likes).label("total_likes"),
-                func.sum(ranked_subquery.c.comments).label("total_comments"),
-                func.count(ranked_subquery.c.video_id).label("video_count"),
+                VideoDailyStats.day.label("view_date"),
+                func.sum(VideoDailyStats.views).label("total_views"),
+                func.sum(VideoDailyStats.likes).label("total_likes"),
+                func.sum(VideoDailyStats.comments).label("total_comments"),
+                func.count(VideoDailyStats.video_id).label("video_count"),
             )
-            .where(ranked_subquery.c.rn == 1)
-            .group_by(ranked_subquery.c.view_date)
-            .order_by(ranked_subquery.c.view_date)
+            .select_from(VideoDailyStats)
+            .join(Videos, VideoDailyStats.video_id == Videos.id)
+            .join(Channel, Videos.channel_id == Channel.id)
+            .where(Videos.articles.isnot(None))
+        )
+        aggregated_query = filter_daily_stats(
+            aggregated_query,
+            date_from=date_from,
+            date_to=date_to,
+            channel_id=channel_id,
+            channel_type=channel_type,
+            user_ids=effective_user_ids,
+            articles=articles,
+        )
+        aggregated_query = (
+            aggregated_query
+            .group_by(VideoDailyStats.day)
+            .order_by(VideoDailyStats.day)
         )
 
         result = await self.repo.db.execute(aggregated_query)
@@ -312,26 +415,51 @@ class VideoHistoryService:
         articles: Optional[List[str]] = None,
     ) -> List[DailyVideoCount]:
         """Получаем ежедневную статистику видео по всем пользователям."""
+        filters = dict(
+            date_from=date_from,
+            date_to=date_to,
+            channel_id=channel_id,
+            channel_type=channel_type,
+            user_ids=self._normalize_user_ids(user_ids) or ([user_id] if user_id is not None else None),
+            articles=articles,
+        )
+        return await stats_cache.get_or_load(
+            "daily_count_all",
+            filters,
+            cache_tags(filters["user_ids"], channel_id),
+            lambda: self._load_daily_video_count_all(**filters),
+        )
+
+    async def _load_daily_video_count_all(
+        self,
+        date_from: Optional[dt_date] = None,
+        date_to: Optional[dt_date] = None,
+        channel_id: Optional[int] = None,
+        channel_type: Optional[str] = None,
+        user_id: Optional[int] = None,
+        user_ids: Optional[List[int]] = None,
+        articles: Optional[List[str]] = None,
+    ) -> List[DailyVideoCount]:
+        """Считаем ежедневную статистику в обход кэша."""
         subq = (
             select(
-                func.date(VideoHistory.date_published).label("view_date"),
-                VideoHistory.video_id
+                func.date(VideoDailyStats.date_published).label("view_date"),
+                VideoDailyStats.video_id
             )
             .distinct()
-            .join(Videos, VideoHistory.video_id == Videos.id)
-            .where(VideoHistory.date_published.isnot(None))
+            .join(Videos, VideoDailyStats.video_id == Videos.id)
+            .where(VideoDailyStats.date_published.isnot(None))
         )
         if date_from is not None:
-            subq = subq.where(VideoHistory.date_published >= date_from)
+            subq = subq.where(VideoDailyStats.date_published >= date_from)
         if date_to is not None:
             subq = subq.where(
-                VideoHistory.date_published < date_to + timedelta(days=1)
+                VideoDailyStats.date_published < date_to + timedelta(days=1)
             )
         if channel_id is not None:
             subq = subq.where(Videos.channel_id == channel_id)
         if articles:
-            or_conditions = [Videos.articles.contains(tag) for tag in articles]
-            subq = subq.where(or_(*or_conditions))
+            subq = subq.where(articles_filter(articles))
         subq = subq.join(Channel, Videos.channel_id == Channel.id)
         effective_user_ids = self._normalize_user_ids(user_ids)
         if effective_user_ids is None and user_id is not None:
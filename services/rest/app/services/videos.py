@@ -1,14 +1,24 @@
 # from app.utils.scheduler import scheduler, process_recurring_task
+from datetime import datetime, timezone
 from sqlalchemy import select
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
+from app.core.config import settings
 from app.repositories.videos import VideosRepository
 # from app.utils.rabbitmq_producer import rabbit_producer
-from app.schemas.videos import VideosCreate, VideosUpdate
+from app.schemas.videos import (
+    VideosCreate, VideosUpdate, VideosBulkCreate, VideosBulkResult,
+    VideosBulkItemResult
+)
 from app.services.videohistory import VideoHistoryService
 from app.schemas.videohistory import VideoHistoryCreate
 from app.models.user import User, UserRole
 from app.models.videos import VideoType, Videos
+from app.models.channel import Channel
+from app.utils.data_version import bump_data_versions
+from app.utils.pagination import PaginationCount
+from app.utils.video_link import normalize_video_link
 
 
 class VideosService:
@@ -50,7 +60,9 @@ class VideosService:
         link: Optional[str] = None,
         name: Optional[str] = None,
         page: Optional[int] = None,
-        size: Optional[int] = None
+        size: Optional[int] = None,
+        after: Optional[str] = None,
+        count: PaginationCount = PaginationCount.NONE,
     ):
         """Получаем все видео с фильтрацией и пагинацией."""
         normalized_user_ids = self._normalize_user_ids(user_id, user_ids)
@@ -61,7 +73,28 @@ class VideosService:
             link=link,
             name=name,
             page=page,
-            size=size
+            size=size,
+            after=after,
+            count=count,
+        )
+
+    async def get_distinct_articles(
+        self,
+        user: User,
+        prefix: Optional[str] = None,
+        limit: int = 50,
+        user_id: Optional[int] = None,
+        user_ids: Optional[List[int]] = None,
+    ) -> List[str]:
+        """Получаем уникальные артикли для автодополнения."""
+        if user.role != UserRole.ADMIN:
+            normalized_user_ids = [user.id]
+        else:
+            normalized_user_ids = self._normalize_user_ids(user_id, user_ids)
+        return await self.repo.get_distinct_articles(
+            user_ids=normalized_user_ids,
+            prefix=prefix,
+            limit=limit,
         )
 
     async def get_by_id(self, video_id: int, user_id: int):
@@ -122,11 +155,9 @@ class VideosService:
         или по video_id без проверки пользователя.
         """
         video = None
-
         if video_id:
             video = await self.repo.get_by_id(video_id)
-
-        if not video:
+        if not video and isinstance(dto, VideosUpdate) and dto.link:
             video = await self.repo.get_by_link(dto.link)
 
         if video:
@@ -135,18 +166,21 @@ class VideosService:
                 name=dto.name,
                 image=dto.image,
                 articles=dto.articles,
-                # date_published=dto.date_published,
-                # amount_views=dto.amount_views,
-                # amount_likes=dto.amount_likes,
-                # amount_comments=dto.amount_comments
             )
             video = await self.repo.update(video.id, update_dto)
-            is_new = False
+        elif isinstance(dto, VideosUpdate):
+            raise ValueError("Видео не найдено")
         else:
-            video = await self.repo.create(dto)
-            if not video:
-                raise ValueError("Ошибка при создании видео")
-            is_new = True
+            # Один запрос вместо SELECT по ссылке + UPDATE/INSERT
+            try:
+                video = await self.repo.upsert(
+                    self._video_row(dto.channel_id, dto)
+                )
+            except IntegrityError as exc:
+                await self.repo.db.rollback()
+                raise ValueError("Канал не найден") from exc
+            # Снимок пишется отдельной сессией, видео должно быть закоммичено
+            await self.repo.db.commit()
 
         history_dto = VideoHistoryCreate(
             video_id=video.id,
@@ -156,10 +190,109 @@ class VideosService:
             date_published=dto.date_published,
             created_at=dto.history_created_at,
         )
-        await self.history_service.create(history_dto)
+        await self.history_service.enqueue(history_dto)
 
         return video
 
+    async def bulk_create_or_update_and_create_history(
+        self,
+        dto: VideosBulkCreate
+    ) -> VideosBulkResult:
+        """
+        Пакетно создать/обновить видео канала и записать снимки метрик
+        в одной транзакции.
+        """
+        result = await self._ingest_bulk(dto)
+        await self.repo.db.commit()
+        return result
+
+    async def ingest_many(
+        self,
+        payloads: List[VideosBulkCreate]
+    ) -> List[Optional[VideosBulkResult]]:
+        """
+        Записываем несколько пакетов каналов одной транзакцией.
+        Пакет с невалидными данными откатывается до своей точки сохранения
+        и возвращается как None, остальные коммитятся вместе.
+        """
+        results: List[Optional[VideosBulkResult]] = []
+        for dto in payloads:
+            try:
+                async with self.repo.db.begin_nested():
+                    results.append(await self._ingest_bulk(dto))
+            except (ValueError, IntegrityError, DataError) as exc:
+                print(f"⚠️ Пакет канала {dto.channel_id} отклонён: {exc}")
+                results.append(None)
+        await self.repo.db.commit()
+        return results
+
+    @staticmethod
+    def _video_row(channel_id: int, dto) -> dict:
+        """Строка для upsert видео из DTO парсера."""
+        return {
+            "link": dto.link,
+            "link_normalized": normalize_video_link(dto.link),
+            "type": dto.type,
+            "name": dto.name,
+            "image": dto.image,
+            "articles": ",".join(sorted(set(dto.articles))) if dto.articles else None,
+            "channel_id": channel_id,
+        }
+
+    async def _ingest_bulk(self, dto: VideosBulkCreate) -> VideosBulkResult:
+        """Пакетная запись видео и истории без коммита."""
+        channel = await self.repo.db.get(Channel, dto.channel_id)
+        if not channel:
+            raise ValueError("Канал не найден")
+
+        # Одна нормализованная ссылка в пакете — одно видео,
+        # повторы отмечаем как duplicate
+        unique_items = {}
+        for item in dto.videos:
+            unique_items.setdefault(normalize_video_link(item.link), item)
+
+        upserted = await self.repo.upsert_many([
+            self._video_row(dto.channel_id, item)
+            for item in unique_items.values()
+        ])
+
+        now = datetime.now(timezone.utc)
+        await self.history_service.repo.store_snapshots([
+            {
+                "video_id": upserted[link][0],
+                "amount_views": item.amount_views,
+                "amount_likes": item.amount_likes,
+                "amount_comments": item.amount_comments,
+                "date_published": item.date_published,
+                "created_at": item.history_created_at or now,
+            }
+            for link, item in unique_items.items()
+        ], change_only=settings.HISTORY_CHANGE_ONLY)
+
+        items = []
+        seen = set()
+        for item in dto.videos:
+            link = normalize_video_link(item.link)
+            video_id, inserted = upserted[link]
+            if link in seen:
+                status = "duplicate"
+            else:
+                status = "created" if inserted else "updated"
+            seen.add(link)
+            items.append(VideosBulkItemResult(
+                link=item.link,
+                id=video_id,
+                status=status,
+            ))
+
+        created = sum(1 for _, inserted in upserted.values() if inserted)
+        return VideosBulkResult(
+            channel_id=dto.channel_id,
+            created=created,
+            updated=len(upserted) - created,
+            items=items,
+        )
+
     async def delete(self, video_id: int, user: User):
         """Удаляем видео."""
         video = await self.repo.get_by_video_id(video_id)
@@ -175,6 +308,7 @@ class VideosService:
         if not video:
             raise ValueError("Видео не найдено")
         video.image = image
+        await bump_data_versions(self.repo.db, channel_ids=[video.channel_id])
         await self.repo.db.commit()
         await self.repo.db.refresh(video)
         return video
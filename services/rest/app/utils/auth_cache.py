@@ -0,0 +1,89 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class AuthCache:
+    """
+    Кэш аутентификации: хэш init-data -> поля пользователя.
+    Хранит уже проверенную подпись и результат поиска по tg_id,
+    поэтому повторные запросы с тем же токеном не ходят в БД.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        """Инициализируем кэш."""
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+
+    @staticmethod
+    def make_key(token: str) -> str:
+        """Ключ — хэш токена, сам токен в памяти не храним."""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _drop(self, key: str):
+        """Удаляем запись и её индекс по пользователю."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[1]["id"]
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def get(self, token: str) -> Optional[User]:
+        """Достаём пользователя по токену; каждый раз новый отсоединённый объект."""
+        if self.ttl <= 0:
+            return None
+        key = self.make_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        user = User(**entry[1])
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, token: str, user: User, expires_in: Optional[float] = None):
+        """Запоминаем пользователя для токена."""
+        if self.ttl <= 0:
+            return
+        key = self.make_key(token)
+        self._drop(key)
+        ttl = self.ttl if expires_in is None else min(self.ttl, expires_in)
+        values = {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+        }
+        self._entries[key] = (time.monotonic() + ttl, values)
+        self._keys_by_user.setdefault(values["id"], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        """Сбрасываем все токены пользователя (блокировка, смена роли, профиль)."""
+        for key in list(self._keys_by_user.get(user_id, ())):
+            self._drop(key)
+
+    def clear(self):
+        """Полностью очищаем кэш."""
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+
+auth_cache = AuthCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.channel import Channel
+from app.models.userdataversion import UserDataVersion
+
+
+# Ключ session.info: пользователи, чья версия поднимется при коммите
+PENDING_VERSIONS_KEY = "pending_data_versions"
+
+
+async def bump_data_versions(
+    db: AsyncSession,
+    user_ids: Iterable[int] = (),
+    channel_ids: Iterable[int] = (),
+) -> list[int]:
+    """
+    Отмечаем пользователей и владельцев каналов, чья версия данных поднимется
+    при коммите сессии. Сами строки версий здесь не трогаем.
+    """
+    affected = {user_id for user_id in user_ids if user_id is not None}
+    channel_ids = {channel_id for channel_id in channel_ids if channel_id is not None}
+    if channel_ids:
+        result = await db.execute(
+            select(Channel.user_id).where(Channel.id.in_(channel_ids)).distinct()
+        )
+        affected.update(user_id for user_id in result.scalars() if user_id is not None)
+    if affected:
+        # Отметки принадлежат текущей транзакции: откат её сбросит
+        await db.connection()
+        db.info.setdefault(PENDING_VERSIONS_KEY, set()).update(affected)
+    return sorted(affected)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_versions(session: Session):
+    """
+    Поднимаем версии один раз на транзакцию, прямо перед коммитом.
+    Строки блокируются в порядке user_id и держатся только до коммита,
+    поэтому параллельные записи не встают в deadlock.
+    """
+    affected = session.info.pop(PENDING_VERSIONS_KEY, None)
+    if not affected:
+        return
+    stmt = pg_insert(UserDataVersion).values(
+        [{"user_id": user_id, "version": 1} for user_id in sorted(affected)]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDataVersion.user_id],
+        set_={
+            "version": UserDataVersion.version + 1,
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_versions(session: Session, transaction):
+    """Откат или закрытие сессии без коммита — отметки пропадают вместе с изменениями."""
+    if transaction.parent is None:
+        session.info.pop(PENDING_VERSIONS_KEY, None)
+
+
+async def get_data_version(
+    db: AsyncSession,
+    user_ids: Optional[Iterable[int]] = None,
+) -> tuple[int, Optional[datetime]]:
+    """Суммарная версия и время последнего изменения данных пользователей (None — всех)."""
+    query = select(
+        func.coalesce(func.sum(UserDataVersion.version), 0),
+        func.max(UserDataVersion.updated_at),
+    )
+    if user_ids is not None:
+        query = query.where(UserDataVersion.user_id.in_(list(user_ids)))
+    result = await db.execute(query)
+    version, updated_at = result.one()
+    return int(version), updated_at
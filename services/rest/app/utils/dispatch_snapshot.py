@@ -0,0 +1,127 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.channel import ChannelType
+from app.models.proxy import Proxy
+from app.schemas.lease import AccountPool, ProxyPool
+
+
+@dataclass(frozen=True)
+class DispatchSnapshot:
+    """Аккаунты и прокси, которые уходят в задачи парсинга одной волны."""
+    accounts: tuple[str, ...]
+    likee_proxies: tuple[str, ...]
+    generic_proxies: tuple[str, ...]
+
+    def proxies_for(self, channel_type: ChannelType) -> list[str]:
+        """Прокси для типа канала: Likee — свои, остальные — общие."""
+        if channel_type == ChannelType.LIKEE:
+            return list(self.likee_proxies)
+        return list(self.generic_proxies)
+
+    def task_resources(self, channel_type: ChannelType, account_count: Optional[int] = None) -> dict:
+        """
+        Ресурсы для задачи парсинга: при аренде — только ссылка на пулы,
+        иначе списки прокси (и аккаунты — только для Instagram).
+        """
+        if settings.RESOURCE_LEASES_ENABLED:
+            return {"resource_pool": resource_pool(channel_type, account_count)}
+        resources = {"proxy_list": self.proxies_for(channel_type)}
+        if channel_type == ChannelType.INSTAGRAM:
+            resources["accounts"] = list(self.accounts)
+        return resources
+
+
+# Снимок без списков: при аренде задача несёт только ссылку на пулы
+LEASED_SNAPSHOT = DispatchSnapshot(accounts=(), likee_proxies=(), generic_proxies=())
+
+
+def resource_pool(channel_type: ChannelType, account_count: Optional[int] = None) -> dict:
+    """Пулы и сколько ресурсов воркер арендует на задачу через /proxies/lease и /accounts/lease."""
+    pool = {
+        "proxies": (ProxyPool.LIKEE if channel_type == ChannelType.LIKEE else ProxyPool.GENERIC).value,
+        "proxy_count": settings.LEASE_PROXIES_PER_TASK,
+    }
+    if channel_type == ChannelType.INSTAGRAM:
+        pool["accounts"] = AccountPool.INSTAGRAM.value
+        pool["account_count"] = account_count or settings.LEASE_ACCOUNTS_PER_TASK
+    return pool
+
+
+async def load_dispatch_snapshot(db: AsyncSession) -> DispatchSnapshot:
+    """Читаем активные аккаунты и все прокси (только нужные колонки)."""
+    accounts = (await db.execute(
+        select(Account.account_str).where(Account.is_active.is_(True)).order_by(Account.id)
+    )).scalars().all()
+    proxies = (await db.execute(
+        select(Proxy.proxy_str, Proxy.for_likee).order_by(Proxy.id)
+    )).all()
+    return DispatchSnapshot(
+        accounts=tuple(accounts),
+        likee_proxies=tuple(proxy_str for proxy_str, for_likee in proxies if for_likee is True),
+        generic_proxies=tuple(proxy_str for proxy_str, for_likee in proxies if for_likee is not True),
+    )
+
+
+async def has_active_accounts(db: AsyncSession) -> bool:
+    """Есть ли активный аккаунт (без чтения всего списка)."""
+    return bool(await db.scalar(select(exists().where(Account.is_active.is_(True)))))
+
+
+class DispatchSnapshotCache:
+    """
+    Снимок аккаунтов/прокси с коротким TTL: волна каналов читает таблицы
+    один раз, эндпоинты аккаунтов и прокси сбрасывают снимок при записи.
+    """
+    def __init__(self, ttl_seconds: float):
+        """Инициализируем кэш."""
+        self.ttl = ttl_seconds
+        self._snapshot: Optional[DispatchSnapshot] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession) -> DispatchSnapshot:
+        """Отдаём свежий снимок или перечитываем его (одна загрузка на всех ждущих)."""
+        snapshot = self._fresh()
+        if snapshot is not None:
+            return snapshot
+        async with self._lock:
+            snapshot = self._fresh()
+            if snapshot is not None:
+                return snapshot
+            generation = self._generation
+            snapshot = await load_dispatch_snapshot(db)
+            # Сброс во время чтения: результат отдаём, но не запоминаем
+            if generation == self._generation and self.ttl > 0:
+                self._snapshot = snapshot
+                self._expires_at = time.monotonic() + self.ttl
+            return snapshot
+
+    async def for_tasks(self, db: AsyncSession) -> DispatchSnapshot:
+        """Снимок для ресурсов задач: при аренде списки не нужны — таблицы не читаем."""
+        if settings.RESOURCE_LEASES_ENABLED:
+            return LEASED_SNAPSHOT
+        return await self.get(db)
+
+    def _fresh(self) -> Optional[DispatchSnapshot]:
+        """Снимок, если он ещё не истёк."""
+        if self._snapshot is not None and self._expires_at > time.monotonic():
+            return self._snapshot
+        return None
+
+    def invalidate(self):
+        """Сбрасываем снимок после изменения аккаунтов или прокси."""
+        self._generation += 1
+        self._snapshot = None
+        self._expires_at = 0.0
+
+
+dispatch_snapshot_cache = DispatchSnapshotCache(ttl_seconds=settings.DISPATCH_SNAPSHOT_TTL_SECONDS)
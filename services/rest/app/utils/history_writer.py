@@ -0,0 +1,189 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from asyncpg.exceptions import DataError as PgDataError
+from asyncpg.exceptions import IntegrityConstraintViolationError
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.repositories.videohistory import VideoHistoryRepository
+from app.utils.metrics import HISTORY_SNAPSHOTS_DROPPED
+
+
+# Ошибки данных: повторная запись пачки их не исправит
+NON_RETRYABLE_ERRORS = (
+    DataError,
+    IntegrityError,
+    PgDataError,
+    IntegrityConstraintViolationError,
+)
+
+
+class VideoHistoryWriter:
+    """
+    Write-behind буфер снимков метрик видео.
+    Снимки копятся в памяти и сбрасываются в video_history через COPY
+    при достижении max_batch_size строк или раз в flush_interval_ms.
+    """
+    def __init__(
+        self,
+        max_batch_size: int,
+        flush_interval_ms: int,
+        max_buffer_rows: int = 50000,
+        retry_backoff_ms: int = 1000,
+        retry_backoff_max_ms: int = 60000,
+    ):
+        """Инициализируем буфер."""
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = max(flush_interval_ms, 1) / 1000
+        self.max_buffer_rows = max(self.max_batch_size, max_buffer_rows)
+        self.retry_backoff = max(retry_backoff_ms, 0) / 1000
+        self.retry_backoff_max = max(retry_backoff_max_ms, retry_backoff_ms, 0) / 1000
+        self.dropped = 0
+        self._buffer: List[dict] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _backing_off(self) -> bool:
+        """Прошлый сброс упал из-за БД, и пауза перед повтором ещё не истекла."""
+        return self._failures > 0 and asyncio.get_running_loop().time() < self._retry_at
+
+    def _drop(self, count: int, reason: str):
+        """Учитываем отброшенные снимки."""
+        self.dropped += count
+        HISTORY_SNAPSHOTS_DROPPED.labels(reason=reason).inc(count)
+
+    def _trim(self):
+        """Буфер переполнен (БД долго недоступна) — отбрасываем самые старые снимки."""
+        overflow = len(self._buffer) - self.max_buffer_rows
+        if overflow > 0:
+            del self._buffer[:overflow]
+            before = self.dropped
+            self._drop(overflow, "overflow")
+            # Пишем в лог раз на пачку отброшенных, а не на каждый снимок
+            if before == 0 or before // self.max_batch_size != self.dropped // self.max_batch_size:
+                print(f"⚠️ История видео: буфер переполнен, всего отброшено {self.dropped} снимков")
+
+    async def add(self, row: dict):
+        """
+        Добавляем снимок в буфер, при переполнении пачки сразу сбрасываем.
+        Пока БД недоступна, запрос не ждёт заведомо неудачного сброса.
+        """
+        row.setdefault("created_at", None)
+        if row["created_at"] is None:
+            row["created_at"] = datetime.now(timezone.utc)
+        self._buffer.append(row)
+        self._trim()
+        if len(self._buffer) >= self.max_batch_size and not self._backing_off():
+            await self.flush()
+
+    async def _write(self, rows: List[dict]):
+        """Записываем снимки одной транзакцией."""
+        async with SessionLocal() as db:
+            await VideoHistoryRepository(db).store_snapshots(
+                rows, change_only=settings.HISTORY_CHANGE_ONLY
+            )
+            await db.commit()
+
+    async def _write_isolating_bad_rows(
+        self, rows: List[dict]
+    ) -> tuple[int, List[dict], Optional[Exception]]:
+        """
+        Пачка упала на ошибке данных: делим её пополам, пока не останутся
+        отдельные строки, и отбрасываем только те, что не записываются сами.
+        Возвращаем (записано, не записано из-за недоступности БД, эта ошибка).
+        """
+        written = 0
+        pending = [rows]
+        while pending:
+            chunk = pending.pop()
+            try:
+                await self._write(chunk)
+                written += len(chunk)
+            except NON_RETRYABLE_ERRORS as exc:
+                if len(chunk) == 1:
+                    self._drop(1, "invalid")
+                    print(f"❌ История видео: снимок видео {chunk[0].get('video_id')} отброшен: {exc}")
+                    continue
+                middle = len(chunk) // 2
+                pending.extend((chunk[middle:], chunk[:middle]))
+            except Exception as exc:
+                rest = [row for part in reversed(pending) for row in part]
+                return written, chunk + rest, exc
+        return written, [], None
+
+    def _retry_later(self, rows: List[dict], exc: Exception):
+        """БД недоступна — возвращаем снимки в начало буфера и назначаем паузу."""
+        self._buffer[:0] = rows
+        self._trim()
+        self._failures += 1
+        delay = min(self.retry_backoff * 2 ** (self._failures - 1), self.retry_backoff_max)
+        self._retry_at = asyncio.get_running_loop().time() + delay
+        print(
+            f"⚠️ История видео: не удалось сбросить {len(self._buffer)} снимков, "
+            f"повтор через {delay:.1f} с: {exc}"
+        )
+
+    async def flush(self, force: bool = False) -> int:
+        """
+        Сбрасываем накопленные снимки пачками по max_batch_size.
+        После ошибки БД повторяем не раньше паузы (force — при остановке).
+        """
+        async with self._lock:
+            if not self._buffer or (not force and self._backing_off()):
+                return 0
+            written = 0
+            while self._buffer:
+                rows = self._buffer[:self.max_batch_size]
+                del self._buffer[:len(rows)]
+                try:
+                    await self._write(rows)
+                    written += len(rows)
+                    unwritten, error = [], None
+                except NON_RETRYABLE_ERRORS:
+                    isolated, unwritten, error = await self._write_isolating_bad_rows(rows)
+                    written += isolated
+                except Exception as exc:
+                    unwritten, error = rows, exc
+                if error is not None:
+                    self._retry_later(unwritten, error)
+                    return written
+                self._failures = 0
+            return written
+
+    async def _run(self):
+        """Периодически сбрасываем буфер по таймеру."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Запускаем фоновый сброс по таймеру."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливаем таймер и сбрасываем остаток буфера."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        flushed = await self.flush(force=True)
+        if flushed:
+            print(f"✅ История видео: при остановке записано {flushed} снимков")
+
+
+history_writer = VideoHistoryWriter(
+    max_batch_size=settings.HISTORY_FLUSH_BATCH_SIZE,
+    flush_interval_ms=settings.HISTORY_FLUSH_INTERVAL_MS,
+    max_buffer_rows=settings.HISTORY_BUFFER_MAX_ROWS,
+    retry_backoff_ms=settings.HISTORY_RETRY_BACKOFF_MS,
+    retry_backoff_max_ms=settings.HISTORY_RETRY_BACKOFF_MAX_MS,
+)
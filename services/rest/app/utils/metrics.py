@@ -0,0 +1,200 @@
+import time
+from datetime import datetime, timezone
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность HTTP-запросов по маршрутам",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+)
+RABBITMQ_PUBLISH_DURATION = Histogram(
+    "rabbitmq_publish_duration_seconds",
+    "Длительность публикации задачи в RabbitMQ",
+    ["queue"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+RABBITMQ_PUBLISH_FAILURES = Counter(
+    "rabbitmq_publish_failures_total",
+    "Ошибки публикации задач в RabbitMQ",
+    ["queue"],
+)
+HISTORY_SNAPSHOTS_DROPPED = Counter(
+    "video_history_snapshots_dropped_total",
+    "Снимки video_history, отброшенные write-behind буфером",
+    ["reason"],
+)
+SCHEDULER_JOB_LAG = Histogram(
+    "scheduler_job_lag_seconds",
+    "Задержка запуска задачи APScheduler относительно запланированного времени",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600),
+)
+SCHEDULER_JOB_RUNS = Counter(
+    "scheduler_job_runs_total",
+    "Завершения задач APScheduler по результату",
+    ["job", "outcome"],
+)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность по шаблону маршрута и запросы в обработке."""
+    def __init__(self, app):
+        """Оборачиваем приложение."""
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Обрабатываем запрос."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            """Запоминаем код ответа."""
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            # Шаблон маршрута (/videos/{video_id}), а не сам путь — метки не разрастаются
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Отдаём метрики в формате Prometheus."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+def _job_name(job) -> str:
+    """Метка задачи: имя функции, а не id (id содержит номер задачи)."""
+    func = getattr(job, "func", None)
+    return getattr(func, "__name__", "unknown")
+
+
+def install_scheduler_metrics(scheduler):
+    """Подписываемся на события APScheduler: задержка запуска и результаты."""
+    from apscheduler.events import (
+        EVENT_JOB_ADDED,
+        EVENT_JOB_ERROR,
+        EVENT_JOB_EXECUTED,
+        EVENT_JOB_MISSED,
+        EVENT_JOB_SUBMITTED,
+    )
+
+    # Разовые задачи удаляются до события запуска — имя запоминаем при добавлении
+    names: dict[str, str] = {job.id: _job_name(job) for job in scheduler.get_jobs()}
+
+    def job_name(job_id: str) -> str:
+        """Имя задачи по id."""
+        return names.get(job_id) or _job_name(scheduler.get_job(job_id))
+
+    def on_added(event):
+        """Запоминаем имя новой задачи."""
+        names[event.job_id] = _job_name(scheduler.get_job(event.job_id))
+
+    def on_submitted(event):
+        """Задача отдана исполнителю — считаем задержку от плана."""
+        now = datetime.now(timezone.utc)
+        for run_time in event.scheduled_run_times:
+            SCHEDULER_JOB_LAG.labels(job_name(event.job_id)).observe(
+                max(0.0, (now - run_time).total_seconds())
+            )
+
+    def on_finished(event):
+        """Считаем завершения задач по результату."""
+        if event.code == EVENT_JOB_MISSED:
+            outcome = "missed"
+        elif event.code == EVENT_JOB_ERROR:
+            outcome = "error"
+        else:
+            outcome = "executed"
+        SCHEDULER_JOB_RUNS.labels(job_name(event.job_id), outcome).inc()
+        if scheduler.get_job(event.job_id) is None:
+            names.pop(event.job_id, None)
+
+    scheduler.add_listener(on_added, EVENT_JOB_ADDED)
+    scheduler.add_listener(on_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(on_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+
+
+class RuntimeStateCollector:
+    """Снимаем состояние пула БД, планировщика и Instagram batch в момент опроса."""
+    def describe(self):
+        """Без описания реестр не вызывает collect() при регистрации."""
+        return []
+
+    def collect(self):
+        """Отдаём текущие значения."""
+        from app.core.db import engine
+        from app.utils import scheduler as scheduler_module
+
+        pool = engine.sync_engine.pool
+        pool_metrics = (
+            ("db_pool_size", "Размер пула соединений", "size"),
+            ("db_pool_checked_out", "Соединения, выданные из пула", "checkedout"),
+            ("db_pool_overflow", "Соединения сверх размера пула", "overflow"),
+        )
+        for name, documentation, method in pool_metrics:
+            if hasattr(pool, method):
+                yield GaugeMetricFamily(name, documentation, value=getattr(pool, method)())
+
+        jobs = GaugeMetricFamily(
+            "scheduler_jobs", "Задачи APScheduler по функциям", labels=["job"]
+        )
+        counts: dict[str, int] = {}
+        for job in scheduler_module.scheduler.get_jobs():
+            counts[_job_name(job)] = counts.get(_job_name(job), 0) + 1
+        for name, count in counts.items():
+            jobs.add_metric([name], count)
+        yield jobs
+
+        # Без запроса в БД: состояние, которое процесс видел последним
+        active, _, started_at, pending = scheduler_module.get_last_seen_batch_state()
+        yield GaugeMetricFamily(
+            "instagram_batch_active", "Instagram batch захвачен (1) или свободен (0)",
+            value=1 if active else 0,
+        )
+        lock_age = (
+            (datetime.now(timezone.utc) - started_at).total_seconds()
+            if active and started_at else 0
+        )
+        yield GaugeMetricFamily(
+            "instagram_batch_lock_age_seconds", "Сколько держится блокировка Instagram batch",
+            value=lock_age,
+        )
+        yield GaugeMetricFamily(
+            "instagram_batch_pending_tasks", "Задачи, отложенные до окончания Instagram batch",
+            value=pending,
+        )
+
+
+REGISTRY.register(RuntimeStateCollector())
@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DEFAULT_CURSOR_PAGE_SIZE = 20
+
+
+class PaginationCount(str, Enum):
+    """Как считать total в режиме курсора."""
+    NONE = "none"  # не считаем
+    EXACT = "exact"  # COUNT(*) по фильтру
+    ESTIMATE = "estimate"  # оценка планировщика PostgreSQL
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Непрозрачный курсор из (created_at, id) последней строки страницы."""
+    raw = json.dumps([created_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Разбираем курсор обратно в (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Некорректный курсор пагинации") from exc
+
+
+async def count_rows(db: AsyncSession, query, count: PaginationCount) -> Optional[int]:
+    """Считаем строки запроса точно или по оценке планировщика."""
+    if count == PaginationCount.NONE:
+        return None
+
+    query = query.order_by(None)
+    conn = await db.connection()
+    if count == PaginationCount.ESTIMATE and conn.dialect.name == "postgresql":
+        compiled = query.compile(
+            dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+        )
+        # Мимо text(): ":слово" в значении фильтра он принял бы за bind-параметр
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    result = await db.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar() or 0
+
+
+async def paginate_by_cursor(
+    db: AsyncSession,
+    query,
+    model,
+    after: Optional[str],
+    size: Optional[int],
+    count: PaginationCount = PaginationCount.NONE,
+) -> tuple[list, dict]:
+    """
+    Keyset-пагинация по (created_at DESC, id DESC).
+    Пустой after — первая страница; стоимость страницы не зависит от глубины.
+    Запрос по одной сущности отдаёт объекты, запрос по колонкам — словари.
+    """
+    size = size or DEFAULT_CURSOR_PAGE_SIZE
+    total = await count_rows(db, query, count)
+
+    if after:
+        created_at, id = decode_cursor(after)
+        query = query.where(
+            tuple_(model.created_at, model.id) < tuple_(created_at, id)
+        )
+    query = (
+        query.order_by(None)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(size + 1)
+    )
+    result = await db.execute(query)
+    if len(query.column_descriptions) == 1:
+        items = list(result.scalars().all())
+    else:
+        items = [dict(row) for row in result.mappings().all()]
+
+    has_more = len(items) > size
+    items = items[:size]
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        else:
+            next_cursor = encode_cursor(last.created_at, last.id)
+    return items, {
+        "size": size,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "total": total,
+    }
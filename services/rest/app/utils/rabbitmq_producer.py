@@ -1,98 +1,132 @@
-import pika
+import asyncio
 import json
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from aio_pika import DeliveryMode, Message, connect_robust
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+from aio_pika.pool import Pool
+
 from app.core.config import settings
+from app.utils.metrics import RABBITMQ_PUBLISH_DURATION, RABBITMQ_PUBLISH_FAILURES
 
 
 class RabbitMQProducer:
-    """Продюсер RabbitMQ."""
+    """
+    Асинхронный продюсер RabbitMQ: robust-соединение (переподключается после
+    рестарта брокера), пул каналов и подтверждения публикаций (publisher confirms).
+    """
     def __init__(
             self,
-            host: str = 'localhost',
-            port: int = 5672,
-            username: str = 'guest',
-            password: str = 'guest'
+            amqp_url: str,
+            channel_pool_size: int = 4,
+            publish_timeout: float = 10,
     ):
         """
         Инициализация продюсера RabbitMQ.
-        :param host: Хост RabbitMQ
-        :param port: Порт
-        :param username: Логин
-        :param password: Пароль
+        :param amqp_url: AMQP URL брокера
+        :param channel_pool_size: Сколько каналов публикуют параллельно
+        :param publish_timeout: Сколько секунд ждать подтверждения от брокера
         """
-        self.connection_params = pika.ConnectionParameters(
-            host=host,
-            port=port,
-            credentials=pika.PlainCredentials(username, password),
-            heartbeat=65535,
-            blocked_connection_timeout=300,
-        )
-        self.connection = None
-        self.channel = None
+        self.amqp_url = amqp_url
+        self.channel_pool_size = max(1, channel_pool_size)
+        self.publish_timeout = publish_timeout
+        self.connection: Optional[AbstractRobustConnection] = None
+        self.channel_pool: Optional[Pool[AbstractChannel]] = None
+
+    async def _open_channel(self) -> AbstractChannel:
+        """Открываем канал пула с подтверждениями публикаций."""
+        return await self.connection.channel(publisher_confirms=True)
 
-    def connect(self):
-        """Устанавливает соединение с RabbitMQ и создаёт канал."""
+    async def connect(self):
+        """Устанавливает robust-соединение с RabbitMQ и создаёт пул каналов."""
         try:
-            self.connection = pika.BlockingConnection(self.connection_params)
-            self.channel = self.connection.channel()
+            self.connection = await connect_robust(self.amqp_url)
+            self.channel_pool = Pool(self._open_channel, max_size=self.channel_pool_size)
             print("✅ Подключение к RabbitMQ установлено")
         except Exception as e:
             logging.error(f"❌ Ошибка подключения к RabbitMQ: {e}")
             raise
 
-    def declare_queue(self, queue_name: str, durable: bool = True):
+    def _ensure_connected(self):
+        """Проверяем, что connect() уже вызван."""
+        if self.channel_pool is None:
+            raise RuntimeError("Соединение не инициализировано. Вызовите connect() сначала.")
+
+    async def declare_queue(self, queue_name: str, durable: bool = True):
         """
         Объявляет очередь.
         :param queue_name: Название очереди
         :param durable: Сохранять ли очередь при перезапуске брокера
         """
-        if not self.channel:
-            raise RuntimeError("Канал не инициализирован. Вызовите connect() сначала.")
+        self._ensure_connected()
+        async with self.channel_pool.acquire() as channel:
+            await channel.declare_queue(queue_name, durable=durable)
 
-        self.channel.queue_declare(queue=queue_name, durable=durable)
+    @staticmethod
+    def _make_message(task_data: Dict[str, Any]) -> Message:
+        """Собираем постоянное JSON-сообщение."""
+        return Message(
+            json.dumps(task_data, ensure_ascii=False).encode(),
+            content_type="application/json",
+            delivery_mode=DeliveryMode.PERSISTENT,
+        )
 
-    def send_task(self, queue_name: str, task_data: Dict[str, Any]):
-        if not self.channel:
-            raise RuntimeError("Канал не инициализирован. Вызовите connect() сначала.")
+    async def send_task(self, queue_name: str, task_data: Dict[str, Any]):
+        """Публикует задачу и ждёт подтверждения брокера."""
+        await self.send_tasks(queue_name, [task_data])
+        print(f"✅ Задача отправлена в {queue_name}: {task_data}")
 
+    async def send_tasks(self, queue_name: str, tasks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Публикует пакет задач в одну очередь одним каналом:
+        сообщения уходят подряд, подтверждения ждём все вместе.
+        """
+        self._ensure_connected()
+        messages = [self._make_message(task_data) for task_data in tasks]
+        if not messages:
+            return 0
+
+        started = time.perf_counter()
         try:
-            body = json.dumps(task_data, ensure_ascii=False)
-            print(f"📤 Отправляется тело: {body}")
-            print("📋 Content-Type: application/json")
-
-            self.channel.basic_publish(
-                exchange='',
-                routing_key=queue_name,
-                body=body,
-                properties=pika.BasicProperties(
-                    delivery_mode=2,
-                    content_type='application/json'
-                )
-            )
-            print(f"✅ Задача отправлена: {task_data}")
+            async with self.channel_pool.acquire() as channel:
+                await asyncio.gather(*(
+                    channel.default_exchange.publish(
+                        message, routing_key=queue_name, timeout=self.publish_timeout
+                    )
+                    for message in messages
+                ))
         except Exception as e:
-            logging.error(f"❌ Ошибка: {e}")
+            RABBITMQ_PUBLISH_FAILURES.labels(queue_name).inc()
+            logging.error(f"❌ Ошибка публикации в {queue_name}: {e}")
             raise
+        finally:
+            RABBITMQ_PUBLISH_DURATION.labels(queue_name).observe(time.perf_counter() - started)
+        return len(messages)
 
-    def close(self):
-        """Закрывает соединение."""
-        if self.connection and not self.connection.is_closed:
-            self.connection.close()
+    async def close(self):
+        """Закрывает пул каналов и соединение."""
+        if self.channel_pool is not None:
+            await self.channel_pool.close()
+            self.channel_pool = None
+        if self.connection is not None and not self.connection.is_closed:
+            await self.connection.close()
             print("🔌 Соединение с RabbitMQ закрыто")
+        self.connection = None
 
-    def __enter__(self):
-        """Поддержка контекстного менеджера (with)."""
-        self.connect()
+    async def __aenter__(self):
+        """Поддержка асинхронного контекстного менеджера (async with)."""
+        await self.connect()
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Автоматически закрывает соединение после выхода из with."""
-        self.close()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Автоматически закрывает соединение после выхода из async with."""
+        await self.close()
 
 
 rabbit_producer = RabbitMQProducer(
-    host=settings.COS_RABBITMQ_HOST, port=5672,
-    username=settings.COS_RABBITMQ_USER,
-    password=settings.COS_RABBITMQ_PASSWORD
+    amqp_url=settings.RABBITMQ_URL,
+    channel_pool_size=settings.RABBITMQ_CHANNEL_POOL_SIZE,
+    publish_timeout=settings.RABBITMQ_PUBLISH_TIMEOUT_SECONDS,
 )
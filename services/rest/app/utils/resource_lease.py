@@ -0,0 +1,102 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class LeaseGrant:
+    """Выданная аренда: идентификатор, срок и ресурсы (id, значение)."""
+    lease_id: Optional[str]
+    expires_at: Optional[datetime]
+    items: list[tuple[int, str]]
+
+
+def lease_ttl(ttl_seconds: Optional[int] = None) -> timedelta:
+    """Срок аренды: запрошенный или LEASE_TTL_SECONDS, не больше LEASE_MAX_TTL_SECONDS."""
+    seconds = ttl_seconds or settings.LEASE_TTL_SECONDS
+    return timedelta(seconds=max(min(seconds, settings.LEASE_MAX_TTL_SECONDS), 1))
+
+
+async def acquire_lease(
+    db: AsyncSession,
+    model,
+    value_column,
+    conditions: list,
+    count: int,
+    ttl: timedelta,
+    holder: Optional[str] = None,
+) -> LeaseGrant:
+    """
+    Берём до count свободных ресурсов под новую аренду (без коммита).
+    Строки блокируются с SKIP LOCKED — параллельные воркеры получают разные
+    ресурсы и не ждут друг друга. Первыми выдаются давно не арендованные.
+    """
+    now = datetime.now(timezone.utc)
+    free = or_(model.lease_expires_at.is_(None), model.lease_expires_at <= now)
+    rows = (await db.execute(
+        select(model.id, value_column)
+        .where(*conditions, free)
+        .order_by(model.lease_expires_at.asc().nulls_first(), model.id)
+        .limit(count)
+        .with_for_update(skip_locked=True)
+    )).all()
+    if not rows:
+        return LeaseGrant(lease_id=None, expires_at=None, items=[])
+
+    lease_id = uuid.uuid4().hex
+    expires_at = now + ttl
+    await db.execute(
+        update(model)
+        .where(model.id.in_([row[0] for row in rows]))
+        .values(
+            lease_id=lease_id,
+            leased_by=holder,
+            lease_expires_at=expires_at,
+            updated_at=model.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return LeaseGrant(lease_id=lease_id, expires_at=expires_at, items=[tuple(row) for row in rows])
+
+
+async def renew_lease(
+    db: AsyncSession,
+    model,
+    lease_id: str,
+    ttl: timedelta,
+) -> tuple[int, Optional[datetime]]:
+    """
+    Продлеваем аренду (без коммита). Ресурсы, которые после истечения срока
+    успели выдать другому, в аренду не возвращаются. Возвращаем (сколько продлено, новый срок).
+    """
+    expires_at = datetime.now(timezone.utc) + ttl
+    result = await db.execute(
+        update(model)
+        .where(model.lease_id == lease_id)
+        .values(lease_expires_at=expires_at, updated_at=model.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    renewed = result.rowcount or 0
+    return renewed, expires_at if renewed else None
+
+
+async def release_lease(db: AsyncSession, model, lease_id: str) -> int:
+    """Возвращаем ресурсы аренды (без коммита); они уходят в конец очереди выдачи."""
+    result = await db.execute(
+        update(model)
+        .where(model.lease_id == lease_id)
+        .values(
+            lease_id=None,
+            leased_by=None,
+            lease_expires_at=datetime.now(timezone.utc),
+            updated_at=model.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
@@ -78,6 +78,7 @@
 #             print(f"❌ Ошибка в задаче {task_id}: {e}")
 
 import asyncio
+import math
 from collections import deque
 from datetime import datetime, timedelta, timezone
 from typing import Optional
@@ -85,15 +86,61 @@ from zoneinfo import ZoneInfo
 
 from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import select
+from sqlalchemy import or_, select, text
 
+from app.core.config import settings
 from app.core.db import SessionLocal
-from app.models.account import Account
 from app.models.channel import Channel, ChannelType
-from app.models.proxy import Proxy
+from app.models.videos import VelocityTier
+from app.utils.dispatch_snapshot import dispatch_snapshot_cache, has_active_accounts
 from app.utils.rabbitmq_producer import rabbit_producer
+from app.utils.scheduling_lanes import (
+    channel_offsets,
+    daily_due_offsets,
+    describe_lane_plan,
+    lane_capacities,
+    plan_lanes,
+    plan_rolling_lanes,
+    rolling_due_offset,
+    wave_window_minutes,
+)
+from app.utils.video_velocity import (
+    HOT_VIDEO_CHANNEL_TYPES,
+    load_hot_videos,
+    refresh_velocity_tiers,
+)
+from app.utils.slot_allocator import (
+    SlotGrid,
+    allocate_lane_slot,
+    changed_slots,
+    daily_slot_grid,
+    rebuild_lane_slots,
+    release_channel_slots,
+    rolling_slot_grid,
+    save_channel_slots,
+)
+from app.utils.scheduler_state import (
+    WAVE_DISPATCH_CURSOR,
+    BatchLockState,
+    acquire_batch_lock,
+    claim_pending_tasks,
+    count_pending_tasks,
+    defer_channel_tasks,
+    delete_pending_tasks,
+    get_batch_lock,
+    get_cursor,
+    release_batch_lock,
+    save_cursor,
+)
 
 MOSCOW_TZ = ZoneInfo("Europe/Moscow")
+# Ежедневные слоты волн (минуты от полуночи, мск): 12:00 и 21:00
+DAILY_SLOT_MINUTES = (12 * 60, 21 * 60)
+MINUTES_PER_DAY = 24 * 60
+# Стратегии расписания (settings.SCHEDULE_STRATEGY)
+SCHEDULE_STRATEGY_DAILY = "daily"
+SCHEDULE_STRATEGY_ROLLING = "rolling"
+SCHEDULE_STRATEGY_CICD = "cicd"
 CI_CD_START_DELAY_MINUTES = 7
 CI_CD_STEP_MINUTES = 7
 CI_CD_TYPE_PRIORITY = [
@@ -103,13 +150,33 @@ CI_CD_TYPE_PRIORITY = [
     ChannelType.INSTAGRAM,
 ]
 
-scheduler = AsyncIOScheduler(timezone=MOSCOW_TZ)
+
+
+def _create_scheduler() -> AsyncIOScheduler:
+    """Планировщик; задачи хранятся в PostgreSQL и переживают рестарт."""
+    jobstores = {}
+    if settings.SCHEDULER_PERSISTENT_JOBS:
+        from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+
+        # Хранилище APScheduler синхронное — подключаемся обычным драйвером
+        url = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+        jobstores["default"] = SQLAlchemyJobStore(url=url, tablename="apscheduler_jobs")
+    return AsyncIOScheduler(timezone=MOSCOW_TZ, jobstores=jobstores)
+
+
+scheduler = _create_scheduler()
 INSTAGRAM_BATCH_JOB_ID = "instagram_batch_job"
+WAVE_DISPATCHER_JOB_ID = "wave_dispatcher"
+VIDEO_TIERS_JOB_ID = "video_tiers_job"
+HOT_VIDEOS_JOB_ID = "hot_videos_job"
+HISTORY_PARTITIONS_JOB_ID = "video_history_partitions_job"
+INSTAGRAM_BATCH_WATCHDOG_JOB_ID = "instagram_batch_watchdog_job"
 INSTAGRAM_BATCH_LOCK_TIMEOUT_MINUTES = 120
-_instagram_batch_active = False
-_instagram_batch_id: Optional[str] = None
-_instagram_batch_started_at: Optional[datetime] = None
-_pending_tasks_after_batch: dict[int, tuple[int, Optional[int], Optional[str]]] = {}
+# Последнее прочитанное этим процессом состояние batch — для метрик
+_batch_state_seen = BatchLockState(active=False)
+_pending_tasks_seen = 0
+# Каналы одного слота (offset, anchor), собираемые в волну
+_wave_buffers: dict[tuple[Optional[int], Optional[str]], set[int]] = {}
 
 
 def _remove_instagram_batch_job():
@@ -146,267 +213,599 @@ def _compute_time_slots(offset_minutes: int) -> tuple[list[int], int]:
     if offset_minutes < 0:
         offset_minutes = 0
 
-    morning_total = 12 * 60 + offset_minutes
+    morning_total = DAILY_SLOT_MINUTES[0] + offset_minutes
     morning_hour = (morning_total // 60) % 24
     minute = morning_total % 60
 
-    evening_total = 21 * 60 + offset_minutes
+    evening_total = DAILY_SLOT_MINUTES[1] + offset_minutes
     evening_hour = (evening_total // 60) % 24
 
     hours = sorted({morning_hour, evening_hour})
     return hours, minute
 
 
-def _mark_instagram_batch_state(active: bool, batch_id: Optional[str] = None):
-    """Отмечаем состояние Instagram batch."""
-    global _instagram_batch_active, _instagram_batch_id, _instagram_batch_started_at
-    _instagram_batch_active = active
-    if active:
-        _instagram_batch_id = batch_id
-        _instagram_batch_started_at = datetime.now(timezone.utc)
-    else:
-        _instagram_batch_id = None
-        _instagram_batch_started_at = None
+def _remember_batch_state(state: BatchLockState, pending: Optional[int] = None):
+    """Запоминаем состояние batch для метрик."""
+    global _batch_state_seen, _pending_tasks_seen
+    _batch_state_seen = state
+    if pending is not None:
+        _pending_tasks_seen = pending
 
 
-def _queue_after_batch(
-    task_id: int,
-    schedule_offset_minutes: Optional[int],
-    schedule_wave_anchor: Optional[str],
-) -> None:
-    """
-    Сохраняем задачу, которую нужно отправить после окончания Instagram batch.
-    Используем словарь, чтобы не плодить дубликаты по channel_id.
-    """
-    _pending_tasks_after_batch[task_id] = (
-        task_id,
-        schedule_offset_minutes,
-        schedule_wave_anchor,
-    )
+def get_last_seen_batch_state() -> tuple[bool, Optional[str], Optional[datetime], int]:
+    """Состояние batch на момент последнего чтения из БД (без запроса)."""
+    state = _batch_state_seen
+    return state.active, state.batch_id, state.started_at, _pending_tasks_seen
 
 
-def _dispatch_pending_after_batch() -> int:
+async def _queue_after_batch(entries: list[tuple[int, Optional[int], Optional[str]]]) -> None:
     """
-    Запускает отложенные задачи, накопленные во время активного Instagram batch.
-    Возвращает число успешно добавленных джобов.
+    Сохраняем в БД задачи, которые нужно отправить после окончания Instagram batch.
+    Повтор канала обновляет запись, дубликатов по channel_id нет.
     """
-    if not _pending_tasks_after_batch:
-        return 0
-
-    pending = list(_pending_tasks_after_batch.values())
-    _pending_tasks_after_batch.clear()
+    async with SessionLocal() as session:
+        await defer_channel_tasks(session, entries)
+        await session.commit()
+        _remember_batch_state(_batch_state_seen, await count_pending_tasks(session))
 
-    now = datetime.now(MOSCOW_TZ)
-    dispatched = 0
 
-    for task_id, schedule_offset_minutes, schedule_wave_anchor in pending:
-        run_at = now + timedelta(seconds=1 + dispatched)
-        job_id = f"deferred_task_{task_id}_{int(run_at.timestamp())}"
-        try:
-            scheduler.add_job(
-                func=process_recurring_task,
-                trigger="date",
-                run_date=run_at,
-                args=[task_id, "channel"],
-                kwargs={
-                    "schedule_offset_minutes": schedule_offset_minutes,
-                    "schedule_wave_anchor": schedule_wave_anchor,
-                },
-                id=job_id,
-                replace_existing=False,
-                max_instances=1,
-                coalesce=True,
+async def dispatch_pending_after_batch() -> int:
+    """
+    Отправляет задачи, отложенные во время Instagram batch, волнами по слотам.
+    Строки удаляются в той же транзакции после публикации: при падении
+    процесса они останутся в БД и уйдут со следующей попытки.
+    Возвращает число отправленных задач.
+    """
+    async with SessionLocal() as session:
+        if (await get_batch_lock(session)).active:
+            return 0
+        pending = await claim_pending_tasks(session)
+        if not pending:
+            return 0
+
+        waves: dict[tuple[Optional[int], Optional[str]], list[int]] = {}
+        for task in pending:
+            waves.setdefault(
+                (task.schedule_offset_minutes, task.schedule_wave_anchor), []
+            ).append(task.channel_id)
+
+        dispatched: list[int] = []
+        failed: list[int] = []
+        for (schedule_offset_minutes, schedule_wave_anchor), channel_ids in waves.items():
+            sent, held = await _dispatch_channels(
+                channel_ids,
+                schedule_offset_minutes=schedule_offset_minutes,
+                schedule_wave_anchor=schedule_wave_anchor,
+                respect_batch=False,
             )
-            dispatched += 1
-        except Exception as exc:
-            print(f"⚠️ Не удалось добавить отложенную задачу {task_id}: {exc}")
+            failed.extend(held)
+            dispatched.extend(channel_id for channel_id in channel_ids if channel_id not in held)
+        await delete_pending_tasks(session, dispatched)
+        await session.commit()
+        _remember_batch_state(BatchLockState(active=False), len(failed))
 
     if dispatched:
-        print(f"▶️ Запущено {dispatched} отложенных задач после завершения Instagram batch.")
-    return dispatched
+        print(
+            f"▶️ Отправлено {len(dispatched)} отложенных задач ({len(waves)} волн) "
+            f"после завершения Instagram batch."
+        )
+    if failed:
+        print(f"⚠️ Не удалось отправить отложенные задачи {failed}, повторим позже.")
+    return len(dispatched)
 
 
-def is_instagram_batch_active() -> bool:
+async def is_instagram_batch_active() -> bool:
     """Проверяем, активен ли Instagram batch."""
-    return _instagram_batch_active
+    active, _, _ = await get_instagram_batch_state()
+    return active
 
 
-def get_instagram_batch_state() -> tuple[bool, Optional[str], Optional[datetime]]:
+async def get_instagram_batch_state() -> tuple[bool, Optional[str], Optional[datetime]]:
     """Получаем состояние Instagram batch."""
-    return _instagram_batch_active, _instagram_batch_id, _instagram_batch_started_at
+    async with SessionLocal() as session:
+        state = await get_batch_lock(session)
+    _remember_batch_state(state)
+    return state.active, state.batch_id, state.started_at
 
 
-def release_instagram_batch(batch_id: Optional[str] = None) -> bool:
-    """Освобождаем Instagram batch."""
-    active, current_batch_id, _ = get_instagram_batch_state()
-    if not active:
-        return False
-    if batch_id and current_batch_id and batch_id != current_batch_id:
+async def release_instagram_batch(batch_id: Optional[str] = None) -> bool:
+    """Освобождаем Instagram batch и отправляем отложенные задачи."""
+    async with SessionLocal() as session:
+        released = await release_batch_lock(session, batch_id)
+        await session.commit()
+    if released is None:
         return False
-    _mark_instagram_batch_state(False)
+    _remember_batch_state(BatchLockState(active=False))
     print("ℹ️ Instagram batch lock released.")
-    _dispatch_pending_after_batch()
+    await dispatch_pending_after_batch()
     return True
 
 
-async def _auto_release_instagram_batch(batch_id: str):
-    """Автоматически освобождаем Instagram batch по таймауту."""
-    await asyncio.sleep(max(1, INSTAGRAM_BATCH_LOCK_TIMEOUT_MINUTES * 60))
-    active, current_batch_id, _ = get_instagram_batch_state()
-    if active and current_batch_id == batch_id:
-        print("⚠️ Авто-сброс блокировки Instagram batch по таймауту.")
-        _mark_instagram_batch_state(False)
-        _dispatch_pending_after_batch()
+async def instagram_batch_watchdog():
+    """
+    Раз в минуту: снимаем просроченную блокировку Instagram batch
+    и дотправляем отложенные задачи, если batch уже не активен.
+    """
+    async with SessionLocal() as session:
+        expired = await release_batch_lock(session, expired_only=True)
+        await session.commit()
+        state = await get_batch_lock(session)
+        _remember_batch_state(state, await count_pending_tasks(session))
+    if expired:
+        print(f"⚠️ Авто-сброс блокировки Instagram batch {expired} по таймауту.")
+    if not state.active and _pending_tasks_seen:
+        await dispatch_pending_after_batch()
+
+
+def schedule_instagram_batch_watchdog_job() -> None:
+    """Планируем сторож блокировки Instagram batch."""
+    scheduler.add_job(
+        func=instagram_batch_watchdog,
+        trigger="interval",
+        minutes=1,
+        id=INSTAGRAM_BATCH_WATCHDOG_JOB_ID,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=60,
+        replace_existing=True,
+    )
+
+
+async def refresh_video_tiers():
+    """Пересчитываем скорость просмотров и уровни видео/каналов."""
+    try:
+        async with SessionLocal() as db:
+            counts = await refresh_velocity_tiers(db)
+            await db.commit()
+    except Exception as e:
+        print(f"❌ Ошибка пересчёта уровней видео: {e}")
+        return
+    print(
+        "🌡 Уровни видео: "
+        + ", ".join(f"{tier.value} {counts.get(tier, 0)}" for tier in VelocityTier)
+    )
+
+
+async def dispatch_hot_videos() -> int:
+    """
+    Дополнительное обновление горячих видео между волнами: задачи "video"
+    для VIDEO_HOT_MAX_TASKS самых быстрых видео. Пока идёт Instagram batch — пропускаем.
+    """
+    if await is_instagram_batch_active():
+        print("⏸ Instagram batch активен — обновление горячих видео пропущено")
+        return 0
+    try:
+        async with SessionLocal() as db:
+            videos = await load_hot_videos(db, max(settings.VIDEO_HOT_MAX_TASKS, 0))
+            snapshot = await dispatch_snapshot_cache.for_tasks(db) if videos else None
+    except Exception as e:
+        print(f"❌ Ошибка выборки горячих видео: {e}")
+        return 0
+    if not videos:
+        return 0
+
+    parse_started_at = datetime.now(MOSCOW_TZ).isoformat()
+    tasks_by_queue: dict[str, list[dict]] = {}
+    for video in videos:
+        tasks_by_queue.setdefault(f"parsing_{video.channel_type.value.lower()}", []).append({
+            "type": "video",
+            "user_id": video.user_id,
+            "url": video.link,
+            "channel_id": video.channel_id,
+            "video_id": video.id,
+            **snapshot.task_resources(video.channel_type),
+            "parse_started_at": parse_started_at,
+        })
+
+    chunk_size = max(settings.WAVE_DISPATCH_CHUNK_SIZE, 1)
+    pace = max(settings.WAVE_DISPATCH_PACE_MS, 0) / 1000
+    sent = 0
+    for queue_name, tasks in tasks_by_queue.items():
+        for start in range(0, len(tasks), chunk_size):
+            try:
+                sent += await rabbit_producer.send_tasks(queue_name, tasks[start:start + chunk_size])
+            except Exception as e:
+                print(f"❌ Ошибка отправки горячих видео в {queue_name}: {e}")
+            if pace:
+                await asyncio.sleep(pace)
+    print(f"🔥 Отправлено {sent} задач обновления горячих видео")
+    return sent
+
+
+def schedule_velocity_jobs() -> None:
+    """
+    Планируем пересчёт уровней видео и обновление горячих видео
+    (последнее — только если есть парсеры, принимающие задачи "video").
+    """
+    scheduler.add_job(
+        func=refresh_video_tiers,
+        trigger="interval",
+        minutes=max(settings.VIDEO_TIER_REFRESH_MINUTES, 1),
+        id=VIDEO_TIERS_JOB_ID,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=600,
+        replace_existing=True,
+    )
+    if not HOT_VIDEO_CHANNEL_TYPES:
+        # Задание могло остаться в хранилище заданий от прежнего запуска
+        try:
+            scheduler.remove_job(HOT_VIDEOS_JOB_ID)
+        except JobLookupError:
+            pass
+        return
+    scheduler.add_job(
+        func=dispatch_hot_videos,
+        trigger="interval",
+        minutes=max(settings.VIDEO_HOT_REFRESH_MINUTES, 1),
+        id=HOT_VIDEOS_JOB_ID,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=600,
+        replace_existing=True,
+    )
 
 
 def _normalize_parse_started_at(
     now: datetime,
     schedule_offset_minutes: Optional[int],
     schedule_wave_anchor: Optional[str],
+    scheduled_at: Optional[datetime] = None,
 ) -> datetime:
     """
     Возвращает скорректированное время начала парсинга.
     Для ежедневного расписания (wave_anchor == "daily") учитывает смещение,
     чтобы у каналов, перенесённых за полночь из-за offset, оставалась дата исходного слота.
+    Для непрерывного (wave_anchor == "rolling") — дата запланированного запуска.
+    Слот определяется по scheduled_at (минута диспетчера волн), а не по now,
+    поэтому догоняемые минуты и порции с паузой попадают в ту же дату.
     """
-    if schedule_wave_anchor != "daily" or schedule_offset_minutes is None:
+    if schedule_offset_minutes is None:
+        return now
+    scheduled = scheduled_at or now
+    if schedule_wave_anchor == "rolling":
+        period = rolling_period_minutes()
+        midnight = scheduled.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (scheduled - midnight).total_seconds() / 60 - schedule_offset_minutes
+        planned = midnight + timedelta(
+            minutes=schedule_offset_minutes + math.floor(elapsed / period) * period
+        )
+        slot_date = planned.date()
+    elif schedule_wave_anchor == "daily":
+        morning_total = DAILY_SLOT_MINUTES[0] + schedule_offset_minutes
+        evening_total = DAILY_SLOT_MINUTES[1] + schedule_offset_minutes
+        slot_date = scheduled.date()
+        if scheduled.minute == morning_total % 60:
+            for total_minutes in (morning_total, evening_total):
+                if scheduled.hour == (total_minutes // 60) % 24:
+                    slot_date = (scheduled - timedelta(days=total_minutes // 1440)).date()
+                    break
+    else:
         return now
 
-    morning_total = 12 * 60 + schedule_offset_minutes
-    evening_total = 21 * 60 + schedule_offset_minutes
-    expected_minute = morning_total % 60
+    day_shift = (now.date() - slot_date).days
+    return now - timedelta(days=day_shift) if day_shift else now
 
-    if now.minute != expected_minute:
-        return now
 
-    schedule_points = (
-        (morning_total, (morning_total // 60) % 24),
-        (evening_total, (evening_total // 60) % 24),
+def dispatch_channel_now(channel_id: int, offset_minutes: int = 0) -> bool:
+    """
+    Немедленно отправляем задачу нового канала, не дожидаясь его слота.
+    Дальше канал подхватывает диспетчер волн по сохранённому смещению.
+    """
+    wave_anchor = "rolling" if settings.SCHEDULE_STRATEGY == SCHEDULE_STRATEGY_ROLLING else "daily"
+    try:
+        loop = asyncio.get_running_loop()
+        loop.create_task(
+            process_recurring_task(
+                channel_id,
+                "channel",
+                schedule_offset_minutes=offset_minutes,
+                schedule_wave_anchor=wave_anchor,
+            )
+        )
+        return True
+    except RuntimeError:
+        print(f"⚠️ Не удалось инициировать немедленный запуск для канала {channel_id}: нет активного цикла событий")
+        return False
+
+
+def rolling_period_minutes() -> int:
+    """
+    Период обновления канала в непрерывном режиме. Период должен делить сутки,
+    чтобы фазы каждый день повторялись в одно и то же время.
+    """
+    period = min(max(settings.SCHEDULE_ROLLING_PERIOD_MINUTES, 1), MINUTES_PER_DAY)
+    if MINUTES_PER_DAY % period:
+        divisors = [d for d in range(1, MINUTES_PER_DAY + 1) if MINUTES_PER_DAY % d == 0]
+        period = min(divisors, key=lambda divisor: (abs(divisor - period), divisor))
+    return period
+
+
+async def ensure_history_partitions():
+    """Создаём месячные секции video_history на HISTORY_PARTITIONS_AHEAD месяцев вперёд."""
+    async with SessionLocal() as session:
+        await session.execute(
+            text("SELECT ensure_video_history_partitions(:months_ahead)"),
+            {"months_ahead": settings.HISTORY_PARTITIONS_AHEAD},
+        )
+        await session.commit()
+    print(f"✅ Секции video_history созданы на {settings.HISTORY_PARTITIONS_AHEAD} мес. вперёд")
+
+
+def schedule_history_partitions_job() -> None:
+    """Ежедневно проверяем наличие будущих секций video_history."""
+    scheduler.add_job(
+        func=ensure_history_partitions,
+        trigger="cron",
+        hour=3,
+        minute=0,
+        id=HISTORY_PARTITIONS_JOB_ID,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
+        replace_existing=True,
     )
 
-    for total_minutes, expected_hour in schedule_points:
-        if now.hour == expected_hour:
-            day_shift = total_minutes // 1440
-            if day_shift:
-                return now - timedelta(days=day_shift)
-            return now
-    return now
-
-
-def schedule_channel_task(
-    channel_id: int,
-    *,
-    run_immediately: bool = False,
-    offset_minutes: int = 0,
-) -> bool:
-    """Планируем задачу парсинга для канала."""
-    hours, minute = _compute_time_slots(offset_minutes)
-    hour_expr = ",".join(str(h) for h in hours)
-    job_id = f"task_{channel_id}"
-    job = scheduler.add_job(
-        func=process_recurring_task,
+
+async def restore_scheduled_tasks():
+    """
+    Точка выбора расписания (settings.SCHEDULE_STRATEGY):
+    daily — две волны 12:00 и 21:00 по полосам платформ,
+    rolling — каждый канал раз в SCHEDULE_ROLLING_PERIOD_MINUTES, фазы равномерно по суткам,
+    cicd — очередь CI/CD с шагом 7 минут.
+    daily и rolling обслуживает одна задача — диспетчер волн; задачи каналов
+    прежних версий и другой стратегии, оставшиеся в хранилище, удаляются.
+    """
+    strategy = settings.SCHEDULE_STRATEGY
+    if strategy == SCHEDULE_STRATEGY_CICD:
+        _remove_job(WAVE_DISPATCHER_JOB_ID)
+        _remove_jobs_with_prefix("task_")
+        await restore_scheduled_tasks_cicd()
+        return
+    _remove_jobs_with_prefix("cicd_task_")
+    _remove_jobs_with_prefix("task_")
+
+    if strategy == SCHEDULE_STRATEGY_ROLLING:
+        period = rolling_period_minutes()
+        if period != settings.SCHEDULE_ROLLING_PERIOD_MINUTES:
+            print(
+                f"⚠️ Период {settings.SCHEDULE_ROLLING_PERIOD_MINUTES} мин не делит сутки, "
+                f"используем {period} мин"
+            )
+
+    await backfill_channel_offsets()
+    schedule_wave_dispatcher_job()
+    # Регистрация Instagram-аккаунтов дорогая — Instagram остаётся пакетным
+    schedule_instagram_batch_job(offset_minutes=0)
+
+
+def _remove_job(job_id: str):
+    """Удаляем задачу, если она есть."""
+    try:
+        scheduler.remove_job(job_id)
+    except JobLookupError:
+        pass
+
+
+def _remove_jobs_with_prefix(prefix: str):
+    """Удаляем задачи каналов, запланированные другой стратегией или прежней версией."""
+    for job in scheduler.get_jobs():
+        if job.id.startswith(prefix):
+            scheduler.remove_job(job.id)
+
+
+def schedule_wave_dispatcher_job() -> None:
+    """Одна задача на все каналы: каждую минуту отправляем каналы, чьё смещение наступило."""
+    scheduler.add_job(
+        func=dispatch_due_channels,
         trigger="cron",
-        hour=hour_expr,
-        minute=minute,
-        args=[channel_id, "channel"],
-        kwargs={
-            "schedule_offset_minutes": offset_minutes,
-            "schedule_wave_anchor": "daily",
-        },
-        id=job_id,
+        minute="*",
+        id=WAVE_DISPATCHER_JOB_ID,
         max_instances=1,
         coalesce=True,
-        misfire_grace_time=600,
+        misfire_grace_time=60,
         replace_existing=True,
     )
-    immediate_dispatched = False
-    next_run = getattr(job, "next_run_time", None)
-    if next_run is None:
-        next_run = getattr(job, "next_fire_time", None)
-    if next_run is None:
-        try:
-            now = datetime.now(MOSCOW_TZ)
-            next_run = job.trigger.get_next_fire_time(None, now)
-        except Exception:
-            next_run = None
-    slots_display = ", ".join(f"{h:02d}:{minute:02d}" for h in hours)
+    print("✅ Диспетчер волн запланирован: каждую минуту")
 
-    if next_run:
-        next_run_local = (
-            next_run.astimezone(MOSCOW_TZ)
-            if next_run.tzinfo
-            else next_run.replace(tzinfo=MOSCOW_TZ)
-        )
-        print(
-            f"✅ Задача {channel_id} запланирована: следующий запуск "
-            f"{next_run_local.strftime('%d.%m %H:%M')} (мск), далее ежедневно по слотам {slots_display}"
-        )
-    else:
-        print(
-            f"✅ Задача {channel_id} запланирована ежедневно по слотам {slots_display} (мск)"
-        )
 
-    if run_immediately:
-        try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(
-                process_recurring_task(
-                    channel_id,
-                    "channel",
-                    schedule_offset_minutes=offset_minutes,
-                    schedule_wave_anchor="daily",
+def _due_slots(minute: datetime) -> list[tuple[int, str, bool]]:
+    """
+    (смещение, якорь, брать ли холодные каналы) для этой минуты. Холодные
+    каналы обновляются раз в сутки: волной 12:00 или первым проходом rolling.
+    """
+    minute_of_day = minute.hour * 60 + minute.minute
+    if settings.SCHEDULE_STRATEGY == SCHEDULE_STRATEGY_ROLLING:
+        period = rolling_period_minutes()
+        return [(rolling_due_offset(minute_of_day, period), "rolling", minute_of_day < period)]
+    return [
+        (offset, "daily", slot == DAILY_SLOT_MINUTES[0])
+        for slot, offset in daily_due_offsets(minute_of_day, DAILY_SLOT_MINUTES)
+    ]
+
+
+async def _due_channel_chunks(offset: int, chunk_size: int, include_cold: bool = True):
+    """Каналы с данным смещением порциями по id — без загрузки всей таблицы."""
+    conditions = [
+        Channel.schedule_offset_minutes == offset,
+        Channel.type != ChannelType.INSTAGRAM,
+    ]
+    if not include_cold:
+        conditions.append(or_(
+            Channel.velocity_tier.is_(None),
+            Channel.velocity_tier != VelocityTier.COLD,
+        ))
+    last_id = 0
+    while True:
+        async with SessionLocal() as db:
+            channel_ids = (await db.execute(
+                select(Channel.id)
+                .where(*conditions, Channel.id > last_id)
+                .order_by(Channel.id)
+                .limit(chunk_size)
+            )).scalars().all()
+        if not channel_ids:
+            return
+        yield channel_ids
+        if len(channel_ids) < chunk_size:
+            return
+        last_id = channel_ids[-1]
+
+
+async def dispatch_due_channels() -> int:
+    """
+    Диспетчер волн: разбираем минуты после сохранённой в БД позиции (не больше
+    WAVE_DISPATCH_CATCHUP_MINUTES назад) и отправляем наступившие каналы
+    порциями по WAVE_DISPATCH_CHUNK_SIZE с паузой WAVE_DISPATCH_PACE_MS.
+    Позиция сдвигается после каждой минуты, поэтому новый ведущий после
+    переключения продолжает с первой неразобранной минуты.
+    """
+    now = datetime.now(MOSCOW_TZ).replace(second=0, microsecond=0)
+    earliest = now - timedelta(minutes=max(settings.WAVE_DISPATCH_CATCHUP_MINUTES, 0))
+    async with SessionLocal() as db:
+        cursor = await get_cursor(db, WAVE_DISPATCH_CURSOR)
+    if cursor is None:
+        minute = now
+    else:
+        minute = max(cursor.astimezone(MOSCOW_TZ) + timedelta(minutes=1), earliest)
+
+    chunk_size = max(settings.WAVE_DISPATCH_CHUNK_SIZE, 1)
+    pace = max(settings.WAVE_DISPATCH_PACE_MS, 0) / 1000
+    sent = 0
+    while minute <= now:
+        for offset, anchor, include_cold in _due_slots(minute):
+            async for channel_ids in _due_channel_chunks(offset, chunk_size, include_cold):
+                sent += await dispatch_wave(
+                    channel_ids,
+                    schedule_offset_minutes=offset,
+                    schedule_wave_anchor=anchor,
+                    scheduled_at=minute,
                 )
-            )
-            immediate_dispatched = True
-        except RuntimeError:
-            print(f"⚠️ Не удалось инициировать немедленный запуск для канала {channel_id}: нет активного цикла событий")
+                if pace:
+                    await asyncio.sleep(pace)
+        async with SessionLocal() as db:
+            await save_cursor(db, minute, WAVE_DISPATCH_CURSOR)
+            await db.commit()
+        minute += timedelta(minutes=1)
+    return sent
 
-    return immediate_dispatched
 
+def _offset_limit() -> Optional[int]:
+    """Верхняя граница смещения для текущей стратегии; None — без ограничения."""
+    if settings.SCHEDULE_STRATEGY == SCHEDULE_STRATEGY_ROLLING:
+        return rolling_period_minutes()
+    if settings.SCHEDULE_LANE_AUTO_COMPRESS:
+        return wave_window_minutes(DAILY_SLOT_MINUTES)
+    return None
 
-async def restore_scheduled_tasks():
+
+async def backfill_channel_offsets() -> int:
     """
-    Точка выбора расписания.
-    Держите активным только один из вариантов ниже (раскомментируйте нужный).
+    Полный план нужен, только если у каналов нет смещения (до миграции) или оно
+    не подходит текущей стратегии (её сменили) — иначе старт не читает каналы.
     """
-    # --- Ежедневная очередь 05:00 и 20:00 ---
-    await _restore_scheduled_tasks_daily()
+    stale = Channel.schedule_offset_minutes.is_(None)
+    limit = _offset_limit()
+    if limit is not None:
+        stale = or_(stale, Channel.schedule_offset_minutes >= limit)
+    async with SessionLocal() as session:
+        missing = (await session.execute(
+            select(Channel.id)
+            .where(stale, Channel.type != ChannelType.INSTAGRAM)
+            .limit(1)
+        )).first()
+    if missing is None:
+        return 0
+    return await rebalance_channel_offsets()
 
 
-async def _restore_scheduled_tasks_daily():
-    """При старте восстанавливает ежедневное расписание (05:00 и 20:00 мск) для всех каналов."""
+async def rebalance_channel_offsets() -> int:
+    """
+    Полный перерасчёт смещений всех каналов по полосам (после смены стратегии
+    или пропускной способности). Возвращает число каналов с новым смещением.
+    """
     async with SessionLocal() as session:
-        result = await session.execute(select(Channel))
-        channels = result.scalars().all()
+        channels = (await session.execute(
+            select(Channel.id, Channel.type, Channel.created_at, Channel.schedule_offset_minutes)
+        )).all()
+    changed = await _store_channel_offsets(channels, plan_channel_offsets(channels))
+    print(f"🔁 Смещения каналов пересчитаны: изменено {changed} из {len(channels)}")
+    return changed
 
-    if not channels:
-        _remove_instagram_batch_job()
-        return
 
-    def _sort_key(task: Channel):
-        """Ключ для сортировки каналов."""
-        return (
-            task.created_at or datetime.min.replace(tzinfo=timezone.utc),
-            task.id,
+def plan_channel_lanes(channels: list[Channel]):
+    """
+    Раскладываем каналы (кроме Instagram — у него batch) по полосам платформ:
+    внутри окна между слотами (daily) или равномерно по периоду (rolling).
+    Предупреждаем о перегруженных полосах.
+    """
+    channels = [channel for channel in channels if channel.type != ChannelType.INSTAGRAM]
+    if settings.SCHEDULE_STRATEGY == SCHEDULE_STRATEGY_ROLLING:
+        plans = plan_rolling_lanes(channels, lane_capacities(), rolling_period_minutes())
+    else:
+        plans = plan_lanes(
+            channels,
+            lane_capacities(),
+            wave_window_minutes(DAILY_SLOT_MINUTES),
+            auto_compress=settings.SCHEDULE_LANE_AUTO_COMPRESS,
         )
-
-    instagram_channels = sorted(
-        [channel for channel in channels if channel.type == ChannelType.INSTAGRAM],
-        key=_sort_key,
-    )
-    other_channels = sorted(
-        [channel for channel in channels if channel.type != ChannelType.INSTAGRAM],
-        key=_sort_key,
+    for plan in plans.values():
+        warning = describe_lane_plan(plan)
+        if warning:
+            print(warning)
+    return plans
+
+
+def plan_channel_offsets(channels: list[Channel]) -> dict[int, int]:
+    """Смещения (фазы) каналов для выбранной стратегии расписания."""
+    return channel_offsets(plan_channel_lanes(channels))
+
+
+def _slot_grid(channel_type: ChannelType) -> SlotGrid:
+    """Сетка слотов полосы для выдачи смещений новым каналам по текущей стратегии."""
+    step = lane_capacities()[channel_type].step_minutes
+    if settings.SCHEDULE_STRATEGY == SCHEDULE_STRATEGY_ROLLING:
+        return rolling_slot_grid(rolling_period_minutes(), step)
+    return daily_slot_grid(
+        wave_window_minutes(DAILY_SLOT_MINUTES),
+        step,
+        extendable=not settings.SCHEDULE_LANE_AUTO_COMPRESS,
     )
 
-    for index, channel in enumerate(other_channels):
-        offset = index * 5
-        schedule_channel_task(channel.id, offset_minutes=offset)
 
-    if instagram_channels:
-        schedule_instagram_batch_job(offset_minutes=0)
-    else:
-        _remove_instagram_batch_job()
+async def _store_channel_offsets(channels, offsets: dict[int, int]) -> int:
+    """Сохраняем смещения полного плана в каналы и пересобираем занятость полос."""
+    changed = changed_slots(channels, offsets)
+    if changed:
+        async with SessionLocal() as session:
+            await save_channel_slots(session, changed)
+            await rebuild_lane_slots(session, settings.SCHEDULER_SLOT_LOCK_KEY)
+            await session.commit()
+    return len(changed)
+
+
+async def allocate_channel_offset(
+    db,
+    channel: Channel,
+    previous: Optional[tuple[ChannelType, Optional[int]]] = None,
+) -> int:
+    """
+    Смещение нового или перенесённого в другую полосу канала; коммитим его сразу.
+    previous — прежние полоса и смещение канала, их слот освобождается.
+    """
+    released = [previous] if previous else []
+    if channel.type == ChannelType.INSTAGRAM:
+        if released:
+            await release_channel_slots(db, released, settings.SCHEDULER_SLOT_LOCK_KEY)
+            channel.schedule_offset_minutes = None
+            await db.commit()
+        return 0
+    offset = await allocate_lane_slot(
+        db, channel, _slot_grid(channel.type), settings.SCHEDULER_SLOT_LOCK_KEY, released=released
+    )
+    channel.schedule_offset_minutes = offset
+    await db.commit()
+    return offset
 
 
 def _round_robin_channels(channels: list[Channel]) -> list[Channel]:
@@ -498,59 +897,136 @@ async def process_recurring_task(
     schedule_offset_minutes: Optional[int] = None,
     schedule_wave_anchor: Optional[str] = None,
 ):
-    """Отправляет задачу парсинга с актуальными данными из БД."""
-    async with SessionLocal() as db:
+    """
+    Ставит канал в волну своего слота. Задачи, сработавшие в одном слоте
+    в течение WAVE_COALESCE_MS, отправляются одним dispatch_wave.
+    """
+    key = (schedule_offset_minutes, schedule_wave_anchor)
+    wave = _wave_buffers.get(key)
+    if wave is not None:
+        wave.add(task_id)
+        return
+
+    _wave_buffers[key] = {task_id}
+    try:
+        await asyncio.sleep(max(settings.WAVE_COALESCE_MS, 0) / 1000)
+    finally:
+        channel_ids = _wave_buffers.pop(key, set())
+    await dispatch_wave(
+        channel_ids,
+        schedule_offset_minutes=schedule_offset_minutes,
+        schedule_wave_anchor=schedule_wave_anchor,
+    )
+
+
+def _remove_channel_jobs(channel_id: int):
+    """Удаляем задачи расписания удалённого канала."""
+    for job_id in (f"task_{channel_id}", f"cicd_task_{channel_id}"):
         try:
-            channel = (await db.execute(select(Channel).where(Channel.id == task_id))).scalar()
-            if not channel:
-                for job_id in (f"task_{task_id}", f"cicd_task_{task_id}"):
-                    try:
-                        scheduler.remove_job(job_id)
-                    except JobLookupError:
-                        continue
-                return
-
-            if channel.type != ChannelType.INSTAGRAM and is_instagram_batch_active():
-                _queue_after_batch(
-                    task_id=task_id,
-                    schedule_offset_minutes=schedule_offset_minutes,
-                    schedule_wave_anchor=schedule_wave_anchor,
-                )
-                print(
-                    f"⏸ Instagram batch активен — откладываем отправку задачи для канала "
-                    f"{channel.id} ({channel.type.value}). Отложено: {len(_pending_tasks_after_batch)}"
-                )
-                return
-
-            # Получаем свежие аккаунты и прокси
-            accounts = (await db.execute(select(Account).where(Account.is_active.is_(True)))).scalars().all()
-            proxies = (await db.execute(select(Proxy))).scalars().all()
-            likee_proxies = [p.proxy_str for p in proxies if p.for_likee is True]
-            generic_proxies = [p.proxy_str for p in proxies if p.for_likee is not True]
-            proxy_payload = likee_proxies if channel.type == ChannelType.LIKEE else generic_proxies
-
-            now_local = datetime.now(MOSCOW_TZ)
-            started_at_dt = _normalize_parse_started_at(
-                now_local,
-                schedule_offset_minutes,
-                schedule_wave_anchor,
-            )
-            parse_started_at = started_at_dt.isoformat()
-            rabbit_producer.send_task(
-                f"parsing_{channel.type.value.lower()}",
-                {
-                    "type": "channel",
-                    "user_id": channel.user_id,
-                    "url": channel.link,
-                    "channel_id": channel.id,
-                    "accounts": [a.account_str for a in accounts],
-                    "proxy_list": proxy_payload,
-                    "parse_started_at": parse_started_at,
-                }
-            )
-            print(f"📤 Отправлена задача для канала {channel.id} (тип: {channel.type.value})")
+            scheduler.remove_job(job_id)
+        except JobLookupError:
+            continue
+
+
+async def dispatch_wave(
+    channel_ids,
+    schedule_offset_minutes: Optional[int] = None,
+    schedule_wave_anchor: Optional[str] = None,
+    scheduled_at: Optional[datetime] = None,
+) -> int:
+    """
+    Отправляет задачи парсинга для волны каналов: каналы читаются одним запросом,
+    аккаунты и прокси берутся из общего снимка, задачи публикуются пачкой по очередям.
+    scheduled_at — минута слота, по которой считается дата parse_started_at.
+    Каналы, отложенные из-за Instagram batch или не отправленные, сохраняются в БД.
+    Возвращает число отправленных задач.
+    """
+    sent, held = await _dispatch_channels(
+        channel_ids,
+        schedule_offset_minutes=schedule_offset_minutes,
+        schedule_wave_anchor=schedule_wave_anchor,
+        scheduled_at=scheduled_at,
+    )
+    if held:
+        try:
+            await _queue_after_batch([
+                (channel_id, schedule_offset_minutes, schedule_wave_anchor) for channel_id in held
+            ])
+        except Exception as e:
+            print(f"❌ Не удалось отложить задачи каналов {held}: {e}")
+            return sent
+        print(
+            f"⏸ Отложено {len(held)} задач волны до окончания Instagram batch "
+            f"или повторной отправки. Всего отложено: {_pending_tasks_seen}"
+        )
+    return sent
+
+
+async def _dispatch_channels(
+    channel_ids,
+    schedule_offset_minutes: Optional[int] = None,
+    schedule_wave_anchor: Optional[str] = None,
+    respect_batch: bool = True,
+    scheduled_at: Optional[datetime] = None,
+) -> tuple[int, list[int]]:
+    """
+    Публикует задачи каналов волны. Возвращает число отправленных задач
+    и каналы, которые нужно отправить позже (активный batch или ошибка публикации).
+    """
+    channel_ids = sorted(set(channel_ids))
+    if not channel_ids:
+        return 0, []
+
+    try:
+        async with SessionLocal() as db:
+            channels = (await db.execute(
+                select(Channel).where(Channel.id.in_(channel_ids)).order_by(Channel.id)
+            )).scalars().all()
+            snapshot = await dispatch_snapshot_cache.for_tasks(db) if channels else None
+            batch_active = respect_batch and (await get_batch_lock(db)).active
+    except Exception as e:
+        print(f"❌ Ошибка подготовки волны каналов {channel_ids}: {e}")
+        return 0, channel_ids
+
+    for channel_id in set(channel_ids) - {channel.id for channel in channels}:
+        _remove_channel_jobs(channel_id)
+    if not channels:
+        return 0, []
+
+    started_at_dt = _normalize_parse_started_at(
+        datetime.now(MOSCOW_TZ),
+        schedule_offset_minutes,
+        schedule_wave_anchor,
+        scheduled_at,
+    )
+    parse_started_at = started_at_dt.isoformat()
+
+    tasks_by_queue: dict[str, list[dict]] = {}
+    held: list[int] = []
+    for channel in channels:
+        if channel.type != ChannelType.INSTAGRAM and batch_active:
+            held.append(channel.id)
+            continue
+        tasks_by_queue.setdefault(f"parsing_{channel.type.value.lower()}", []).append({
+            "type": "channel",
+            "user_id": channel.user_id,
+            "url": channel.link,
+            "channel_id": channel.id,
+            **snapshot.task_resources(channel.type),
+            "parse_started_at": parse_started_at,
+        })
+
+    sent = 0
+    for queue_name, tasks in tasks_by_queue.items():
+        channel_list = [task["channel_id"] for task in tasks]
+        try:
+            sent += await rabbit_producer.send_tasks(queue_name, tasks)
         except Exception as e:
-            print(f"❌ Ошибка в задаче {task_id}: {e}")
+            held.extend(channel_list)
+            print(f"❌ Ошибка отправки волны в {queue_name} (каналы {channel_list}): {e}")
+    if sent:
+        print(f"📤 Отправлена волна: {sent} задач в {len(tasks_by_queue)} очередей")
+    return sent, held
 
 
 async def dispatch_instagram_batch(reason: Optional[str] = None) -> bool:
@@ -565,27 +1041,25 @@ async def dispatch_instagram_batch(reason: Optional[str] = None) -> bool:
             print("ℹ️ Нет Instagram-каналов для batch-парсинга.")
             return False
 
-        accounts_result = await session.execute(
-            select(Account).where(Account.is_active.is_(True))
-        )
-        accounts = accounts_result.scalars().all()
-
-        proxies_result = await session.execute(select(Proxy))
-        proxies = proxies_result.scalars().all()
+        snapshot = await dispatch_snapshot_cache.for_tasks(session)
+        if settings.RESOURCE_LEASES_ENABLED:
+            has_accounts = await has_active_accounts(session)
+        else:
+            has_accounts = bool(snapshot.accounts)
 
-    if not accounts:
+    if not has_accounts:
         print("⚠️ Нет активных аккаунтов для batch-парсинга Instagram.")
         return False
 
-    proxy_payload = [p.proxy_str for p in proxies if p.for_likee is not True]
     parse_started_at = datetime.now(MOSCOW_TZ).isoformat()
     batch_id = f"{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{len(instagram_channels)}"
-    _mark_instagram_batch_state(True, batch_id=batch_id)
-    try:
-        loop = asyncio.get_running_loop()
-        loop.create_task(_auto_release_instagram_batch(batch_id))
-    except RuntimeError:
-        pass
+    # Блокировка живёт в БД: её видят все реплики, по таймауту снимает сторож
+    async with SessionLocal() as session:
+        state = await acquire_batch_lock(
+            session, batch_id, timedelta(minutes=INSTAGRAM_BATCH_LOCK_TIMEOUT_MINUTES)
+        )
+        await session.commit()
+    _remember_batch_state(state)
 
     payload = {
         "type": "instagram_batch",
@@ -598,15 +1072,30 @@ async def dispatch_instagram_batch(reason: Optional[str] = None) -> bool:
             }
             for channel in instagram_channels
         ],
-        "accounts": [account.account_str for account in accounts],
-        "proxy_list": proxy_payload,
+        **snapshot.task_resources(ChannelType.INSTAGRAM, settings.LEASE_ACCOUNTS_PER_BATCH),
         "parse_started_at": parse_started_at,
         "batch_id": batch_id,
     }
 
-    rabbit_producer.send_task("parsing_instagram", payload)
+    await rabbit_producer.send_task("parsing_instagram", payload)
     message = f"📤 Отправлена batch-задача Instagram на {len(instagram_channels)} каналов (batch_id={batch_id})"
     if reason:
         message += f" ({reason})"
     print(message)
     return True
+
+
+async def start_dispatching():
+    """Процесс стал ведущим: восстанавливаем служебные задачи и снимаем паузу."""
+    schedule_history_partitions_job()
+    schedule_instagram_batch_watchdog_job()
+    schedule_velocity_jobs()
+    await restore_scheduled_tasks()
+    scheduler.resume()
+    print("👑 Планировщик: процесс стал ведущим, задачи запускаются здесь")
+
+
+def stop_dispatching():
+    """Процесс перестал быть ведущим: задачи остаются в БД, но здесь не запускаются."""
+    scheduler.pause()
+    print("⏸ Планировщик: процесс больше не ведущий")
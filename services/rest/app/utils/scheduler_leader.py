@@ -0,0 +1,100 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+
+from app.core.config import settings
+from app.utils.scheduler import start_dispatching, stop_dispatching
+
+
+class SchedulerLeader:
+    """
+    Выбор ведущей реплики через session-level advisory lock PostgreSQL.
+    Блокировка держится, пока живо отдельное соединение: упавшая реплика
+    отпускает её автоматически, и ведущей становится следующая.
+    """
+    def __init__(
+        self,
+        lock_key: int,
+        retry_seconds: float,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], None],
+    ):
+        """Инициализируем выбор ведущего."""
+        self.lock_key = lock_key
+        self.retry_seconds = max(retry_seconds, 1)
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _connect(self):
+        """Открываем отдельное соединение под блокировку."""
+        dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+        self._conn = await asyncpg.connect(dsn)
+
+    async def _drop_connection(self):
+        """Закрываем соединение — блокировка отпускается вместе с ним."""
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception:
+                conn.terminate()
+
+    def _demote(self):
+        """Перестаём быть ведущим."""
+        if self.is_leader:
+            self.is_leader = False
+            self.on_demoted()
+
+    async def _tick(self):
+        """Одна попытка: захватить блокировку или проверить, что она ещё наша."""
+        try:
+            if self._conn is None or self._conn.is_closed():
+                self._demote()
+                await self._connect()
+            if self.is_leader:
+                await self._conn.fetchval("SELECT 1")
+                return
+            if await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", self.lock_key):
+                self.is_leader = True
+                await self.on_elected()
+        except Exception as e:
+            print(f"⚠️ Выбор ведущего планировщика: {e}")
+            self._demote()
+            await self._drop_connection()
+
+    async def _run(self):
+        """Повторяем попытки, пока процесс жив."""
+        while True:
+            await asyncio.sleep(self.retry_seconds)
+            await self._tick()
+
+    async def start(self):
+        """Первая попытка сразу, дальше — в фоне каждые retry_seconds."""
+        if self._task is not None:
+            return
+        await self._tick()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливаемся и отпускаем блокировку."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._demote()
+        await self._drop_connection()
+
+
+scheduler_leader = SchedulerLeader(
+    lock_key=settings.SCHEDULER_LEADER_LOCK_KEY,
+    retry_seconds=settings.SCHEDULER_LEADER_RETRY_SECONDS,
+    on_elected=start_dispatching,
+    on_demoted=stop_dispatching,
+)
@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.schedulerstate import SchedulerBatchLock, SchedulerCursor, SchedulerPendingTask
+
+
+INSTAGRAM_BATCH_LOCK = "instagram_batch"
+WAVE_DISPATCH_CURSOR = "wave_dispatch"
+
+
+@dataclass(frozen=True)
+class BatchLockState:
+    """Состояние блокировки пакетного парсинга."""
+    active: bool
+    batch_id: Optional[str] = None
+    started_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite отдаёт naive datetime — считаем его UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def get_batch_lock(db: AsyncSession, name: str = INSTAGRAM_BATCH_LOCK) -> BatchLockState:
+    """Читаем блокировку; истёкшая блокировка считается свободной."""
+    lock = (await db.execute(
+        select(SchedulerBatchLock).where(SchedulerBatchLock.name == name)
+    )).scalar_one_or_none()
+    if lock is None or lock.batch_id is None:
+        return BatchLockState(active=False)
+    expires_at = _as_utc(lock.expires_at)
+    active = expires_at is None or expires_at > datetime.now(timezone.utc)
+    return BatchLockState(
+        active=active,
+        batch_id=lock.batch_id,
+        started_at=_as_utc(lock.started_at),
+        expires_at=expires_at,
+    )
+
+
+async def acquire_batch_lock(
+    db: AsyncSession,
+    batch_id: str,
+    ttl: timedelta,
+    name: str = INSTAGRAM_BATCH_LOCK,
+) -> BatchLockState:
+    """Захватываем блокировку под batch_id на ttl (без коммита)."""
+    now = datetime.now(timezone.utc)
+    values = {"batch_id": batch_id, "started_at": now, "expires_at": now + ttl}
+    await db.execute(
+        pg_insert(SchedulerBatchLock)
+        .values(name=name, **values)
+        .on_conflict_do_update(index_elements=[SchedulerBatchLock.name], set_=values)
+    )
+    return BatchLockState(active=True, **values)
+
+
+async def release_batch_lock(
+    db: AsyncSession,
+    batch_id: Optional[str] = None,
+    name: str = INSTAGRAM_BATCH_LOCK,
+    expired_only: bool = False,
+) -> Optional[str]:
+    """
+    Освобождаем блокировку (без коммита): активную — если batch_id совпал
+    или не указан, либо только истёкшую. Возвращаем id освобождённого batch.
+    """
+    lock = (await db.execute(
+        select(SchedulerBatchLock)
+        .where(SchedulerBatchLock.name == name)
+        .with_for_update()
+    )).scalar_one_or_none()
+    if lock is None or lock.batch_id is None:
+        return None
+    expires_at = _as_utc(lock.expires_at)
+    expired = expires_at is not None and expires_at <= datetime.now(timezone.utc)
+    if expired != expired_only or (batch_id and lock.batch_id != batch_id):
+        return None
+    released = lock.batch_id
+    lock.batch_id = None
+    lock.started_at = None
+    lock.expires_at = None
+    await db.flush()
+    return released
+
+
+async def get_cursor(db: AsyncSession, name: str = WAVE_DISPATCH_CURSOR) -> Optional[datetime]:
+    """Сохранённая позиция задачи планировщика; None — задача ещё не запускалась."""
+    position = (await db.execute(
+        select(SchedulerCursor.position).where(SchedulerCursor.name == name)
+    )).scalar_one_or_none()
+    return _as_utc(position)
+
+
+async def save_cursor(db: AsyncSession, position: datetime, name: str = WAVE_DISPATCH_CURSOR):
+    """Сдвигаем позицию задачи планировщика (без коммита)."""
+    position = position.astimezone(timezone.utc)
+    await db.execute(
+        pg_insert(SchedulerCursor)
+        .values(name=name, position=position)
+        .on_conflict_do_update(
+            index_elements=[SchedulerCursor.name],
+            set_={"position": position, "updated_at": func.now()},
+        )
+    )
+
+
+async def defer_channel_tasks(
+    db: AsyncSession,
+    entries: Iterable[tuple[int, Optional[int], Optional[str]]],
+):
+    """Откладываем задачи каналов до окончания batch; повтор канала обновляет запись (без коммита)."""
+    rows = {
+        channel_id: {
+            "channel_id": channel_id,
+            "schedule_offset_minutes": offset,
+            "schedule_wave_anchor": anchor,
+            "queued_at": datetime.now(timezone.utc),
+        }
+        for channel_id, offset, anchor in entries
+    }
+    if not rows:
+        return
+    stmt = pg_insert(SchedulerPendingTask).values([rows[key] for key in sorted(rows)])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[SchedulerPendingTask.channel_id],
+        set_={
+            "schedule_offset_minutes": stmt.excluded.schedule_offset_minutes,
+            "schedule_wave_anchor": stmt.excluded.schedule_wave_anchor,
+            "queued_at": stmt.excluded.queued_at,
+        },
+    ))
+
+
+async def count_pending_tasks(db: AsyncSession) -> int:
+    """Сколько задач ждут окончания batch."""
+    return (await db.execute(select(func.count()).select_from(SchedulerPendingTask))).scalar_one()
+
+
+async def claim_pending_tasks(db: AsyncSession) -> list[SchedulerPendingTask]:
+    """
+    Забираем отложенные задачи под блокировку строк: параллельная выгрузка
+    пропустит их, а при падении до коммита они останутся в таблице.
+    """
+    result = await db.execute(
+        select(SchedulerPendingTask)
+        .order_by(SchedulerPendingTask.queued_at, SchedulerPendingTask.channel_id)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_pending_tasks(db: AsyncSession, channel_ids: Iterable[int]):
+    """Удаляем отправленные отложенные задачи (без коммита)."""
+    channel_ids = list(channel_ids)
+    if channel_ids:
+        await db.execute(
+            delete(SchedulerPendingTask)
+            .where(SchedulerPendingTask.channel_id.in_(channel_ids))
+            .execution_options(synchronize_session=False)
+        )
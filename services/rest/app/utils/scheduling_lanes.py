@@ -0,0 +1,169 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence
+
+from app.core.config import settings
+from app.models.channel import ChannelType
+
+
+DEFAULT_CONSUMERS = 1
+DEFAULT_PARSE_MINUTES = 5.0
+
+
+@dataclass(frozen=True)
+class LaneCapacity:
+    """Пропускная способность полосы: параллельные парсеры × среднее время парсинга канала."""
+    consumers: int
+    parse_minutes: float
+
+    @property
+    def step_minutes(self) -> float:
+        """Через сколько минут полоса готова принять следующий канал."""
+        return max(self.parse_minutes, 0) / max(self.consumers, 1)
+
+
+@dataclass
+class LanePlan:
+    """Расписание каналов одной платформы внутри окна волны."""
+    channel_type: ChannelType
+    capacity: LaneCapacity
+    window_minutes: int
+    step_minutes: float
+    offsets: dict[int, int] = field(default_factory=dict)
+    compressed: bool = False
+
+    @property
+    def required_minutes(self) -> float:
+        """Сколько полосе нужно, чтобы разобрать все каналы при своей пропускной способности."""
+        return len(self.offsets) * self.capacity.step_minutes
+
+    @property
+    def overflow(self) -> bool:
+        """Полоса не успевает до следующего слота."""
+        return self.required_minutes > self.window_minutes
+
+
+def lane_capacities() -> dict[ChannelType, LaneCapacity]:
+    """Пропускная способность полос из настроек SCHEDULE_LANE_<TYPE>_*."""
+    capacities = {}
+    for channel_type in ChannelType:
+        prefix = f"SCHEDULE_LANE_{channel_type.name}"
+        capacities[channel_type] = LaneCapacity(
+            consumers=getattr(settings, f"{prefix}_CONSUMERS", DEFAULT_CONSUMERS),
+            parse_minutes=getattr(settings, f"{prefix}_PARSE_MINUTES", DEFAULT_PARSE_MINUTES),
+        )
+    return capacities
+
+
+def wave_window_minutes(slot_minutes: Sequence[int]) -> int:
+    """Наименьший промежуток между соседними слотами суток — окно, в которое должна уложиться волна."""
+    slots = sorted({minute % 1440 for minute in slot_minutes})
+    if len(slots) < 2:
+        return 1440
+    gaps = [later - earlier for earlier, later in zip(slots, slots[1:])]
+    gaps.append(slots[0] + 1440 - slots[-1])
+    return min(gaps)
+
+
+def _sort_key(channel):
+    """Порядок каналов в полосе: по дате создания, затем по id."""
+    return (
+        channel.created_at or datetime.min.replace(tzinfo=timezone.utc),
+        channel.id,
+    )
+
+
+def plan_lanes(
+    channels: Iterable,
+    capacities: dict[ChannelType, LaneCapacity],
+    window_minutes: int,
+    auto_compress: bool = True,
+) -> dict[ChannelType, LanePlan]:
+    """
+    Раскладываем каналы по независимым полосам платформ: каналы полосы идут
+    с шагом parse_minutes / consumers от начала слота. Если полоса не успевает
+    до следующего слота, шаг сжимается до window / N (auto_compress) —
+    лишнее ждёт в очереди парсера, но новая волна не наезжает на старую.
+    """
+    lanes: dict[ChannelType, list] = {}
+    for channel in channels:
+        lanes.setdefault(channel.type, []).append(channel)
+
+    plans = {}
+    for channel_type, lane_channels in lanes.items():
+        capacity = capacities.get(
+            channel_type, LaneCapacity(DEFAULT_CONSUMERS, DEFAULT_PARSE_MINUTES)
+        )
+        plan = LanePlan(
+            channel_type=channel_type,
+            capacity=capacity,
+            window_minutes=window_minutes,
+            step_minutes=capacity.step_minutes,
+        )
+        lane_channels = sorted(lane_channels, key=_sort_key)
+        if auto_compress and len(lane_channels) * plan.step_minutes > window_minutes:
+            plan.step_minutes = window_minutes / len(lane_channels)
+            plan.compressed = True
+        for index, channel in enumerate(lane_channels):
+            plan.offsets[channel.id] = math.floor(index * plan.step_minutes)
+        plans[channel_type] = plan
+    return plans
+
+
+def channel_offsets(plans: dict[ChannelType, LanePlan]) -> dict[int, int]:
+    """Смещения всех каналов от начала слота."""
+    offsets = {}
+    for plan in plans.values():
+        offsets.update(plan.offsets)
+    return offsets
+
+
+def describe_lane_plan(plan: LanePlan) -> Optional[str]:
+    """Предупреждение, если полоса не укладывается в окно; None — всё в порядке."""
+    required = math.ceil(plan.required_minutes)
+    if plan.compressed:
+        return (
+            f"⚠️ Полоса {plan.channel_type.value}: {len(plan.offsets)} каналов требуют {required} мин "
+            f"при окне {plan.window_minutes} мин — шаг сжат до {plan.step_minutes:.2f} мин, "
+            f"задачи будут ждать в очереди. Добавьте парсеров: нужно "
+            f"{math.ceil(required / plan.window_minutes * plan.capacity.consumers)}"
+        )
+    if plan.overflow:
+        return (
+            f"⚠️ Полоса {plan.channel_type.value}: {len(plan.offsets)} каналов требуют {required} мин "
+            f"при окне {plan.window_minutes} мин — волна наедет на следующий слот"
+        )
+    return None
+
+
+def plan_rolling_lanes(
+    channels: Iterable,
+    capacities: dict[ChannelType, LaneCapacity],
+    period_minutes: int,
+) -> dict[ChannelType, LanePlan]:
+    """
+    Непрерывное обновление: каналы каждой полосы равномерно разнесены по периоду
+    (фаза = i × period / N), нагрузка на парсеры ровная. Если полоса не успевает
+    обойти каналы за период, план помечается сжатым — задачи ждут в очереди.
+    """
+    plans = plan_lanes(channels, capacities, period_minutes, auto_compress=False)
+    for plan in plans.values():
+        ordered = list(plan.offsets)
+        plan.compressed = plan.overflow
+        plan.step_minutes = period_minutes / len(ordered)
+        plan.offsets = {
+            channel_id: math.floor(index * plan.step_minutes)
+            for index, channel_id in enumerate(ordered)
+        }
+    return plans
+
+
+def daily_due_offsets(minute_of_day: int, slot_minutes: Sequence[int]) -> list[tuple[int, int]]:
+    """(слот, смещение) каналов, чей запуск приходится на эту минуту суток: по одному от каждого слота."""
+    return [(slot, (minute_of_day - slot) % 1440) for slot in sorted(set(slot_minutes))]
+
+
+def rolling_due_offset(minute_of_day: int, period_minutes: int) -> int:
+    """Фаза каналов, чей очередной запуск приходится на эту минуту суток."""
+    return minute_of_day % period_minutes
@@ -0,0 +1,273 @@
+import bisect
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.channel import Channel, ChannelType
+from app.models.schedulerstate import ChannelLaneSlot
+
+
+@dataclass(frozen=True)
+class SlotGrid:
+    """Сетка слотов полосы: смещения в порядке выдачи и шаг между соседними слотами."""
+    offsets: tuple[int, ...]
+    step_minutes: float
+    extendable: bool = False
+
+
+def daily_slot_grid(window_minutes: int, step_minutes: float, extendable: bool = False) -> SlotGrid:
+    """Слоты от начала окна с шагом полосы; выдаются по порядку, от ранних к поздним."""
+    step = max(step_minutes, 1)
+    count = max(int(window_minutes // step), 1)
+    return SlotGrid(
+        offsets=tuple(math.floor(index * step) for index in range(count)),
+        step_minutes=step,
+        extendable=extendable,
+    )
+
+
+def _spread_order(count: int) -> list[int]:
+    """Индексы 0..count-1 в порядке ван дер Корпута: 0, 1/2, 1/4, 3/4, 1/8, ... периода."""
+    bits = (count - 1).bit_length()
+    order = {}
+    for k in range(1 << bits):
+        fraction = int(format(k, f"0{bits}b")[::-1], 2) / (1 << bits) if bits else 0
+        order.setdefault(math.floor(fraction * count), None)
+    return list(order)
+
+
+def rolling_slot_grid(period_minutes: int, step_minutes: float) -> SlotGrid:
+    """
+    Слоты по всему периоду в порядке «разрядки»: каждый следующий канал попадает
+    в середину самого большого промежутка, так что любой префикс выдачи ровный.
+    """
+    step = max(step_minutes, 1)
+    count = max(int(period_minutes // step), 1)
+    order = _spread_order(count)
+    return SlotGrid(
+        offsets=tuple(math.floor(index * period_minutes / count) for index in order),
+        step_minutes=period_minutes / count,
+    )
+
+
+class LaneSlots:
+    """
+    Занятость слотов одной полосы. Слоты сгруппированы по числу каналов,
+    поэтому наименее загруженный слот выдаётся и освобождается за O(1).
+    """
+
+    def __init__(self, grid: SlotGrid):
+        """Все слоты сетки свободны."""
+        self.grid = grid
+        self._positions = sorted(grid.offsets)
+        self._grid_positions = list(self._positions)
+        self._load: dict[int, int] = dict.fromkeys(grid.offsets, 0)
+        # Уровень занятости -> слоты (dict как упорядоченное множество)
+        self._levels: dict[int, dict[int, None]] = {0: dict.fromkeys(grid.offsets)}
+        self._min_level = 0
+
+    @property
+    def channels(self) -> int:
+        """Сколько каналов занимают слоты полосы."""
+        return sum(self._load.values())
+
+    def load(self, offset: int) -> int:
+        """Сколько каналов в слоте, куда попадает смещение."""
+        return self._load[self._slot_for(offset)]
+
+    def _slot_for(self, offset: int) -> int:
+        """
+        Слот сетки, в который попадает смещение (старые смещения могут быть вне сетки).
+        В полосе без сжатия смещение за окном — ранее добавленный слот: он становится
+        позицией полосы, а не прижимается к последнему слоту окна.
+        """
+        if offset in self._load:
+            return offset
+        index = int(offset // self.grid.step_minutes) if self.grid.step_minutes > 0 else 0
+        if self.grid.extendable and index >= len(self.grid.offsets):
+            slot = math.floor(index * self.grid.step_minutes)
+            if slot not in self._load:
+                self._add_slot(slot)
+            return slot
+        return self._grid_positions[min(max(index, 0), len(self._grid_positions) - 1)]
+
+    def _move(self, slot: int, delta: int):
+        """Переносим слот на соседний уровень занятости."""
+        level = self._load[slot]
+        bucket = self._levels[level]
+        del bucket[slot]
+        if not bucket:
+            del self._levels[level]
+        self._load[slot] = level + delta
+        self._levels.setdefault(level + delta, {})[slot] = None
+
+    def _add_slot(self, slot: int):
+        """Новый свободный слот за окном полосы."""
+        bisect.insort(self._positions, slot)
+        self._load[slot] = 0
+        self._levels.setdefault(0, {})[slot] = None
+        self._min_level = 0
+
+    def _extend(self):
+        """Полоса без сжатия: все слоты заняты — добавляем первый свободный шаг за окном."""
+        index = len(self.grid.offsets)
+        while math.floor(index * self.grid.step_minutes) in self._load:
+            index += 1
+        self._add_slot(math.floor(index * self.grid.step_minutes))
+
+    def occupy(self, offset: int, count: int = 1) -> int:
+        """Отмечаем каналы с уже известным смещением; возвращаем их слот."""
+        slot = self._slot_for(offset)
+        self._move(slot, count)
+        while self._min_level not in self._levels:
+            self._min_level += 1
+        return slot
+
+    def allocate(self) -> int:
+        """Выдаём первый свободный, а если свободных нет — наименее загруженный слот."""
+        if self._min_level > 0 and self.grid.extendable:
+            self._extend()
+        slot = next(iter(self._levels[self._min_level]))
+        return self.occupy(slot)
+
+    def release(self, offset: int):
+        """Освобождаем место канала в слоте."""
+        slot = self._slot_for(offset)
+        if self._load[slot] == 0:
+            return
+        self._move(slot, -1)
+        self._min_level = min(self._min_level, self._load[slot])
+
+
+async def _lock_lanes(db: AsyncSession, channel_types: Iterable[ChannelType], lock_key: int):
+    """
+    Advisory-блокировки полос до конца транзакции. Полосы берутся в одном порядке,
+    поэтому транзакции, затрагивающие несколько полос, не ждут друг друга по кругу.
+    """
+    conn = await db.connection()
+    if conn.dialect.name != "postgresql":
+        return
+    lanes = list(ChannelType)
+    for index in sorted({lanes.index(channel_type) for channel_type in channel_types}):
+        await db.execute(select(func.pg_advisory_xact_lock(lock_key, index)))
+
+
+async def _release_slots(db: AsyncSession, slots: Iterable[tuple[ChannelType, Optional[int]]]):
+    """Уменьшаем занятость слотов (полосы уже заблокированы); пустые слоты удаляем."""
+    counts = Counter((channel_type, offset) for channel_type, offset in slots if offset is not None)
+    if not counts:
+        return
+    for (channel_type, offset), count in counts.items():
+        await db.execute(
+            update(ChannelLaneSlot)
+            .where(
+                ChannelLaneSlot.type == channel_type,
+                ChannelLaneSlot.schedule_offset_minutes == offset,
+            )
+            .values(channels=ChannelLaneSlot.channels - count)
+        )
+    await db.execute(
+        delete(ChannelLaneSlot).where(
+            ChannelLaneSlot.type.in_({channel_type for channel_type, _ in counts}),
+            ChannelLaneSlot.channels <= 0,
+        )
+    )
+
+
+async def allocate_lane_slot(
+    db: AsyncSession,
+    channel: Channel,
+    grid: SlotGrid,
+    lock_key: int,
+    released: Sequence[tuple[ChannelType, Optional[int]]] = (),
+) -> int:
+    """
+    Смещение для канала: наименее загруженный слот его полосы.
+    Занятость читается из channel_lane_slots (строка на слот, а не на канал)
+    и обновляется под advisory-блокировкой полосы до конца транзакции:
+    реплики, создающие каналы одновременно, не выдают один слот дважды.
+    released — прежние (полоса, смещение) канала, освобождаемые в той же транзакции.
+    """
+    await _lock_lanes(db, [channel.type, *(channel_type for channel_type, _ in released)], lock_key)
+    await _release_slots(db, released)
+    result = await db.execute(
+        select(ChannelLaneSlot.schedule_offset_minutes, ChannelLaneSlot.channels)
+        .where(ChannelLaneSlot.type == channel.type, ChannelLaneSlot.channels > 0)
+        .order_by(ChannelLaneSlot.schedule_offset_minutes)
+    )
+    lane = LaneSlots(grid)
+    for offset, count in result.all():
+        lane.occupy(offset, count)
+    offset = lane.allocate()
+
+    stmt = pg_insert(ChannelLaneSlot).values(
+        type=channel.type, schedule_offset_minutes=offset, channels=1
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[ChannelLaneSlot.type, ChannelLaneSlot.schedule_offset_minutes],
+        set_={"channels": ChannelLaneSlot.channels + 1},
+    ))
+    return offset
+
+
+async def release_channel_slots(
+    db: AsyncSession,
+    slots: Iterable[tuple[ChannelType, Optional[int]]],
+    lock_key: int,
+):
+    """Освобождаем слоты удаляемых каналов (без коммита, в транзакции удаления)."""
+    slots = list(slots)
+    if not any(offset is not None for _, offset in slots):
+        return
+    await _lock_lanes(db, [channel_type for channel_type, _ in slots], lock_key)
+    await _release_slots(db, slots)
+
+
+async def rebuild_lane_slots(db: AsyncSession, lock_key: int):
+    """Пересобираем занятость всех полос по смещениям каналов (после полного плана)."""
+    await _lock_lanes(db, list(ChannelType), lock_key)
+    await db.execute(delete(ChannelLaneSlot))
+    await db.execute(
+        insert(ChannelLaneSlot).from_select(
+            ["type", "schedule_offset_minutes", "channels"],
+            select(Channel.type, Channel.schedule_offset_minutes, func.count())
+            .where(Channel.schedule_offset_minutes.is_not(None))
+            .group_by(Channel.type, Channel.schedule_offset_minutes),
+        )
+    )
+
+
+async def save_channel_slots(db: AsyncSession, offsets: dict[int, Optional[int]]):
+    """Записываем смещения каналов одним executemany (без коммита), не трогая updated_at."""
+    if not offsets:
+        return
+    table = Channel.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.id == bindparam("channel_id"))
+        .values(
+            schedule_offset_minutes=bindparam("offset"),
+            updated_at=table.c.updated_at,
+        ),
+        [
+            {"channel_id": channel_id, "offset": offset}
+            for channel_id, offset in offsets.items()
+        ],
+    )
+
+
+def changed_slots(
+    channels: Sequence,
+    offsets: dict[int, int],
+) -> dict[int, Optional[int]]:
+    """Каналы, у которых сохранённое смещение расходится с планом."""
+    return {
+        channel.id: offsets.get(channel.id)
+        for channel in channels
+        if channel.schedule_offset_minutes != offsets.get(channel.id)
+    }
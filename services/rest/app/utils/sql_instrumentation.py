@@ -0,0 +1,134 @@
+import heapq
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestSqlStats:
+    """SQL-статистика одного запроса к API."""
+    def __init__(self, keep_slowest: int):
+        """Инициализируем счётчики."""
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter[str] = Counter()
+        self._slowest: list[tuple[float, int, str]] = []
+
+    def record(self, statement: str, duration: float):
+        """Учитываем выполненный запрос."""
+        self.count += 1
+        self.total_time += duration
+        # Параметры уже вынесены в плейсхолдеры — одинаковый текст = одна форма
+        shape = _WHITESPACE.sub(" ", statement).strip()
+        self.shapes[shape] += 1
+        item = (duration, self.count, shape)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, item)
+        elif self._slowest and duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        """Самые долгие запросы, от долгого к быстрому."""
+        return [(duration, shape) for duration, _, shape in sorted(self._slowest, reverse=True)]
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Формы запросов, выполненные больше threshold раз (N+1)."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+_current_stats: ContextVar[Optional[RequestSqlStats]] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Засекаем начало запроса."""
+    # Время храним в контексте выполнения: упавший запрос не собьёт замер следующего
+    if context is not None:
+        context._sql_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Записываем длительность запроса в статистику текущего запроса API."""
+    stats = _current_stats.get()
+    started = getattr(context, "_sql_started_at", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine):
+    """Подключаем учёт SQL к движку (для AsyncEngine — к его sync_engine)."""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _server_timing(stats: RequestSqlStats) -> str:
+    """Заголовок Server-Timing: общее время БД и самые долгие запросы."""
+    metrics = [f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries"']
+    for index, (duration, shape) in enumerate(stats.slowest, start=1):
+        desc = shape[:80].replace("\\", "").replace('"', "'")
+        metrics.append(f'db-slow-{index};dur={duration * 1000:.1f};desc="{desc}"')
+    return ", ".join(metrics)
+
+
+class SqlInstrumentationMiddleware:
+    """
+    ASGI-middleware: собирает SQL-статистику каждого HTTP-запроса,
+    в отладке отдаёт её в заголовках и предупреждает о N+1.
+    """
+    def __init__(self, app):
+        """Оборачиваем приложение."""
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Обрабатываем запрос."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSqlStats(settings.SQL_SLOWEST_STATEMENTS)
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            """Добавляем заголовки со статистикой к началу ответа."""
+            if message["type"] == "http.response.start" and settings.SQL_DEBUG_HEADERS:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stats).encode()))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.total_time * 1000:.1f}".encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope, stats: RequestSqlStats):
+        """Печатаем предупреждения о повторяющихся запросах и долгих запросах."""
+        endpoint = f"{scope.get('method')} {scope.get('path')}"
+        for shape, count in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            print(f"⚠️ N+1: {endpoint} выполнил один и тот же запрос {count} раз: {shape[:300]}")
+        if settings.SQL_DEBUG_HEADERS and stats.count:
+            slowest = "; ".join(
+                f"{duration * 1000:.1f} мс {shape[:120]}" for duration, shape in stats.slowest
+            )
+            print(
+                f"🗄️ {endpoint}: {stats.count} запросов, "
+                f"{stats.total_time * 1000:.1f} мс в БД; самые долгие: {slowest}"
+            )
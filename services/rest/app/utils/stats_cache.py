@@ -0,0 +1,291 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import asyncpg
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.channel import Channel
+from app.models.videos import Videos
+from app.utils.data_version import bump_data_versions
+
+
+# Канал PostgreSQL, по которому процессы сообщают об изменении статистики
+STATS_NOTIFY_CHANNEL = "stats_cache_invalidate"
+# Полезная нагрузка NOTIFY ограничена 8000 байт
+MAX_NOTIFY_PAYLOAD = 7000
+ALL_TAG = ("all",)
+# Ключ session.info: пользователи и каналы, чьи записи кэша сбросятся после коммита
+PENDING_INVALIDATION_KEY = "pending_stats_invalidation"
+
+
+def _normalize(value):
+    """Приводим значение фильтра к стабильному виду для ключа."""
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_normalize(item) for item in value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def cache_tags(user_ids: Optional[Iterable[int]], channel_id: Optional[int]) -> frozenset:
+    """Теги записи: по каналу, по пользователям или «все»."""
+    if channel_id is not None:
+        return frozenset({("channel", channel_id)})
+    if user_ids:
+        return frozenset(("user", user_id) for user_id in user_ids)
+    return frozenset({ALL_TAG})
+
+
+class StatsCache:
+    """
+    In-process кэш агрегатов статистики: TTL + LRU.
+    Записи помечены тегами пользователей/каналов и сбрасываются при записи
+    новой истории, удалении видео и каналов, смене владельца канала и артиклей;
+    другие процессы узнают об этом через LISTEN/NOTIFY.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        """Инициализируем кэш."""
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, frozenset, Any]] = OrderedDict()
+        self._keys_by_tag: dict[tuple, set[str]] = {}
+        self._loading: dict[str, asyncio.Future] = {}
+        self._listener: Optional[asyncpg.Connection] = None
+
+    @staticmethod
+    def make_key(name: str, filters: dict) -> str:
+        """Ключ из имени агрегата и нормализованных фильтров."""
+        normalized = {
+            key: _normalize(value)
+            for key, value in filters.items()
+            if value is not None and value != []
+        }
+        return f"{name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+    def _drop(self, key: str):
+        """Удаляем запись и её теги."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def get(self, key: str):
+        """Достаём живую запись или None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, tags: frozenset, value):
+        """Кладём запись, вытесняя самые давние."""
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, tags, value)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    async def get_or_load(
+        self,
+        name: str,
+        filters: dict,
+        tags: frozenset,
+        loader: Callable[[], Awaitable[Any]],
+    ):
+        """Отдаём агрегат из кэша; одинаковые промахи ждут одну загрузку."""
+        if self.ttl <= 0:
+            return await loader()
+
+        key = self.make_key(name, filters)
+        entry = self.get(key)
+        if entry is not None:
+            return entry[2]
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Исключение уже проброшено вызывающему, ожидающие получат его же
+            future.exception()
+            raise
+        else:
+            # Инвалидация во время загрузки сняла бы будущее — тогда не кэшируем
+            if self._loading.get(key) is future:
+                self.set(key, tags, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+    def invalidate(
+        self,
+        user_ids: Iterable[int] = (),
+        channel_ids: Iterable[int] = (),
+    ) -> int:
+        """Сбрасываем записи затронутых пользователей, каналов и общие."""
+        tags = {ALL_TAG}
+        tags.update(("user", user_id) for user_id in user_ids)
+        tags.update(("channel", channel_id) for channel_id in channel_ids)
+        keys = set()
+        for tag in tags:
+            keys.update(self._keys_by_tag.get(tag, ()))
+        for key in keys:
+            self._drop(key)
+        # Загрузки, начатые до изменения, не должны попасть в кэш
+        self._loading.clear()
+        return len(keys)
+
+    def clear(self):
+        """Полностью очищаем кэш."""
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self._loading.clear()
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        """Обрабатываем уведомление другого процесса."""
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = {"all": True}
+        if data.get("all"):
+            self.clear()
+        else:
+            self.invalidate(data.get("users", ()), data.get("channels", ()))
+
+    def _on_listener_lost(self, connection):
+        """Соединение LISTEN потеряно — уведомления могли пропасть."""
+        print("⚠️ Кэш статистики: соединение LISTEN потеряно, кэш очищен")
+        self._listener = None
+        self.clear()
+
+    async def start_listener(self):
+        """Подписываемся на уведомления об изменении статистики."""
+        if not settings.STATS_CACHE_NOTIFY or self._listener is not None:
+            return
+        dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+        self._listener = await asyncpg.connect(dsn)
+        self._listener.add_termination_listener(self._on_listener_lost)
+        await self._listener.add_listener(STATS_NOTIFY_CHANNEL, self._on_notify)
+
+    async def stop_listener(self):
+        """Отписываемся и закрываем соединение."""
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.is_closed():
+            listener.remove_termination_listener(self._on_listener_lost)
+            await listener.close()
+
+
+stats_cache = StatsCache(
+    max_entries=settings.STATS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.STATS_CACHE_TTL_SECONDS,
+)
+
+
+async def publish_stats_changed(db: AsyncSession, video_ids: Iterable[int]):
+    """Сообщаем, что статистика видео изменилась."""
+    video_ids = sorted(set(video_ids))
+    if not video_ids:
+        return
+    result = await db.execute(
+        select(Channel.id, Channel.user_id)
+        .join(Videos, Videos.channel_id == Channel.id)
+        .where(Videos.id.in_(video_ids))
+        .distinct()
+    )
+    rows = result.all()
+    await _publish(
+        db,
+        {row.user_id for row in rows if row.user_id is not None},
+        {row.id for row in rows},
+    )
+
+
+async def publish_scope_changed(
+    db: AsyncSession,
+    user_ids: Iterable[int] = (),
+    channel_ids: Iterable[int] = (),
+):
+    """
+    Сообщаем, что статистика пользователей и каналов изменилась целиком:
+    удаление видео и каналов, смена владельца канала, смена артиклей.
+    Вызывать до удаления — владельцев каналов ищем в БД.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    channel_ids = {channel_id for channel_id in channel_ids if channel_id is not None}
+    if channel_ids:
+        result = await db.execute(
+            select(Channel.user_id).where(Channel.id.in_(channel_ids)).distinct()
+        )
+        user_ids.update(user_id for user_id in result.scalars() if user_id is not None)
+    await _publish(db, user_ids, channel_ids)
+
+
+async def _publish(db: AsyncSession, user_ids: set, channel_ids: set):
+    """
+    Отмечаем записи локального кэша к сбросу после коммита, поднимаем версию
+    данных владельцев и шлём NOTIFY, который PostgreSQL доставит остальным
+    тоже после коммита. Сброс до коммита дал бы чтению снова закэшировать
+    старые данные.
+    """
+    if not user_ids and not channel_ids:
+        return
+    user_ids = sorted(user_ids)
+    channel_ids = sorted(channel_ids)
+    # Отметки принадлежат текущей транзакции: откат её сбросит
+    await db.connection()
+    pending_users, pending_channels = db.info.setdefault(PENDING_INVALIDATION_KEY, (set(), set()))
+    pending_users.update(user_ids)
+    pending_channels.update(channel_ids)
+    await bump_data_versions(db, user_ids=user_ids)
+
+    conn = await db.connection()
+    if not settings.STATS_CACHE_NOTIFY or conn.dialect.name != "postgresql":
+        return
+    payload = json.dumps({"users": user_ids, "channels": channel_ids})
+    if len(payload) > MAX_NOTIFY_PAYLOAD:
+        payload = json.dumps({"all": True})
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": STATS_NOTIFY_CHANNEL, "payload": payload},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    """Изменения видны в БД — сбрасываем записи локального кэша."""
+    pending = session.info.pop(PENDING_INVALIDATION_KEY, None)
+    if pending:
+        stats_cache.invalidate(sorted(pending[0]), sorted(pending[1]))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_invalidation(session: Session, transaction):
+    """Откат или закрытие сессии без коммита — кэш остаётся верным, отметки пропадают."""
+    if transaction.parent is None:
+        session.info.pop(PENDING_INVALIDATION_KEY, None)
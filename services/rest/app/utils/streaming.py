@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Iterable, Sequence
+
+
+# Сколько строк склеиваем в один кусок ответа
+EXPORT_CHUNK_ROWS = 500
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки."""
+    JSON = "json"  # обычный JSON-массив (или страница курсора)
+    NDJSON = "ndjson"  # поток: одна JSON-строка на запись
+    CSV = "csv"  # поток CSV
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+async def ndjson_chunks(
+    rows: AsyncIterator[dict],
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> AsyncIterator[str]:
+    """Отдаём записи как NDJSON кусками по chunk_rows строк."""
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+async def csv_chunks(
+    header: Sequence[str],
+    rows: AsyncIterator[Iterable],
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> AsyncIterator[str]:
+    """Отдаём CSV: заголовок сразу, затем строки кусками по chunk_rows."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    yield output.getvalue()
+
+    output.seek(0)
+    output.truncate()
+    pending = 0
+    async for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+            pending = 0
+    if pending:
+        yield output.getvalue()
@@ -1,5 +1,50 @@
+import hashlib
+import hmac
+import time
+import urllib.parse
+from typing import Optional
 
-TELEGRAM_BOT_TOKEN = "..."
-def check_telegram_auth(raw_data: dict) -> bool:
-    """Проверяем авторизацию Telegram."""
-    ...
+from app.core.config import settings
+
+
+def parse_init_data(token: str) -> dict:
+    """Разбираем строку init-data Telegram WebApp в словарь с раскодированными значениями."""
+    return dict(urllib.parse.parse_qsl(token, keep_blank_values=True, strict_parsing=True))
+
+
+def check_telegram_auth(
+    raw_data: dict,
+    bot_token: Optional[str] = None,
+    max_age_seconds: Optional[int] = None,
+) -> bool:
+    """
+    Проверяем подпись init-data Telegram WebApp:
+    hash = HMAC_SHA256(HMAC_SHA256("WebAppData", bot_token), data_check_string).
+    """
+    received_hash = raw_data.get("hash")
+    if not received_hash:
+        return False
+
+    bot_token = bot_token or settings.TELEGRAM_BOT_TOKEN
+    data_check_string = "\n".join(
+        f"{key}={value}"
+        for key, value in sorted(raw_data.items())
+        if key != "hash"
+    )
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    expected_hash = hmac.new(
+        secret_key, data_check_string.encode(), hashlib.sha256
+    ).hexdigest()
+    if not hmac.compare_digest(expected_hash, received_hash):
+        return False
+
+    if max_age_seconds is None:
+        max_age_seconds = settings.TELEGRAM_AUTH_MAX_AGE_SECONDS
+    if max_age_seconds > 0:
+        try:
+            auth_date = int(raw_data.get("auth_date", 0))
+        except ValueError:
+            return False
+        if time.time() - auth_date > max_age_seconds:
+            return False
+    return True
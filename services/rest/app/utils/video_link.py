@@ -0,0 +1,39 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+# Параметры запроса, которые действительно идентифицируют ролик
+# (например, youtube.com/watch?v=...). Остальные — трекинг и мусор.
+SIGNIFICANT_QUERY_PARAMS = ("v",)
+HOST_PREFIXES = ("www.", "m.")
+
+
+def normalize_video_link(link: str) -> str:
+    """
+    Нормализуем ссылку на видео для поиска дубликатов:
+    без схемы, www./m., фрагмента, трекинговых параметров и завершающего слэша.
+    """
+    if link is None:
+        return link
+
+    parts = urlsplit(link.strip())
+    if not parts.netloc:
+        # Ссылка без схемы: "www.tiktok.com/@user/video/1"
+        parts = urlsplit(f"//{link.strip()}")
+
+    host = parts.netloc.lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    path = parts.path.rstrip("/")
+    query = urlencode([
+        (key, value)
+        for key, value in parse_qsl(parts.query)
+        if key in SIGNIFICANT_QUERY_PARAMS
+    ])
+
+    normalized = f"{host}{path}"
+    if query:
+        normalized += f"?{query}"
+    return normalized
@@ -0,0 +1,200 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import bindparam, case, exists, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.channel import Channel, ChannelType
+from app.models.videohistory import VideoHistory
+from app.models.videos import VelocityTier, Videos
+
+
+# Сколько изменённых видео записываем одним executemany
+TIER_UPDATE_CHUNK = 1000
+# Платформы, чьи парсеры принимают задачу "video" на одно горячее видео.
+# Пока пусто: разбор одного видео в парсерах закомментирован — его API и формат
+# результата не сверены с ядрами парсеров, поэтому горячие видео не отправляются.
+HOT_VIDEO_CHANNEL_TYPES: tuple[ChannelType, ...] = ()
+
+
+@dataclass(frozen=True)
+class VelocityThresholds:
+    """Пороги уровней: просмотров в час и возраст, до которого видео считается новым."""
+    hot_views_per_hour: float
+    cold_views_per_hour: float
+    new_video_hours: float
+
+
+def velocity_thresholds() -> VelocityThresholds:
+    """Пороги из настроек VIDEO_TIER_*."""
+    return VelocityThresholds(
+        hot_views_per_hour=settings.VIDEO_TIER_HOT_VIEWS_PER_HOUR,
+        cold_views_per_hour=settings.VIDEO_TIER_COLD_VIEWS_PER_HOUR,
+        new_video_hours=settings.VIDEO_TIER_NEW_VIDEO_HOURS,
+    )
+
+
+def views_per_hour(
+    first_views: Optional[int],
+    last_views: Optional[int],
+    first_at: Optional[datetime],
+    last_at: Optional[datetime],
+) -> float:
+    """Прирост просмотров в час между первым и последним снимком окна (не меньше часа)."""
+    if first_views is None or last_views is None or first_at is None or last_at is None:
+        return 0.0
+    hours = max((last_at - first_at).total_seconds() / 3600, 1)
+    return max(last_views - first_views, 0) / hours
+
+
+def classify_velocity(
+    rate: float,
+    age_hours: Optional[float],
+    thresholds: VelocityThresholds,
+) -> VelocityTier:
+    """Уровень видео: новое или быстро растущее — hot, почти без прироста — cold."""
+    if age_hours is not None and age_hours < thresholds.new_video_hours:
+        return VelocityTier.HOT
+    if rate >= thresholds.hot_views_per_hour:
+        return VelocityTier.HOT
+    if rate < thresholds.cold_views_per_hour:
+        return VelocityTier.COLD
+    return VelocityTier.WARM
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """date_published и SQLite отдают naive datetime — считаем его UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def refresh_velocity_tiers(
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    window_hours: Optional[int] = None,
+    thresholds: Optional[VelocityThresholds] = None,
+) -> Counter:
+    """
+    Пересчитываем скорость и уровни видео по снимкам video_history за окно
+    (created_at в окне — секции вне окна не читаются), затем уровни каналов.
+    Записываются только изменившиеся видео (без коммита). Возвращаем число видео по уровням.
+    """
+    now = now or datetime.now(timezone.utc)
+    window_hours = window_hours or settings.VIDEO_VELOCITY_WINDOW_HOURS
+    thresholds = thresholds or velocity_thresholds()
+    since = now - timedelta(hours=window_hours)
+
+    last_seen = func.coalesce(VideoHistory.last_confirmed_at, VideoHistory.created_at)
+    window = (
+        select(
+            VideoHistory.video_id,
+            func.min(VideoHistory.amount_views).label("first_views"),
+            func.max(VideoHistory.amount_views).label("last_views"),
+            func.min(VideoHistory.created_at).label("first_at"),
+            func.max(last_seen).label("last_at"),
+            func.max(VideoHistory.date_published).label("published"),
+        )
+        .where(VideoHistory.created_at >= since)
+        .group_by(VideoHistory.video_id)
+        .subquery()
+    )
+    result = await db.stream(
+        select(
+            Videos.id,
+            Videos.velocity_tier,
+            Videos.views_per_hour,
+            window.c.first_views,
+            window.c.last_views,
+            window.c.first_at,
+            window.c.last_at,
+            window.c.published,
+        )
+        .outerjoin(window, window.c.video_id == Videos.id)
+        .execution_options(yield_per=TIER_UPDATE_CHUNK)
+    )
+
+    counts: Counter = Counter()
+    changed = []
+    async for row in result:
+        rate = round(views_per_hour(
+            row.first_views, row.last_views, _as_utc(row.first_at), _as_utc(row.last_at)
+        ), 2)
+        published = _as_utc(row.published)
+        age_hours = (now - published).total_seconds() / 3600 if published else None
+        tier = classify_velocity(rate, age_hours, thresholds)
+        counts[tier] += 1
+        if tier != row.velocity_tier or rate != row.views_per_hour:
+            changed.append({"video_id": row.id, "rate": rate, "tier": tier})
+
+    table = Videos.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("video_id"))
+        .values(
+            views_per_hour=bindparam("rate"),
+            velocity_tier=bindparam("tier"),
+            updated_at=table.c.updated_at,
+        )
+    )
+    for start in range(0, len(changed), TIER_UPDATE_CHUNK):
+        await db.execute(statement, changed[start:start + TIER_UPDATE_CHUNK])
+
+    await refresh_channel_tiers(db)
+    return counts
+
+
+async def refresh_channel_tiers(db: AsyncSession) -> int:
+    """
+    Уровень канала — самый быстрый среди его видео; канал без видео без уровня (без коммита).
+    Возвращаем число каналов, чей уровень сменился.
+    """
+    tier_type = Channel.velocity_tier.type
+
+    def has_videos(*conditions):
+        """Есть ли у канала видео с условием."""
+        return exists().where(Videos.channel_id == Channel.id, *conditions)
+
+    tier = case(
+        (has_videos(Videos.velocity_tier == VelocityTier.HOT), literal(VelocityTier.HOT, tier_type)),
+        (has_videos(Videos.velocity_tier == VelocityTier.WARM), literal(VelocityTier.WARM, tier_type)),
+        (has_videos(), literal(VelocityTier.COLD, tier_type)),
+        else_=None,
+    )
+    # Пишем только каналы, чей уровень сменился, — остальные строки не трогаем
+    result = await db.execute(
+        update(Channel)
+        .where(Channel.velocity_tier.is_distinct_from(tier))
+        .values(velocity_tier=tier, updated_at=Channel.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def load_hot_videos(db: AsyncSession, limit: int) -> list:
+    """
+    Самые быстрые горячие видео платформ, чей парсер обновляет одно видео
+    (HOT_VIDEO_CHANNEL_TYPES): Instagram парсится только пакетом.
+    """
+    if not HOT_VIDEO_CHANNEL_TYPES:
+        return []
+    result = await db.execute(
+        select(
+            Videos.id,
+            Videos.link,
+            Videos.channel_id,
+            Channel.user_id,
+            Channel.type.label("channel_type"),
+        )
+        .join(Channel, Channel.id == Videos.channel_id)
+        .where(
+            Videos.velocity_tier == VelocityTier.HOT,
+            Channel.type.in_(HOT_VIDEO_CHANNEL_TYPES),
+        )
+        .order_by(Videos.views_per_hour.desc(), Videos.id)
+        .limit(limit)
+    )
+    return list(result.all())
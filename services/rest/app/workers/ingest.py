@@ -0,0 +1,239 @@
+"""
+Ingest-потребитель очереди результатов парсинга.
+
+Запуск: python -m app.workers.ingest
+
+Парсеры публикуют в очередь `parsing_results` пакеты вида VideosBulkCreate
+({"channel_id": ..., "videos": [...]}). Потребитель набирает микропакет из
+INGEST_BATCH_SIZE сообщений или за INGEST_BATCH_TIMEOUT_MS миллисекунд,
+записывает его одной транзакцией и подтверждает сообщения только после коммита.
+
+Если пакет падает не из-за недоступности БД, сообщения записываются по одному:
+сломанное переотправляется со счётчиком попыток (заголовок x-ingest-attempts)
+и после INGEST_MAX_ATTEMPTS попадает в INGEST_DEAD_LETTER_QUEUE, остальные коммитятся.
+"""
+import asyncio
+import signal
+from typing import List
+
+from aio_pika import DeliveryMode, IncomingMessage, Message, connect_robust
+from pydantic import ValidationError
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.core.config import settings
+from app.core.db import SessionLocal, engine
+from app.schemas.videos import VideosBulkCreate
+from app.services.videohistory import VideoHistoryService
+from app.services.videos import VideosService
+
+ATTEMPTS_HEADER = "x-ingest-attempts"
+# БД или сеть недоступны: сообщения не виноваты, возвращаем их в очередь без счётчика
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, ConnectionError, OSError, asyncio.TimeoutError)
+
+
+class IngestConsumer:
+    """Пакетный потребитель очереди результатов парсинга."""
+    def __init__(
+        self,
+        amqp_url: str,
+        queue_name: str,
+        batch_size: int,
+        batch_timeout_ms: int,
+        max_attempts: int = 3,
+        dead_letter_queue: str = "parsing_results.dead",
+        retry_backoff_seconds: float = 5,
+    ):
+        """Инициализируем потребителя."""
+        self.amqp_url = amqp_url
+        self.queue_name = queue_name
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = max(batch_timeout_ms, 1) / 1000
+        self.max_attempts = max(1, max_attempts)
+        self.dead_letter_queue = dead_letter_queue
+        self.retry_backoff = max(retry_backoff_seconds, 0)
+        self.connection = None
+        self.channel = None
+        self.queue = None
+        self._buffer: asyncio.Queue[IncomingMessage] = asyncio.Queue()
+        self._stopping = asyncio.Event()
+
+    async def connect(self):
+        """Подключаемся к RabbitMQ."""
+        self.connection = await connect_robust(self.amqp_url)
+        self.channel = await self.connection.channel()
+        # Брокер не должен выдавать больше, чем помещается в один микропакет
+        await self.channel.set_qos(prefetch_count=self.batch_size)
+        self.queue = await self.channel.declare_queue(
+            self.queue_name, durable=True)
+        await self.channel.declare_queue(self.dead_letter_queue, durable=True)
+
+    async def _on_message(self, message: IncomingMessage):
+        """Складываем сообщение в локальный буфер."""
+        await self._buffer.put(message)
+
+    async def _collect_batch(self) -> List[IncomingMessage]:
+        """Ждём первое сообщение, затем добираем пакет до N штук или T мс."""
+        first = await self._buffer.get()
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._buffer.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def process_batch(self, messages: List[IncomingMessage]):
+        """Записываем микропакет одной транзакцией и подтверждаем сообщения."""
+        valid: list[tuple[IncomingMessage, VideosBulkCreate]] = []
+        for message in messages:
+            try:
+                valid.append((message, VideosBulkCreate.model_validate_json(message.body)))
+            except ValidationError as exc:
+                print(f"⚠️ Невалидное сообщение в {self.queue_name}: {exc}")
+                await message.reject(requeue=False)
+
+        if not valid:
+            return
+
+        try:
+            results = await self._write([payload for _, payload in valid])
+        except TRANSIENT_ERRORS as exc:
+            await self._requeue(valid, exc)
+            return
+        except Exception as exc:
+            if len(valid) == 1:
+                await self._retry_or_dead_letter(valid[0][0], exc)
+                return
+            print(f"⚠️ Пакет из {len(valid)} сообщений не записан ({exc!r}) — записываем по одному")
+            for message, payload in valid:
+                await self._process_single(message, payload)
+            return
+        await self._settle(valid, results)
+
+    async def _write(self, payloads: List[VideosBulkCreate]):
+        """Записываем пакеты каналов одной транзакцией."""
+        async with SessionLocal() as db:
+            service = VideosService(db, VideoHistoryService(db))
+            return await service.ingest_many(payloads)
+
+    async def _process_single(self, message: IncomingMessage, payload: VideosBulkCreate):
+        """Записываем одно сообщение отдельно от упавшего пакета."""
+        try:
+            results = await self._write([payload])
+        except TRANSIENT_ERRORS as exc:
+            await self._requeue([(message, payload)], exc)
+            return
+        except Exception as exc:
+            await self._retry_or_dead_letter(message, exc)
+            return
+        await self._settle([(message, payload)], results)
+
+    async def _settle(self, valid: list, results: list):
+        """Подтверждаем записанные сообщения, отклонённые сервисом — отбрасываем."""
+        written = 0
+        for (message, _), result in zip(valid, results):
+            if result is None:
+                await message.reject(requeue=False)
+            else:
+                await message.ack()
+                written += len(result.items)
+        print(f"📥 Записан пакет: {len(valid)} сообщений, {written} видео")
+
+    async def _requeue(self, valid: list, exc: Exception):
+        """БД недоступна: возвращаем сообщения в очередь и выжидаем перед следующим пакетом."""
+        print(f"❌ Ошибка записи пакета из {len(valid)} сообщений: {exc!r}")
+        for message, _ in valid:
+            await message.nack(requeue=True)
+        if self.retry_backoff:
+            await asyncio.sleep(self.retry_backoff)
+
+    async def _retry_or_dead_letter(self, message: IncomingMessage, exc: Exception):
+        """
+        Переотправляем сломанное сообщение в конец очереди с увеличенным счётчиком
+        попыток, а исчерпавшее попытки — в очередь мёртвых писем.
+        """
+        headers = dict(message.headers or {})
+        attempts = int(headers.get(ATTEMPTS_HEADER) or 0) + 1
+        headers[ATTEMPTS_HEADER] = attempts
+        routing_key = self.queue_name
+        if attempts >= self.max_attempts:
+            routing_key = self.dead_letter_queue
+            headers["x-ingest-error"] = repr(exc)[:500]
+            print(f"☠️ Сообщение отправлено в {routing_key} после {attempts} попыток: {exc!r}")
+        else:
+            print(f"⚠️ Сообщение не записано (попытка {attempts}/{self.max_attempts}): {exc!r}")
+        try:
+            await self.channel.default_exchange.publish(
+                Message(
+                    message.body,
+                    headers=headers,
+                    content_type=message.content_type,
+                    delivery_mode=DeliveryMode.PERSISTENT,
+                ),
+                routing_key=routing_key,
+            )
+        except Exception as publish_exc:
+            print(f"❌ Не удалось переотправить сообщение: {publish_exc!r}")
+            await message.nack(requeue=True)
+            return
+        await message.ack()
+
+    async def consume(self):
+        """Запускаем потребление очереди до остановки."""
+        await self.connect()
+        await self.queue.consume(self._on_message, no_ack=False)
+        print(
+            f"✅ Ingest: слушаем очередь '{self.queue_name}' "
+            f"(пакет {self.batch_size} сообщений / {int(self.batch_timeout * 1000)} мс)"
+        )
+        while not self._stopping.is_set():
+            collect = asyncio.ensure_future(self._collect_batch())
+            stop = asyncio.ensure_future(self._stopping.wait())
+            done, _ = await asyncio.wait(
+                {collect, stop}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if collect in done:
+                stop.cancel()
+                await self.process_batch(collect.result())
+            else:
+                collect.cancel()
+
+    def stop(self):
+        """Останавливаем потребление после текущего пакета."""
+        self._stopping.set()
+
+    async def close(self):
+        """Закрываем соединение."""
+        if self.connection and not self.connection.is_closed:
+            await self.connection.close()
+
+
+async def main():
+    """Точка входа ingest-процесса."""
+    consumer = IngestConsumer(
+        amqp_url=settings.RABBITMQ_URL,
+        queue_name=settings.PARSING_RESULTS_QUEUE,
+        batch_size=settings.INGEST_BATCH_SIZE,
+        batch_timeout_ms=settings.INGEST_BATCH_TIMEOUT_MS,
+        max_attempts=settings.INGEST_MAX_ATTEMPTS,
+        dead_letter_queue=settings.INGEST_DEAD_LETTER_QUEUE,
+        retry_backoff_seconds=settings.INGEST_RETRY_BACKOFF_SECONDS,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, consumer.stop)
+    try:
+        await consumer.consume()
+    finally:
+        await consumer.close()
+        await engine.dispose()
+        print("🛑 Ingest остановлен")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())